@@ -78,6 +78,7 @@ intervals = {
     "qb": "",
     "jd": "",
     "nzb": "",
+    "disk": "",
     "stopAll": False,
 }
 qb_torrents = {}
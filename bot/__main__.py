@@ -30,6 +30,7 @@ COMMANDS = {
     "MediaInfoCommand": "- Get media information",
     "SoxCommand": "- Get audio spectrum",
     "ForceStartCommand": "- Force start a task from queue",
+    "PriorityCommand": "- [ADMIN] Re-rank queued tasks",
     "CountCommand": "- Count file/folder on Google Drive",
     "ListCommand": "- Search in Drive",
     "SearchCommand": "- Search for torrents",
@@ -76,6 +77,10 @@ async def main():
     from .core.torrent_manager import TorrentManager
 
     await TorrentManager.initiate()
+    from .helper.ext_utils.bot_utils import THREAD_POOL
+    from .helper.ext_utils.metrics import start_metrics
+
+    start_metrics(THREAD_POOL)
     await gather(
         update_qb_options(),
         update_aria2_options(),
@@ -89,8 +94,16 @@ async def main():
         get_packages_version,
         initiate_search_tools,
         restart_notification,
+        resume_broadcast,
+        start_cluster,
     )
 
+    if Config.CLUSTER_MODE == "worker":
+        # Workers leave the settings, the download directory of a shared host
+        # and everything user facing to the coordinator.
+        await gather(jdownloader.boot(), telegraph.create_account())
+        await start_cluster()
+        return
     await gather(
         set_commands(),
         jdownloader.boot(),
@@ -101,9 +114,11 @@ async def main():
         initiate_search_tools(),
         get_packages_version(),
         restart_notification(),
+        resume_broadcast(),
         telegraph.create_account(),
         rclone_serve_booter(),
     )
+    await start_cluster()
 
 
 bot_loop.run_until_complete(main())
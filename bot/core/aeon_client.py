@@ -20,6 +20,10 @@ class TgClient:
     async def start_bot(cls):
         LOGGER.info("Creating client from BOT_TOKEN")
         cls.ID = Config.BOT_TOKEN.split(":", 1)[0]
+        # Cluster workers only send, the coordinator receives the updates.
+        # Their sessions stay in memory so workers on one host don't share
+        # a session file.
+        is_worker = Config.CLUSTER_MODE == "worker"
         cls.bot = Client(
             cls.ID,
             Config.TELEGRAM_API,
@@ -29,21 +33,29 @@ class TgClient:
             workdir="/usr/src/app",
             parse_mode=enums.ParseMode.HTML,
             max_concurrent_transmissions=100,
+            no_updates=is_worker,
+            in_memory=is_worker,
         )
         await cls.bot.start()
         cls.NAME = cls.bot.me.username
 
     @classmethod
     async def start_user(cls):
-        if Config.USER_SESSION_STRING:
-            LOGGER.info("Creating client from USER_SESSION_STRING")
+        # A session can't be used from two places at once, Telegram rejects
+        # it with AUTH_KEY_DUPLICATED. Workers therefore need their own.
+        if Config.CLUSTER_MODE == "worker":
+            key = "WORKER_SESSION_STRING"
+        else:
+            key = "USER_SESSION_STRING"
+        if session_string := getattr(Config, key):
+            LOGGER.info(f"Creating client from {key}")
             try:
                 cls.user = Client(
                     "user",
                     Config.TELEGRAM_API,
                     Config.TELEGRAM_HASH,
                     proxy=Config.TG_PROXY,
-                    session_string=Config.USER_SESSION_STRING,
+                    session_string=session_string,
                     parse_mode=enums.ParseMode.HTML,
                     no_updates=True,
                     max_concurrent_transmissions=100,
@@ -53,7 +65,7 @@ class TgClient:
                 if cls.IS_PREMIUM_USER:
                     cls.MAX_SPLIT_SIZE = 4194304000
             except Exception as e:
-                LOGGER.error(f"Failed to start client from USER_SESSION_STRING. {e}")
+                LOGGER.error(f"Failed to start client from {key}. {e}")
                 cls.IS_PREMIUM_USER = False
                 cls.user = None
 
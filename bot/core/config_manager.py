@@ -7,16 +7,25 @@ from typing import Any, ClassVar
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Keys describing this process rather than the bot. Nodes of a cluster share
+# the settings stored in the database, so these are never loaded from there.
+NODE_KEYS = {"CLUSTER_MODE", "WORKER_ID", "WORKER_SESSION_STRING", "WORKER_TASKS"}
+
 
 class Config:
     AS_DOCUMENT: bool = False
     AUTHORIZED_CHATS: str = ""
+    BATCH_ADMISSION_RATE: int = 2
     BASE_URL: str = ""
     BASE_URL_PORT: int = 80
     BOT_TOKEN: str = ""
+    CLUSTER_LEASE: int = 60
+    CLUSTER_MAX_ATTEMPTS: int = 3
+    CLUSTER_MODE: str = ""
     CMD_SUFFIX: str = ""
     DATABASE_URL: str = ""
     DEFAULT_UPLOAD: str = "gd"
+    DISK_ADMISSION: bool = True
     EXCLUDED_EXTENSIONS: str = ""
     FFMPEG_CMDS: ClassVar[dict[str, list[str]]] = {}
     FILELION_API: str = ""
@@ -40,6 +49,8 @@ class Config:
     QUEUE_ALL: int = 0
     QUEUE_DOWNLOAD: int = 0
     QUEUE_UPLOAD: int = 0
+    QUEUE_USER_LIMIT: int = 0
+    QUEUE_AGING_TIME: int = 600
     RCLONE_FLAGS: str = ""
     RCLONE_PATH: str = ""
     RCLONE_SERVE_URL: str = ""
@@ -65,6 +76,9 @@ class Config:
     USER_TRANSMISSION: bool = False
     USE_SERVICE_ACCOUNTS: bool = False
     WEB_PINCODE: bool = False
+    WORKER_ID: str = ""
+    WORKER_SESSION_STRING: str = ""
+    WORKER_TASKS: int = 4
     YT_DLP_OPTIONS: ClassVar[dict[str, Any]] = {}
 
     # Aeon-MLTB Specific / Custom Features
@@ -147,6 +161,10 @@ class Config:
                 return "gd"
             return value.lower()
 
+        if key == "CLUSTER_MODE":
+            value = value.lower()
+            return value if value in ["coordinator", "worker"] else ""
+
         if key in {"BASE_URL", "RCLONE_SERVE_URL", "INDEX_URL"}:
             return value.strip("/")
 
@@ -200,6 +218,8 @@ class Config:
     @classmethod
     def load_dict(cls, config_dict: dict[str, Any]):
         for key, value in config_dict.items():
+            if key in NODE_KEYS:
+                continue
             try:
                 cls.set(key, value)
             except Exception as e:
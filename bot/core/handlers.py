@@ -1,5 +1,5 @@
 # ruff: noqa: F405
-from pyrogram.filters import command, regex
+from pyrogram.filters import command, create, regex
 from pyrogram.handlers import (
     CallbackQueryHandler,
     EditedMessageHandler,
@@ -7,13 +7,30 @@ from pyrogram.handlers import (
 )
 
 from bot.helper.telegram_helper.bot_commands import BotCommands
+from bot.helper.telegram_helper.conversation import conversation
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.modules import *
 
 from .aeon_client import TgClient
+from .config_manager import Config
 
 
 def add_handlers():
+    TgClient.bot.add_handler(
+        MessageHandler(
+            conversation.on_message,
+            filters=create(conversation.message_filter),
+        ),
+        group=-1,
+    )
+    TgClient.bot.add_handler(
+        CallbackQueryHandler(
+            conversation.on_callback,
+            filters=create(conversation.callback_filter),
+        ),
+        group=-1,
+    )
+
     command_filters = {
         "authorize": (
             authorize,
@@ -75,6 +92,11 @@ def add_handlers():
             BotCommands.ForceStartCommand,
             CustomFilters.authorized,
         ),
+        "set_priority": (
+            set_priority,
+            BotCommands.PriorityCommand,
+            CustomFilters.sudo,
+        ),
         "count_node": (
             count_node,
             BotCommands.CountCommand,
@@ -120,6 +142,11 @@ def add_handlers():
             BotCommands.ShellCommand,
             CustomFilters.owner,
         ),
+        "loop_profile": (
+            loop_profile,
+            BotCommands.ProfileCommand,
+            CustomFilters.owner,
+        ),
         "start": (
             start,
             BotCommands.StartCommand,
@@ -217,6 +244,15 @@ def add_handlers():
         ),
     }
 
+    if Config.CLUSTER_MODE == "coordinator":
+        for name, handler_func in CLUSTER_COMMANDS.items():
+            _, command_name, custom_filter = command_filters[name]
+            command_filters[name] = (
+                coordinator.route(name, handler_func),
+                command_name,
+                custom_filter,
+            )
+
     for handler_func, command_name, custom_filter in command_filters.values():
         if custom_filter:
             filters_to_apply = (
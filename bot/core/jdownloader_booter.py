@@ -7,6 +7,7 @@ from aioshutil import rmtree
 
 from bot import LOGGER
 from bot.helper.ext_utils.bot_utils import cmd_exec, new_task
+from bot.helper.ext_utils.metrics import instrument_rpc
 from myjd import MyJdApi
 
 from .aeon_client import TgClient
@@ -21,6 +22,17 @@ class JDownloader(MyJdApi):
         self._device_name = ""
         self.is_connected = False
         self.error = "JDownloader Credentials not provided!"
+        for group in (
+            "config",
+            "linkgrabber",
+            "captcha",
+            "downloads",
+            "downloadcontroller",
+            "extensions",
+            "jd",
+            "system",
+        ):
+            instrument_rpc(getattr(self.device, group), "jdownloader", group)
 
     @new_task
     async def boot(self):
@@ -62,6 +62,27 @@ async def update_nzb_options():
     nzb_options.update(no)
 
 
+async def load_user(row):
+    """Writes the files stored in a user document to disk and loads its settings."""
+    uid = row.pop("_id")
+    thumb_path = f"thumbnails/{uid}.jpg"
+    rclone_config_path = f"rclone/{uid}.conf"
+    token_path = f"tokens/{uid}.pickle"
+    if row.get("THUMBNAIL"):
+        async with aiopen(thumb_path, "wb+") as f:
+            await f.write(row["THUMBNAIL"])
+        row["THUMBNAIL"] = thumb_path
+    if row.get("RCLONE_CONFIG"):
+        async with aiopen(rclone_config_path, "wb+") as f:
+            await f.write(row["RCLONE_CONFIG"])
+        row["RCLONE_CONFIG"] = rclone_config_path
+    if row.get("TOKEN_PICKLE"):
+        async with aiopen(token_path, "wb+") as f:
+            await f.write(row["TOKEN_PICKLE"])
+        row["TOKEN_PICKLE"] = token_path
+    user_data[uid] = row
+
+
 async def load_settings():
     """Loads bot settings from the database (if DATABASE_URL is set)
     and applies them to the current runtime configuration.
@@ -163,24 +184,7 @@ async def load_settings():
                     await makedirs(p)
             rows = database.db.users.find({})
             async for row in rows:
-                uid = row["_id"]
-                del row["_id"]
-                thumb_path = f"thumbnails/{uid}.jpg"
-                rclone_config_path = f"rclone/{uid}.conf"
-                token_path = f"tokens/{uid}.pickle"
-                if row.get("THUMBNAIL"):
-                    async with aiopen(thumb_path, "wb+") as f:
-                        await f.write(row["THUMBNAIL"])
-                    row["THUMBNAIL"] = thumb_path
-                if row.get("RCLONE_CONFIG"):
-                    async with aiopen(rclone_config_path, "wb+") as f:
-                        await f.write(row["RCLONE_CONFIG"])
-                    row["RCLONE_CONFIG"] = rclone_config_path
-                if row.get("TOKEN_PICKLE"):
-                    async with aiopen(token_path, "wb+") as f:
-                        await f.write(row["TOKEN_PICKLE"])
-                    row["TOKEN_PICKLE"] = token_path
-                user_data[uid] = row
+                await load_user(row)
             LOGGER.info("User data has been imported from the Database.")
 
         if await database.db.rss[BOT_ID].find_one():
@@ -1,11 +1,14 @@
 import contextlib
-from asyncio import gather
+from asyncio import Event, gather, shield, sleep, wait_for
 from inspect import iscoroutinefunction
 from pathlib import Path
+from time import monotonic
 
 from aioaria2 import Aria2WebsocketClient
 from aiohttp import ClientError
+from aioqbt.api import TorrentInfo
 from aioqbt.client import create_client
+from aioqbt.mapper import ObjectMapper
 from tenacity import (
     retry,
     retry_if_exception_type,
@@ -13,7 +16,8 @@ from tenacity import (
     wait_exponential,
 )
 
-from bot import LOGGER, aria2_options
+from bot import LOGGER, aria2_options, bot_loop, task_dict
+from bot.helper.ext_utils.metrics import instrument_rpc
 
 
 def wrap_with_retry(obj, max_retries=3):
@@ -58,12 +62,44 @@ class TorrentManager:
         cls.aria2 = await Aria2WebsocketClient.new("http://localhost:6800/jsonrpc")
         cls.qbittorrent = await create_client("http://localhost:8090/api/v2/")
         cls.qbittorrent = wrap_with_retry(cls.qbittorrent)
+        instrument_rpc(cls.aria2, "aria2", skip=("close",))
+        for group in ("app", "auth", "sync", "torrents", "transfer"):
+            if (api := getattr(cls.qbittorrent, group, None)) is not None:
+                instrument_rpc(api, "qbittorrent", group)
 
     @classmethod
     async def close_all(cls):
         """Closes connections to both Aria2c and qBittorrent clients."""
         await gather(cls.aria2.close(), cls.qbittorrent.close())
 
+    @classmethod
+    async def aria2_multicall(cls, calls):
+        """Sends many Aria2c calls in a single system.multicall.
+
+        Args:
+            calls: A list of (method, params) tuples, e.g. ("tellStatus", [gid]).
+
+        Returns:
+            The result of every call, None for calls aria2 answered with a fault.
+        """
+        if not calls:
+            return []
+        results = await cls.aria2.multicall(
+            [
+                {"methodName": f"aria2.{method}", "params": params}
+                for method, params in calls
+            ],
+        )
+        return [res[0] if isinstance(res, list) else None for res in results]
+
+    @classmethod
+    async def aria2_downloads(cls):
+        """Returns the active and waiting downloads of Aria2c from a single multicall."""
+        active, waiting = await cls.aria2_multicall(
+            [("tellActive", []), ("tellWaiting", [0, 1000])],
+        )
+        return (active or []) + (waiting or [])
+
     @classmethod
     async def aria2_remove(cls, download):
         """Removes a download from Aria2c.
@@ -75,11 +111,36 @@ class TorrentManager:
             download: A dictionary containing download information from Aria2c.
         """
         if download.get("status", "") in ["active", "paused", "waiting"]:
+            aria2_state.removing([download.get("gid", "")])
             await cls.aria2.forceRemove(download.get("gid", ""))
         else:
             with contextlib.suppress(Exception):
                 await cls.aria2.removeDownloadResult(download.get("gid", ""))
 
+    @classmethod
+    async def aria2_remove_many(cls, downloads):
+        """Removes many downloads from Aria2c in a single system.multicall.
+
+        Each download is removed the same way as in `aria2_remove`. Failures of
+        individual calls are returned by aria2 as faults and ignored.
+
+        Args:
+            downloads: A list of dictionaries with download information from Aria2c.
+        """
+        calls = [
+            (
+                "forceRemove"
+                if download.get("status", "") in ["active", "paused", "waiting"]
+                else "removeDownloadResult",
+                [download.get("gid", "")],
+            )
+            for download in downloads
+        ]
+        aria2_state.removing(
+            params[0] for method, params in calls if method == "forceRemove"
+        )
+        await cls.aria2_multicall(calls)
+
     @classmethod
     async def remove_all(cls):
         """Pauses all downloads and then removes them from both Aria2c and qBittorrent."""
@@ -88,19 +149,8 @@ class TorrentManager:
             cls.qbittorrent.torrents.delete("all", False),
             cls.aria2.purgeDownloadResult(),
         )
-        downloads = []
-        results = await gather(
-            cls.aria2.tellActive(),
-            cls.aria2.tellWaiting(0, 1000),
-        )
-        for res in results:
-            downloads.extend(res)
-        tasks = []
-        tasks.extend(
-            cls.aria2.forceRemove(download.get("gid")) for download in downloads
-        )
         with contextlib.suppress(Exception):
-            await gather(*tasks)
+            await cls.aria2_remove_many(await cls.aria2_downloads())
 
     @classmethod
     async def overall_speed(cls):
@@ -125,35 +175,263 @@ class TorrentManager:
     @classmethod
     async def change_aria2_option(cls, key, value):
         """Changes a specific option for all active/waiting Aria2c downloads
-        and globally if applicable.
+        and globally if applicable, all in a single multicall.
 
         Args:
             key: The Aria2c option key to change.
             value: The new value for the option.
         """
-        downloads = []
-        results = await gather(
-            cls.aria2.tellActive(),
-            cls.aria2.tellWaiting(0, 1000),
-        )
-        for res in results:
-            downloads.extend(res)
-
-        tasks = [
-            cls.aria2.changeOption(download.get("gid"), {key: value})
-            for download in downloads
+        calls = [
+            ("changeOption", [download.get("gid"), {key: value}])
+            for download in await cls.aria2_downloads()
             if download.get("status", "") != "complete"
         ]
+        is_global = key not in [
+            "checksum",
+            "index-out",
+            "out",
+            "pause",
+            "select-file",
+        ]
+        if is_global:
+            calls.append(("changeGlobalOption", [{key: value}]))
+        results = await cls.aria2_multicall(calls)
+        global_result = results.pop() if is_global else None
+        if failed := results.count(None):
+            LOGGER.error(
+                f"Aria2c: {key} could not be changed for {failed} downloads"
+            )
+        if is_global:
+            if global_result is None:
+                raise RuntimeError(f"Aria2c rejected the global option {key}")
+            aria2_options[key] = value
+
+
+# Seconds a status is served from the mirror before the next read refreshes
+# every followed download. Entries nobody asked for in STALE seconds are
+# dropped.
+MAX_AGE = 1
+STALE = 600
+# How long a notification waits for add_aria2_download to register the task
+# of its gid, and how often a wait for a state change asks aria2 itself in
+# case a notification got lost.
+TASK_WAIT = 10
+FALLBACK_INTERVAL = 15
+
 
-        if tasks:
+class Aria2State:
+    """A local mirror of the Aria2c downloads of the bot.
+
+    Every status read older than MAX_AGE refreshes all followed downloads with
+    a single system.multicall, so the status message costs one RPC however
+    many aria2 tasks it shows. The notification handlers refresh their gid,
+    which wakes whoever waits for that gid to change: callers await the task
+    of a gid or a state of its download instead of sleeping and polling.
+    """
+
+    def __init__(self):
+        self.downloads = {}
+        self._stamps = {}
+        self._options = {}
+        self._tasks = {}
+        self._gone = set()
+        self._removed = set()
+        self._wanted = set()
+        self._changed = {}
+        self._bound = {}
+        self._refresh = None
+
+    def bind(self, gid, task):
+        """Follows the download of a task, done by Aria2Status."""
+        self._tasks[gid] = task
+        if event := self._bound.pop(gid, None):
+            event.set()
+
+    def followed(self, gid, new_gid):
+        """Moves a task from its metadata download to the torrent that followed it."""
+        if (task := self._tasks.pop(gid, None)) is not None:
+            self.bind(new_gid, task)
+
+    def removing(self, gids):
+        """Marks downloads the bot stops itself, their stop notification is expected."""
+        self._removed.update(gids)
+
+    def removed_by_bot(self, gid):
+        return gid in self._removed
+
+    def task(self, gid):
+        """The task of a gid while it is in task_dict."""
+        task = self._tasks.get(gid)
+        if task is None or task_dict.get(task.listener.mid) is not task:
+            return None
+        return task
+
+    async def wait_task(self, gid):
+        """The task of a gid, waiting for it to be registered if it wasn't yet."""
+        if gid not in self._tasks:
+            event = self._bound.setdefault(gid, Event())
+            with contextlib.suppress(TimeoutError):
+                await wait_for(event.wait(), TASK_WAIT)
+            if not event.is_set():
+                self._bound.pop(gid, None)
+        return self.task(gid)
+
+    def _store(self, gid, info):
+        # A fault means aria2 forgot the gid, the last known status is kept.
+        if info is None:
+            self._gone.add(gid)
+        else:
+            self.downloads[gid] = info
+        self._stamps[gid] = monotonic()
+        if event := self._changed.pop(gid, None):
+            event.set()
+
+    async def _refresh_all(self):
+        # Lets every reader of this loop iteration join the call.
+        await sleep(0)
+        gids = list(self._wanted | {gid for gid in self._tasks if self.task(gid)})
+        self._wanted = set()
+        results = await TorrentManager.aria2_multicall(
+            [("tellStatus", [gid]) for gid in gids],
+        )
+        for gid, info in zip(gids, results, strict=True):
+            self._store(gid, info)
+        stale = monotonic() - STALE
+        for gid in set(self._stamps) | set(self._tasks):
+            if self._stamps.get(gid, 0) < stale and self.task(gid) is None:
+                self.forget(gid)
+
+    def forget(self, gid):
+        self.downloads.pop(gid, None)
+        self._stamps.pop(gid, None)
+        self._options.pop(gid, None)
+        self._tasks.pop(gid, None)
+        self._gone.discard(gid)
+        self._removed.discard(gid)
+
+    async def status(self, gid, max_age=MAX_AGE):
+        """The status of a download, refreshed with all followed downloads
+        once it is older than max_age seconds. Errors keep the last known one.
+        """
+        requested = monotonic()
+        while self._stamps.get(gid, 0) < requested - max_age:
+            self._wanted.add(gid)
+            if self._refresh is None or self._refresh.done():
+                self._refresh = bot_loop.create_task(self._refresh_all())
             try:
-                await gather(*tasks)
+                await shield(self._refresh)
             except Exception as e:
-                LOGGER.error(e)
+                LOGGER.error(f"{e}: Aria2c, Error while getting torrent info")
+                break
+        return self.downloads.get(gid, {})
 
-        if key not in ["checksum", "index-out", "out", "pause", "select-file"]:
-            await cls.aria2.changeGlobalOption({key: value})
-            aria2_options[key] = value
+    async def fetch(self, gid):
+        """Refreshes one download with a single multicall, which also gets its
+        options the first time. Options are kept, the notification handlers
+        only read the ones set when the download was added.
+
+        Returns:
+            A tuple (status, options).
+        """
+        calls = [("tellStatus", [gid])]
+        if gid not in self._options:
+            calls.append(("getOption", [gid]))
+        results = await TorrentManager.aria2_multicall(calls)
+        if len(results) > 1 and results[1] is not None:
+            self._options[gid] = results[1]
+        self._store(gid, results[0])
+        return self.downloads.get(gid, {}), self._options.get(gid, {})
+
+    async def wait_until(self, gid, predicate, interval=FALLBACK_INTERVAL):
+        """Waits until the download of gid matches predicate or aria2 forgot
+        it, woken whenever its status is refreshed.
+
+        Returns:
+            The last known status.
+        """
+        while gid not in self._gone and not predicate(self.downloads.get(gid, {})):
+            event = self._changed.setdefault(gid, Event())
+            try:
+                await wait_for(event.wait(), interval)
+            except TimeoutError:
+                await self.status(gid, 0)
+        return self.downloads.get(gid, {})
+
+
+aria2_state = Aria2State()
+
+
+class QbitState:
+    """A local table of the qBittorrent torrents.
+
+    Every sync applies the rid-based delta of sync/maindata, which holds only
+    the fields of the torrents that changed since the previous sync, so a
+    sync costs in proportion to the changes and not to the torrents.
+    Torrents are kept as raw dicts and turned into TorrentInfo when read.
+    """
+
+    def __init__(self):
+        self._rid = 0
+        self._torrents = {}
+        self._infos = {}
+        self._tags = {}
+        self._mapper = ObjectMapper()
+
+    def __len__(self):
+        return len(self._torrents)
+
+    def _forget(self, hash_):
+        self._torrents.pop(hash_, None)
+        self._infos.pop(hash_, None)
+        for tag in [tag for tag, tagged in self._tags.items() if tagged == hash_]:
+            del self._tags[tag]
+
+    async def sync(self):
+        """Applies the changes since the last sync.
+
+        Returns:
+            The hashes of the torrents that were added or changed.
+        """
+        data = await TorrentManager.qbittorrent.sync.maindata(self._rid)
+        if data.full_update:
+            self._torrents = {}
+            self._infos = {}
+            self._tags = {}
+        for hash_ in data.torrents_removed:
+            self._forget(hash_)
+        for hash_, delta in data.torrents.items():
+            torrent = self._torrents.setdefault(hash_, {"hash": hash_})
+            torrent.update(delta)
+            self._infos.pop(hash_, None)
+            if "tags" in delta:
+                for tag in [
+                    t for t, tagged in self._tags.items() if tagged == hash_
+                ]:
+                    del self._tags[tag]
+                for tag in self.info(hash_).tags:
+                    self._tags[tag] = hash_
+        self._rid = data.rid
+        return set(data.torrents)
+
+    def info(self, hash_):
+        """The TorrentInfo of a torrent as of the last sync, None if unknown."""
+        if (info := self._infos.get(hash_)) is None:
+            if (torrent := self._torrents.get(hash_)) is None:
+                return None
+            info = self._infos[hash_] = self._mapper.create_object(
+                TorrentInfo,
+                torrent,
+                {},
+            )
+        return info
+
+    def by_tag(self, tag):
+        if (hash_ := self._tags.get(tag)) is None:
+            return None
+        return self.info(hash_)
+
+
+qbit_state = QbitState()
 
 
 def aria2_name(download_info):
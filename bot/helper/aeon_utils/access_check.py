@@ -1,7 +1,9 @@
+from asyncio import gather
 from re import IGNORECASE, escape, search
 from time import time
 from uuid import uuid4
 
+from cachetools import TTLCache
 from pyrogram.errors import PeerIdInvalid, RPCError, UserNotParticipant
 
 from bot import (
@@ -16,6 +18,19 @@ from bot.helper.ext_utils.help_messages import nsfw_keywords
 from bot.helper.ext_utils.status_utils import get_readable_time
 from bot.helper.telegram_helper.button_build import ButtonMaker
 
+# Only passed checks are cached. A user who joins a channel, starts the bot
+# or collects a token is let through at once, one who leaves a channel keeps
+# access for up to MEMBER_TTL.
+CHAT_TTL = 600
+MEMBER_TTL = 120
+PM_TTL = 600
+TOKEN_TTL = 60
+
+_chats = TTLCache(maxsize=64, ttl=CHAT_TTL)
+_members = TTLCache(maxsize=8192, ttl=MEMBER_TTL)
+_pm_users = TTLCache(maxsize=4096, ttl=PM_TTL)
+_token_expiry = TTLCache(maxsize=4096, ttl=TOKEN_TTL)
+
 
 async def error_check(message):
     """
@@ -32,64 +47,34 @@ async def error_check(message):
         error/info message string for the user (or None if no issues),
         and button is a ButtonMaker object with relevant buttons (or None).
     """
-    msg, button = [], None
     user = message.from_user or message.sender_chat
     user_id = user.id
     token_timeout = Config.TOKEN_TIMEOUT
     if Config.RSS_CHAT and user_id == int(Config.RSS_CHAT):
         return None, None
 
+    # The checks add their buttons to different rows of the shared button,
+    # so they run side by side.
+    button = ButtonMaker()
+    checks = []
     if message.chat.type != message.chat.type.BOT:
         if FSUB_IDS := Config.FSUB_IDS:
-            join_button = {}
-            for channel_id in FSUB_IDS.split():
-                chat = await get_chat_info(int(channel_id))
-                if not chat:
-                    continue
-
-                try:
-                    await chat.get_member(message.from_user.id)
-                except UserNotParticipant:
-                    invite_link = (
-                        f"https://t.me/{chat.username}"
-                        if chat.username
-                        else chat.invite_link
-                    )
-                    join_button[chat.title] = invite_link
-                except RPCError as e:
-                    LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {channel_id}")
-                except Exception as e:
-                    LOGGER.error(f"{e} for {channel_id}")
-
-            if join_button:
-                button = button or ButtonMaker()
-                for title, link in join_button.items():
-                    button.url_button(f"Join {title}", link, "footer")
-                msg.append("You haven't joined our channel/group yet!")
-
+            checks.append(fsub_check(FSUB_IDS, message.from_user.id, button))
         if not token_timeout or user_id in {
             Config.OWNER_ID,
             user_data.get(user_id, {}).get("SUDO"),
         }:
-            try:
-                temp_msg = await message._client.send_message(
-                    chat_id=user_id,
-                    text="<b>Checking Access...</b>",
-                )
-                await temp_msg.delete()
-            except Exception:
-                button = button or ButtonMaker()
-                button.data_button("Start", f"aeon {user_id} private", "header")
-                msg.append("You haven't initiated the bot in a private message!")
+            checks.append(pm_check(message._client, user_id, button))
 
     if user_id not in {
         Config.OWNER_ID,
         Config.RSS_CHAT,
         user_data.get(user_id, {}).get("SUDO"),
     }:
-        token_msg, button = await token_check(user_id, button)
-        if token_msg:
-            msg.append(token_msg)
+        checks.append(token_check(user_id, button))
+
+    msg = [check_msg for check_msg, _ in await gather(*checks) if check_msg]
+    has_button = bool(msg)
 
     if await nsfw_precheck(message):
         msg.append("NSFW detected")
@@ -101,15 +86,69 @@ async def error_check(message):
         for i, m in enumerate(msg, 1):
             final_msg += f"\n<blockquote><b>{i}</b>: {m}</blockquote>"
 
-        if button:
-            button = button.build_menu(2)
-        return final_msg, button
+        return final_msg, button.build_menu(2) if has_button else None
 
     return None, None
 
 
+async def fsub_check(fsub_ids, user_id, button):
+    """Checks the membership of a user in all FSUB channels at once.
+
+    Args:
+        fsub_ids: The space separated channel IDs.
+        user_id: The user ID to check.
+        button: The ButtonMaker to add join buttons to.
+
+    Returns:
+        A tuple (message_string, button), the message is None if the user
+        joined every channel.
+    """
+    chats = [
+        chat
+        for chat in await gather(
+            *(get_chat_info(int(channel_id)) for channel_id in fsub_ids.split())
+        )
+        if chat
+    ]
+    joined = await gather(*(get_member_status(chat, user_id) for chat in chats))
+    join_button = {
+        chat.title: f"https://t.me/{chat.username}"
+        if chat.username
+        else chat.invite_link
+        for chat, member in zip(chats, joined, strict=True)
+        if member is False
+    }
+    if not join_button:
+        return None, button
+    for title, link in join_button.items():
+        button.url_button(f"Join {title}", link, "footer")
+    return "You haven't joined our channel/group yet!", button
+
+
+async def pm_check(client, user_id, button):
+    """Checks if the user has initiated a private message with the bot.
+
+    Returns:
+        A tuple (message_string, button), the message is None if the bot
+        can message the user.
+    """
+    if user_id in _pm_users:
+        return None, button
+    try:
+        temp_msg = await client.send_message(
+            chat_id=user_id,
+            text="<b>Checking Access...</b>",
+        )
+        await temp_msg.delete()
+    except Exception:
+        button.data_button("Start", f"aeon {user_id} private", "header")
+        return "You haven't initiated the bot in a private message!", button
+    _pm_users[user_id] = True
+    return None, button
+
+
 async def get_chat_info(channel_id):
-    """Gets chat information for the given channel ID.
+    """Gets chat information for the given channel ID, cached for CHAT_TTL.
 
     Args:
         channel_id: The ID of the channel.
@@ -117,11 +156,38 @@ async def get_chat_info(channel_id):
     Returns:
         A Chat object if found, otherwise None.
     """
+    if channel_id in _chats:
+        return _chats[channel_id]
     try:
-        return await TgClient.bot.get_chat(channel_id)
+        chat = await TgClient.bot.get_chat(channel_id)
     except PeerIdInvalid as e:
         LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {channel_id}")
+        chat = None
+    _chats[channel_id] = chat
+    return chat
+
+
+async def get_member_status(chat, user_id):
+    """Checks if a user is a member of a chat. Memberships are cached for
+    MEMBER_TTL.
+
+    Returns:
+        True if the user is a member, False if not, None if the check failed.
+    """
+    if (chat.id, user_id) in _members:
+        return True
+    try:
+        await chat.get_member(user_id)
+    except UserNotParticipant:
+        return False
+    except RPCError as e:
+        LOGGER.error(f"{e.NAME}: {e.MESSAGE} for {chat.id}")
         return None
+    except Exception as e:
+        LOGGER.error(f"{e} for {chat.id}")
+        return None
+    _members[chat.id, user_id] = True
+    return True
 
 
 def is_nsfw(text):
@@ -202,14 +268,7 @@ async def check_is_paid(chat, uid):
     Returns:
         True if the user is a member, False otherwise.
     """
-    try:
-        await chat.get_member(uid)
-        return True
-    except UserNotParticipant:
-        return False
-    except Exception as e:
-        LOGGER.error(f"{e} for {chat.id}")
-        return False
+    return bool(await get_member_status(chat, uid))
 
 
 async def is_paid(user_id):
@@ -247,7 +306,10 @@ async def token_check(user_id, button=None):
 
     user_data.setdefault(user_id, {})
     data = user_data[user_id]
-    data["TIME"] = await database.get_token_expiry(user_id)
+    if user_id in _token_expiry:
+        data["TIME"] = _token_expiry[user_id]
+    else:
+        data["TIME"] = await database.get_token_expiry(user_id)
     expire = data.get("TIME")
     isExpired = expire is None or (time() - expire) > token_timeout
     if isExpired:
@@ -271,4 +333,7 @@ async def token_check(user_id, button=None):
 
         return (msg + f"\n<b>It will expire after {time_str}</b>!"), button
 
+    # A cached expiry must not run out while it is cached.
+    if time() - expire + TOKEN_TTL <= token_timeout:
+        _token_expiry[user_id] = expire
     return None, button
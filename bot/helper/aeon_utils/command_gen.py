@@ -1,8 +1,7 @@
 import json
-from asyncio import create_subprocess_exec
-from asyncio.subprocess import PIPE
 
 from bot import LOGGER, cpu_no
+from bot.helper.ext_utils.bot_utils import cmd_exec
 
 
 async def get_streams(file):
@@ -26,18 +25,17 @@ async def get_streams(file):
         "-show_streams",
         file,
     ]
-    process = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-    stdout, stderr = await process.communicate()
+    stdout, stderr, code = await cmd_exec(cmd, priority="background")
 
-    if process.returncode != 0:
-        LOGGER.error(f"Error getting stream info: {stderr.decode().strip()}")
+    if code != 0:
+        LOGGER.error(f"Error getting stream info: {stderr}")
         return None
 
     try:
         return json.loads(stdout)["streams"]
     except KeyError:
         LOGGER.error(
-            f"No streams found in the ffprobe output: {stdout.decode().strip()}",
+            f"No streams found in the ffprobe output: {stdout}",
         )
         return None
 
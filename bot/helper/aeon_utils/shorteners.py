@@ -1,17 +1,69 @@
-from asyncio import sleep
-from random import choice
+from asyncio import FIRST_COMPLETED, sleep, wait
+from random import sample
 from urllib.parse import quote
 
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ClientTimeout
+from cachetools import TTLCache
 from pyshorteners import Shortener
 
-from bot import shorteners_list
+from bot import bot_loop, shorteners_list
+from bot.helper.ext_utils.bot_utils import sync_to_async
+
+# Providers asked at once, the first link returned wins.
+RACE_SIZE = 4
+SHORTEN_TIMEOUT = 10
+# A token link is shortened again on every command until it is collected.
+SHORT_TTL = 600
+
+_short_links = TTLCache(maxsize=1024, ttl=SHORT_TTL)
+
+
+async def _shorten(session, shortener_info, long_url):
+    async with session.get(
+        f"https://{shortener_info['domain']}/api?api={shortener_info['api_key']}&url={quote(long_url)}",
+    ) as response:
+        result = await response.json(content_type=None)
+    short_url = result.get("shortenedUrl")
+    if not short_url or short_url == long_url:
+        raise ValueError(f"{shortener_info['domain']} returned no link")
+    return short_url
+
+
+async def _race(long_url):
+    """
+    Sends long_url to up to RACE_SIZE random shorteners at once.
+
+    Returns:
+        The first link a shortener returned, or None if all of them failed.
+    """
+    async with ClientSession(
+        timeout=ClientTimeout(total=SHORTEN_TIMEOUT)
+    ) as session:
+        pending = {
+            bot_loop.create_task(_shorten(session, shortener_info, long_url))
+            for shortener_info in sample(
+                shorteners_list,
+                min(RACE_SIZE, len(shorteners_list)),
+            )
+        }
+        try:
+            while pending:
+                done, pending = await wait(pending, return_when=FIRST_COMPLETED)
+                if links := [
+                    task.result() for task in done if task.exception() is None
+                ]:
+                    return links[0]
+        finally:
+            for task in pending:
+                task.cancel()
+    return None
 
 
 async def short(long_url):
     """
-    Shortens a given long URL using a randomly chosen shortener from a predefined list,
-    with a fallback to TinyURL if custom shorteners fail or are not configured.
+    Shortens a given long URL with the first of several randomly chosen
+    shorteners that answers, then with TinyURL. Results are cached for
+    SHORT_TTL seconds.
 
     Args:
         long_url: The long URL to be shortened.
@@ -21,27 +73,17 @@ async def short(long_url):
     """
     if not shorteners_list:
         return long_url
+    if long_url in _short_links:
+        return _short_links[long_url]
 
-    async with ClientSession() as session:
-        for _attempt in range(4):
-            shortener_info = choice(shorteners_list)
-            try:
-                async with session.get(
-                    f"https://{shortener_info['domain']}/api?api={shortener_info['api_key']}&url={quote(long_url)}",
-                ) as response:
-                    result = await response.json()
-                    short_url = result.get("shortenedUrl", long_url)
-                    if short_url != long_url:
-                        long_url = short_url
-                        break
-            except Exception:
-                continue
-
-        s = Shortener()
-        for _attempt in range(4):
-            try:
-                return s.tinyurl.short(long_url)
-            except Exception:
-                await sleep(1)
-
-        return long_url
+    short_url = await _race(long_url) or long_url
+    s = Shortener()
+    for _attempt in range(4):
+        try:
+            short_url = await sync_to_async(s.tinyurl.short, short_url)
+            break
+        except Exception:
+            await sleep(1)
+    if short_url != long_url:
+        _short_links[long_url] = short_url
+    return short_url
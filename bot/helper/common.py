@@ -1,6 +1,6 @@
 import contextlib
 import os
-from asyncio import gather, sleep
+from asyncio import Semaphore, gather
 from collections import Counter
 from copy import deepcopy
 from os import path as ospath
@@ -18,8 +18,8 @@ from bot import (
     DOWNLOAD_DIR,
     LOGGER,
     cpu_eater_lock,
+    cpu_no,
     excluded_extensions,
-    intervals,
     multi_tags,
     task_dict,
     task_dict_lock,
@@ -33,6 +33,7 @@ from bot.helper.aeon_utils.command_gen import (
     get_watermark_cmd,
 )
 
+from .ext_utils.batch_utils import BatchIngest
 from .ext_utils.bot_utils import get_size_bytes, new_task, sync_to_async
 from .ext_utils.bulk_links import extract_bulk_links
 from .ext_utils.files_utils import (
@@ -55,6 +56,7 @@ from .ext_utils.media_utils import (
     create_thumb,
     get_document_type,
     is_mkv,
+    move_extracted_frames,
     take_ss,
 )
 from .mirror_leech_utils.gdrive_utils.list import GoogleDriveList
@@ -64,7 +66,6 @@ from .mirror_leech_utils.status_utils.sevenz_status import SevenZStatus
 from .telegram_helper.message_utils import (
     get_tg_link_message,
     send_message,
-    send_status_message,
     temp_download,
 )
 
@@ -134,6 +135,8 @@ class TaskConfig:
         self.chat_thread_id = None
         self.subproc = None
         self.thumb = None
+        self.batch = None
+        self.priority = None
         self.excluded_extensions = []
         self.files_to_proceed = []
         self.is_super_chat = self.message.chat.type.name in ["SUPERGROUP", "CHANNEL"]
@@ -624,111 +627,37 @@ class TaskConfig:
 
     @new_task
     async def run_multi(self, input_list, obj):
-        await sleep(7)
-        if not self.multi_tag and self.multi > 1:
+        if self.batch or self.multi <= 1:
+            return
+        if not self.multi_tag:
             self.multi_tag = token_hex(2)
             multi_tags.add(self.multi_tag)
-        elif self.multi <= 1:
-            if self.multi_tag in multi_tags:
-                multi_tags.discard(self.multi_tag)
-            return
-        if self.multi_tag and self.multi_tag not in multi_tags:
-            await send_message(
-                self.message,
-                f"{self.tag} Multi-task has been cancelled!",
-            )
-            await send_status_message(self.message)
-            async with task_dict_lock:
-                for fd_name in self.same_dir:
-                    self.same_dir[fd_name]["total"] -= self.multi
-            return
-        if len(self.bulk) != 0:
-            msg = input_list[:1]
-            msg.append(f"{self.bulk[0]} -i {self.multi - 1} {self.options}")
-            msgts = " ".join(msg)
-            if self.multi > 2:
-                msgts += f"\nCancel Multi: <code>/stop {self.multi_tag}</code>"
-            nextmsg = await send_message(self.message, msgts)
-        else:
-            msg = [s.strip() for s in input_list]
-            index = msg.index("-i")
-            msg[index + 1] = f"{self.multi - 1}"
-            nextmsg = await self.client.get_messages(
-                chat_id=self.message.chat.id,
-                message_ids=self.message.reply_to_message_id + 1,
-            )
-            msgts = " ".join(msg)
-            if self.multi > 2:
-                msgts += f"\nCancel Multi: <code>/stop {self.multi_tag}</code>"
-            nextmsg = await send_message(nextmsg, msgts)
-        nextmsg = await self.client.get_messages(
-            chat_id=self.message.chat.id,
-            message_ids=nextmsg.id,
-        )
-        if self.message.from_user:
-            nextmsg.from_user = self.user
-        else:
-            nextmsg.sender_chat = self.user
-        if intervals["stopAll"]:
-            return
-        await obj(
-            self.client,
-            nextmsg,
-            self.is_qbit,
-            self.is_leech,
-            self.is_jd,
-            self.is_nzb,
-            self.same_dir,
-            self.bulk,
-            self.multi_tag,
-            self.options,
-        ).new_event()
+        await BatchIngest(self, obj, input_list).run()
 
     async def init_bulk(self, input_list, bulk_start, bulk_end, obj):
         try:
             self.bulk = await extract_bulk_links(self.message, bulk_start, bulk_end)
             if len(self.bulk) == 0:
                 raise ValueError("Bulk Empty!")
-            b_msg = input_list[:1]
             self.options = input_list[1:]
             index = self.options.index("-b")
             del self.options[index]
             if bulk_start or bulk_end:
                 del self.options[index + 1]
             self.options = " ".join(self.options)
-            b_msg.append(f"{self.bulk[0]} -i {len(self.bulk)} {self.options}")
-            msg = " ".join(b_msg)
-            if len(self.bulk) > 2:
-                self.multi_tag = token_hex(2)
-                multi_tags.add(self.multi_tag)
-                msg += f"\nCancel Multi: <code>/stop {self.multi_tag}</code>"
-            nextmsg = await send_message(self.message, msg)
-            nextmsg = await self.client.get_messages(
-                chat_id=self.message.chat.id,
-                message_ids=nextmsg.id,
-            )
-            if self.message.from_user:
-                nextmsg.from_user = self.user
-            else:
-                nextmsg.sender_chat = self.user
-            await obj(
-                self.client,
-                nextmsg,
-                self.is_qbit,
-                self.is_leech,
-                self.is_jd,
-                self.is_nzb,
-                self.same_dir,
-                self.bulk,
-                self.multi_tag,
-                self.options,
-            ).new_event()
+            await self.get_tag(self.message.text.split("\n"))
+            await self.run_bulk(input_list, obj)
         except Exception as e:
             await send_message(
                 self.message,
                 f"Reply to a text file or a Telegram message with links separated by new lines. Error: {e}",
             )
 
+    async def run_bulk(self, input_list, obj):
+        self.multi_tag = token_hex(2)
+        multi_tags.add(self.multi_tag)
+        await BatchIngest(self, obj, input_list[:1], self.bulk).run()
+
     async def proceed_extract(self, dl_path, gid):
         """Extracts archives from the downloaded path."""
         pswd = self.extract if isinstance(self.extract, str) else ""
@@ -1042,12 +971,17 @@ class TaskConfig:
         return dl_path
 
     async def generate_screenshots(self, dl_path):
-        """Generates screenshots for video files."""
+        """
+        Generates screenshots for video files, several files at a time within
+        the CPU budget. Leech tasks get the default thumbnail and the
+        thumbnail layout tile from the same ffmpeg run.
+        """
         ss_nb = int(self.screen_shots) if isinstance(self.screen_shots, str) else 10
+        layout = self.thumbnail_layout if self.is_leech else None
         if self.is_file:
             if (await get_document_type(dl_path))[0]:
                 LOGGER.info(f"Creating Screenshot for: {dl_path}")
-                res = await take_ss(dl_path, ss_nb)
+                res = await take_ss(dl_path, ss_nb, layout, self.is_leech)
                 if res:
                     new_folder = ospath.splitext(dl_path)[0]
                     name = ospath.basename(dl_path)
@@ -1056,18 +990,30 @@ class TaskConfig:
                         move(dl_path, f"{new_folder}/{name}"),
                         move(res, new_folder),
                     )
+                    move_extracted_frames(dl_path, f"{new_folder}/{name}")
                     return new_folder
         else:
             LOGGER.info(f"Creating Screenshot for: {dl_path}")
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
-                for file_ in files:
-                    f_path = ospath.join(dirpath, file_)
+            budget = Semaphore(max(1, cpu_no // 2))
+
+            async def _take_ss(f_path):
+                async with budget:
+                    if self.is_cancelled:
+                        return
                     if (await get_document_type(f_path))[0]:
-                        await take_ss(f_path, ss_nb)
+                        await take_ss(f_path, ss_nb, layout, self.is_leech)
+
+            await gather(
+                *(
+                    _take_ss(ospath.join(dirpath, file_))
+                    for dirpath, _, files in await sync_to_async(
+                        walk,
+                        dl_path,
+                        topdown=False,
+                    )
+                    for file_ in files
+                ),
+            )
         return dl_path
 
     async def convert_media(self, dl_path, gid):
@@ -0,0 +1,200 @@
+from asyncio import gather, sleep
+from copy import copy
+from time import time
+from weakref import WeakValueDictionary
+
+from bot import (
+    DOWNLOAD_DIR,
+    LOGGER,
+    bot_loop,
+    intervals,
+    multi_tags,
+    task_dict,
+    task_dict_lock,
+)
+from bot.core.config_manager import Config
+from bot.helper.ext_utils.status_utils import item_listeners
+from bot.helper.telegram_helper.message_utils import (
+    edit_message,
+    send_message,
+    send_status_message,
+)
+
+STATUS_UPDATE_INTERVAL = 5
+
+# Batches by tag. Items hold their batch, so a batch stays here until it and
+# all of its items are gone.
+batches = WeakValueDictionary()
+
+
+async def batch_owner(tag):
+    """The user id of the batch with tag, None if no such batch runs."""
+    if (batch := batches.get(tag)) is not None:
+        return batch.user_id
+    async with task_dict_lock:
+        for task in task_dict.values():
+            if task.listener.multi_tag == tag:
+                return task.listener.user_id
+    return None
+
+
+async def cancel_batch(tag):
+    """
+    Cancels a whole batch: stops admitting its remaining items and cancels
+    every task of the batch that is already running or queued.
+    """
+    multi_tags.discard(tag)
+    async with task_dict_lock:
+        tasks = [
+            task for task in task_dict.values() if task.listener.multi_tag == tag
+        ]
+    await gather(*(task.task().cancel_task() for task in tasks))
+    return len(tasks)
+
+
+class BatchIngest:
+    """
+    Admits the items of a bulk (-b) or multi (-i) request in-process.
+
+    The request is parsed once by the parent listener. Every remaining item gets
+    its own listener built directly from the parent, without sending a new
+    Telegram message per item, and is started at the configured admission rate.
+    Progress of the whole batch is reported in a single message.
+    """
+
+    def __init__(self, listener, obj, input_list, links=None):
+        """
+        Args:
+            listener: The parent listener holding the parsed request.
+            obj: The listener class used for every item.
+            input_list: The command tokens of the parent request.
+            links: The links of a bulk request. None for a multi request, whose
+                items are the messages following the replied message.
+        """
+        self._listener = listener
+        self._obj = obj
+        self._input_list = input_list
+        self._links = links
+        self.tag = listener.multi_tag
+        self.mid = listener.mid
+        self.user_id = listener.user_id
+        self.total = len(links) if links is not None else listener.multi - 1
+        self.admitted = 0
+        self._status_msg = None
+        self._last_update = 0
+        batches[self.tag] = self
+
+    def _item_text(self, index, item):
+        remaining = self.total - index
+        if self._links is not None:
+            return f"{self._input_list[0]} {item} -i {remaining} {self._listener.options}"
+        msg = [s.strip() for s in self._input_list]
+        msg[msg.index("-i") + 1] = f"{remaining}"
+        return " ".join(msg)
+
+    def _item_message(self, text, reply_to):
+        message = copy(self._listener.message)
+        message.text = text
+        message.reply_to_message = reply_to
+        message.reply_to_message_id = reply_to.id if reply_to else None
+        if self._listener.message.from_user:
+            message.from_user = self._listener.user
+        else:
+            message.sender_chat = self._listener.user
+        return message
+
+    async def _get_sources(self):
+        if self._links is not None:
+            return [None] * self.total
+        message = self._listener.message
+        if not message.reply_to_message_id:
+            return [None] * self.total
+        start = message.reply_to_message_id + 1
+        ids = list(range(start, start + self.total))
+        sources = []
+        for i in range(0, len(ids), 200):
+            sources.extend(
+                await self._listener.client.get_messages(
+                    chat_id=message.chat.id,
+                    message_ids=ids[i : i + 200],
+                ),
+            )
+        return [None if msg is None or msg.empty else msg for msg in sources]
+
+    def _build_listener(self, index, item, source):
+        parent = self._listener
+        listener = self._obj(
+            parent.client,
+            self._item_message(self._item_text(index, item), source),
+            parent.is_qbit,
+            parent.is_leech,
+            parent.is_jd,
+            parent.is_nzb,
+            parent.same_dir,
+            None,
+            self.tag,
+            parent.options,
+        )
+        listener.batch = self
+        listener.mid = -(parent.mid * 100000 + index + 1)
+        listener.dir = f"{DOWNLOAD_DIR}{listener.mid}"
+        if source is not None:
+            item_listeners[source.id] = listener
+        return listener
+
+    async def _active_count(self):
+        async with task_dict_lock:
+            return sum(
+                task.listener.multi_tag == self.tag for task in task_dict.values()
+            )
+
+    async def _update_status(self, final=False):
+        if not final and time() - self._last_update < STATUS_UPDATE_INTERVAL:
+            return
+        self._last_update = time()
+        msg = f"{self._listener.tag} <b>Batch:</b> <code>{self.tag}</code>"
+        msg += f"\n<b>Admitted:</b> {self.admitted}/{self.total}"
+        msg += f" | <b>Active:</b> {await self._active_count()}"
+        if final:
+            if self.admitted < self.total:
+                msg += "\n<b>Stopped before all items were admitted!</b>"
+        else:
+            msg += f"\nCancel Batch: <code>/stop_{self.tag}</code>"
+        if self._status_msg is None:
+            self._status_msg = await send_message(self._listener.message, msg)
+        elif not isinstance(self._status_msg, str):
+            await edit_message(self._status_msg, msg)
+
+    async def run(self):
+        if self.total <= 0:
+            return
+        sources = await self._get_sources()
+        items = self._links if self._links is not None else sources
+        delay = 1 / rate if (rate := Config.BATCH_ADMISSION_RATE) > 0 else 0
+        await self._update_status(final=False)
+        for index, (item, source) in enumerate(zip(items, sources, strict=True)):
+            if intervals["stopAll"] or self.tag not in multi_tags:
+                break
+            try:
+                listener = self._build_listener(index, item, source)
+            except Exception as e:
+                LOGGER.error(f"Batch {self.tag}: failed to admit item {index}: {e}")
+                continue
+            bot_loop.create_task(listener.new_event())
+            self.admitted += 1
+            await self._update_status()
+            if delay:
+                await sleep(delay)
+        if self.tag not in multi_tags:
+            if remaining := self.total - self.admitted:
+                async with task_dict_lock:
+                    for fd_name in self._listener.same_dir:
+                        self._listener.same_dir[fd_name]["total"] -= remaining
+            await send_message(
+                self._listener.message,
+                f"{self._listener.tag} Batch <code>{self.tag}</code> has been cancelled!",
+            )
+            await send_status_message(self._listener.message)
+        else:
+            multi_tags.discard(self.tag)
+        await self._update_status(final=True)
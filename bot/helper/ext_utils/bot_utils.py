@@ -1,11 +1,5 @@
 import contextlib
-from asyncio import (
-    create_subprocess_exec,
-    create_subprocess_shell,
-    run_coroutine_threadsafe,
-    sleep,
-)
-from asyncio.subprocess import PIPE
+from asyncio import run_coroutine_threadsafe, sleep
 from concurrent.futures import ThreadPoolExecutor
 from functools import partial, wraps
 
@@ -20,7 +14,9 @@ from .help_messages import (
     MIRROR_HELP_DICT,
     YT_HELP_DICT,
 )
-from .telegraph_helper import telegraph
+from .metrics import timed_call
+from .process_utils import run
+from .telegraph_helper import plan_pages, telegraph
 
 COMMAND_USAGE = {}
 
@@ -107,26 +103,19 @@ def bt_selection_buttons(id_):
 
 async def get_telegraph_list(telegraph_content):
     """
-    Creates Telegraph pages from the provided content list.
-    If multiple content parts are provided, it attempts to edit them into a single series.
+    Plans the provided entries into Telegraph pages and publishes them as one
+    linked series.
 
     Args:
-        telegraph_content: A list of strings, where each string is the HTML content for a page.
+        telegraph_content: A list of HTML strings, one per result entry.
 
     Returns:
         A ButtonMaker menu object with a button linking to the first Telegraph page.
     """
-    path = [
-        (
-            await telegraph.create_page(
-                title="Aeon-MLTB Drive Search",
-                content=content,
-            )
-        )["path"]
-        for content in telegraph_content
-    ]
-    if len(path) > 1:
-        await telegraph.edit_telegraph(path, telegraph_content)
+    path = await telegraph.publish(
+        "Aeon-MLTB Drive Search",
+        plan_pages(telegraph_content),
+    )
     buttons = ButtonMaker()
     buttons.url_button("🔎 VIEW", f"https://telegra.ph/{path[0]}")
     return buttons.build_menu(1)
@@ -281,31 +270,19 @@ def update_user_ldata(id_, key, value):
     user_data[id_][key] = value
 
 
-async def cmd_exec(cmd, shell=False):
+async def cmd_exec(cmd, shell=False, **kwargs):
     """
-    Executes a shell command asynchronously.
+    Executes a shell command asynchronously through the bounded process layer.
 
     Args:
         cmd: The command to execute (list of arguments or string if shell=True).
         shell: Whether to use the shell for execution (default: False).
+        **kwargs: consumer, priority, limit and task, see process_utils.run.
 
     Returns:
         A tuple (stdout_str, stderr_str, return_code).
     """
-    if shell:
-        proc = await create_subprocess_shell(cmd, stdout=PIPE, stderr=PIPE)
-    else:
-        proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-    stdout, stderr = await proc.communicate()
-    try:
-        stdout = stdout.decode().strip()
-    except Exception:
-        stdout = "Unable to decode the response!"
-    try:
-        stderr = stderr.decode().strip()
-    except Exception:
-        stderr = "Unable to decode the error!"
-    return stdout, stderr, proc.returncode
+    return await run(cmd, shell, **kwargs)
 
 
 def new_task(func):
@@ -331,7 +308,8 @@ async def sync_to_async(func, *args, wait=True, **kwargs):
     Returns:
         The result of the function if wait is True, otherwise the Future object.
     """
-    pfunc = partial(func, *args, **kwargs)
+    name = getattr(func, "__qualname__", type(func).__name__)
+    pfunc = timed_call(partial(func, *args, **kwargs), name)
     future = bot_loop.run_in_executor(THREAD_POOL, pfunc)
     return await future if wait else future
 
@@ -0,0 +1,233 @@
+from asyncio import Lock, gather, sleep
+from time import monotonic
+
+from pyrogram.errors import FloodWait, InputUserDeactivated, UserIsBlocked
+
+from bot import LOGGER
+from bot.core.aeon_client import TgClient
+from bot.core.config_manager import Config
+from bot.helper.ext_utils.db_handler import database
+from bot.helper.ext_utils.metrics import count_flood_wait
+from bot.helper.ext_utils.status_utils import get_readable_time
+from bot.helper.telegram_helper.message_utils import edit_message, send_message
+
+# Telegram allows bots roughly 30 messages per second across all chats. Stay
+# a little below it so that replies to other users are not starved.
+BROADCAST_RATE = 25
+BROADCAST_WORKERS = 25
+MAX_ATTEMPTS = 3
+CHECKPOINT_INTERVAL = 10
+CLEANUP_BATCH = 100
+
+
+class TokenBucket:
+    """
+    Hands out at most `rate` tokens per second with bursts of up to `capacity`.
+    A FloodWait pauses the whole bucket, since Telegram's limit is global.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = monotonic()
+        self._resume_at = 0
+        self._lock = Lock()
+
+    def pause(self, seconds):
+        resume_at = monotonic() + seconds
+        if resume_at > self._resume_at:
+            self._resume_at = resume_at
+            self._updated = resume_at
+            self._tokens = 0
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = monotonic()
+                if (delay := self._resume_at - now) > 0:
+                    await sleep(delay)
+                    continue
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate,
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await sleep((1 - self._tokens) / self.rate)
+
+
+class Broadcast:
+    """
+    Copies one message to every PM user.
+
+    Users are visited in ascending id order by concurrent workers sharing a
+    token bucket. The id below which every user has been handled is
+    checkpointed to the database together with the counters of those users
+    only, so a broadcast interrupted by a restart resumes from there without
+    counting anyone twice. Users handled after the checkpoint may receive the
+    message twice. Blocked and deactivated users below the checkpoint are
+    removed in batches.
+    """
+
+    running = None
+
+    def __init__(self, state, status_msg=None):
+        self.state = state
+        self._status_msg = status_msg
+        self._uids = []
+        # The outcome counter of every user, None until handled.
+        self._done = []
+        self._next = 0
+        self._low_water = 0
+        self._removed = []
+        self._bucket = TokenBucket(BROADCAST_RATE)
+        self._started = monotonic()
+        self._base_processed = state["processed"]
+        self._base_elapsed = state["elapsed"]
+
+    @classmethod
+    async def start(cls, message):
+        if cls.running is not None:
+            await send_message(message, "A broadcast is already running!")
+            return
+        if not Config.DATABASE_URL:
+            await send_message(message, "Broadcast needs DATABASE_URL to be set!")
+            return
+        status_msg = await send_message(message, "Broadcast in progress...")
+        state = {
+            "chat_id": message.chat.id,
+            "message_id": message.reply_to_message.id,
+            "status_chat_id": message.chat.id,
+            "status_message_id": getattr(status_msg, "id", None),
+            "cursor": None,
+            "total": 0,
+            "processed": 0,
+            "successful": 0,
+            "blocked": 0,
+            "unsuccessful": 0,
+            "elapsed": 0,
+        }
+        await cls(state, status_msg).run()
+
+    @classmethod
+    async def resume(cls):
+        """Continues a broadcast that was interrupted by a restart."""
+        if cls.running is not None or not (state := await database.get_broadcast()):
+            return
+        LOGGER.info("Resuming interrupted broadcast")
+        status_msg = None
+        if state.get("status_message_id"):
+            try:
+                status_msg = await TgClient.bot.get_messages(
+                    chat_id=state["status_chat_id"],
+                    message_ids=state["status_message_id"],
+                )
+            except Exception as e:
+                LOGGER.error(f"Broadcast status message not found: {e}")
+        if status_msg is None or status_msg.empty:
+            status_msg = await send_message(
+                state["status_chat_id"],
+                "Resuming broadcast...",
+            )
+        await cls(state, status_msg).run()
+
+    def _checkpoint(self):
+        self.state["processed"] = self._base_processed + self._low_water
+        self.state["elapsed"] = self._base_elapsed + monotonic() - self._started
+        if self._low_water:
+            self.state["cursor"] = self._uids[self._low_water - 1]
+
+    async def _deliver(self, uid):
+        """Returns the state counter of the outcome."""
+        for _ in range(MAX_ATTEMPTS):
+            await self._bucket.acquire()
+            try:
+                await TgClient.bot.copy_message(
+                    chat_id=uid,
+                    from_chat_id=self.state["chat_id"],
+                    message_id=self.state["message_id"],
+                )
+                return "successful"
+            except FloodWait as e:
+                count_flood_wait("broadcast", e.value)
+                self._bucket.pause(e.value * 1.2)
+            except (UserIsBlocked, InputUserDeactivated):
+                return "blocked"
+            except Exception:
+                break
+        return "unsuccessful"
+
+    async def _worker(self):
+        while (index := self._next) < len(self._uids):
+            self._next += 1
+            self._done[index] = await self._deliver(self._uids[index])
+            while (
+                self._low_water < len(self._done)
+                and (outcome := self._done[self._low_water]) is not None
+            ):
+                # Counted only below the cursor, like a resume sees them.
+                self.state[outcome] += 1
+                if outcome == "blocked":
+                    self._removed.append(self._uids[self._low_water])
+                self._low_water += 1
+
+    async def _flush(self, final=False):
+        removed, self._removed = self._removed, []
+        await database.rm_pm_users(removed)
+        self._checkpoint()
+        if final:
+            await database.rm_broadcast()
+        else:
+            await database.save_broadcast(self.state)
+        if self._status_msg is not None and not isinstance(self._status_msg, str):
+            await edit_message(self._status_msg, self.status(final))
+
+    async def _reporter(self):
+        last_flush = monotonic()
+        while self._next < len(self._uids) or self._low_water < len(self._uids):
+            await sleep(1)
+            if (
+                len(self._removed) >= CLEANUP_BATCH
+                or monotonic() - last_flush >= CHECKPOINT_INTERVAL
+            ):
+                await self._flush()
+                last_flush = monotonic()
+
+    async def run(self):
+        Broadcast.running = self
+        try:
+            self._uids = await database.get_pm_uids(self.state["cursor"]) or []
+            self._done = [None] * len(self._uids)
+            self.state["total"] = self._base_processed + len(self._uids)
+            await database.save_broadcast(self.state)
+            await gather(
+                self._reporter(),
+                *(self._worker() for _ in range(BROADCAST_WORKERS)),
+            )
+            await self._flush(final=True)
+        finally:
+            Broadcast.running = None
+
+    def status(self, final=False):
+        processed = self.state["processed"]
+        total = self.state["total"]
+        elapsed = self.state["elapsed"]
+        session = monotonic() - self._started
+        speed = self._low_water / session if session else 0
+        msg = "<b>Broadcast Stats :</b>\n\n"
+        msg += f"<b>• Total users:</b> {total}\n"
+        msg += f"<b>• Processed:</b> {processed}\n"
+        msg += f"<b>• Success:</b> {self.state['successful']}\n"
+        msg += f"<b>• Blocked or deleted:</b> {self.state['blocked']}\n"
+        msg += f"<b>• Unsuccessful attempts:</b> {self.state['unsuccessful']}"
+        if final:
+            msg += f"\n\n<b>Elapsed Time:</b> {get_readable_time(elapsed, True)}"
+        else:
+            msg += f"\n\n<b>Speed:</b> {speed:.1f} msg/s"
+            if speed:
+                eta = (total - processed) / speed
+                msg += f"\n<b>ETA:</b> {get_readable_time(eta, True)}"
+        return msg
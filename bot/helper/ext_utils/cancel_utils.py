@@ -0,0 +1,81 @@
+from asyncio import Semaphore, gather
+from collections import Counter, defaultdict
+from time import time
+
+from bot import LOGGER
+from bot.helper.mirror_leech_utils.status_utils.aria2_status import Aria2Status
+from bot.helper.mirror_leech_utils.status_utils.jdownloader_status import (
+    JDownloaderStatus,
+)
+from bot.helper.mirror_leech_utils.status_utils.nzb_status import SabnzbdStatus
+from bot.helper.mirror_leech_utils.status_utils.qbit_status import QbittorrentStatus
+
+CANCEL_CONCURRENCY = 10
+BATCHED_ENGINES = (QbittorrentStatus, Aria2Status, SabnzbdStatus, JDownloaderStatus)
+
+
+async def _limited(slots, coro):
+    async with slots:
+        return await coro
+
+
+async def cancel_tasks(tasks, limit=CANCEL_CONCURRENCY):
+    """
+    Cancels many tasks at once.
+
+    Tasks of qBittorrent, Aria2c, SABnzbd and JDownloader are grouped by engine
+    and removed from it with one batched call per engine. The listener cleanup
+    of every task, and the cancellation of tasks of other engines, then runs
+    concurrently with at most `limit` of them in flight.
+
+    Args:
+        tasks: Status objects as stored in task_dict.
+        limit: The maximum number of concurrent cleanups.
+
+    Returns:
+        A tuple (Counter of cancelled tasks per tool, number of failures, elapsed seconds).
+    """
+    start = time()
+    slots = Semaphore(limit)
+    groups = defaultdict(list)
+    others = []
+    for task in tasks:
+        obj = task.task()
+        if isinstance(obj, BATCHED_ENGINES):
+            obj.listener.is_cancelled = True
+            groups[type(obj)].append(obj)
+        else:
+            others.append(task)
+
+    await gather(
+        *(
+            _limited(slots, obj.update())
+            for engine, objs in groups.items()
+            if engine is not JDownloaderStatus
+            for obj in objs
+        ),
+        return_exceptions=True,
+    )
+    results = await gather(
+        *(engine.remove_many(objs) for engine, objs in groups.items()),
+        return_exceptions=True,
+    )
+    for engine, result in zip(groups, results, strict=True):
+        if isinstance(result, Exception):
+            LOGGER.error(f"Bulk removal failed for {engine.__name__}: {result}")
+
+    objs = [obj for group in groups.values() for obj in group]
+    results = await gather(
+        *(_limited(slots, obj.on_cancel()) for obj in objs),
+        *(_limited(slots, task.task().cancel_task()) for task in others),
+        return_exceptions=True,
+    )
+    cancelled = Counter()
+    failed = 0
+    for task, result in zip(objs + others, results, strict=True):
+        if isinstance(result, Exception):
+            LOGGER.error(f"Failed to cancel {task.gid()}: {result}")
+            failed += 1
+        else:
+            cancelled[task.tool] += 1
+    return cancelled, failed, time() - start
@@ -1,8 +1,9 @@
+from datetime import UTC, datetime, timedelta
 from importlib import import_module
 
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
-from pymongo import AsyncMongoClient
+from pymongo import AsyncMongoClient, ReturnDocument, UpdateOne
 from pymongo.errors import PyMongoError
 from pymongo.server_api import ServerApi
 
@@ -31,6 +32,7 @@ class DbManager:
             )
             self.db = self._conn.luna
             self._return = False
+            await self.db.imdb.create_index("expires", expireAfterSeconds=0)
             LOGGER.info("Successfully connected to the database.")
         except PyMongoError as e:
             LOGGER.error(f"Error in DB connection: {e}")
@@ -223,10 +225,17 @@ class DbManager:
             {"_id": link, "cid": cid, "tag": tag},
         )
 
-    async def get_pm_uids(self):
+    async def get_pm_uids(self, after=None):
+        """Returns the PM user ids in ascending order, optionally only those
+        greater than `after`.
+        """
         if self._return:
             return None
-        return [doc["_id"] async for doc in self.db.pm_users[TgClient.ID].find({})]
+        query = {} if after is None else {"_id": {"$gt": after}}
+        return [
+            doc["_id"]
+            async for doc in self.db.pm_users[TgClient.ID].find(query).sort("_id", 1)
+        ]
 
     async def update_pm_users(self, user_id):
         """Adds a user_id to the pm_users collection if not already present,
@@ -243,6 +252,223 @@ class DbManager:
             return
         await self.db.pm_users[TgClient.ID].delete_one({"_id": user_id})
 
+    async def rm_pm_users(self, user_ids):
+        if self._return or not user_ids:
+            return
+        await self.db.pm_users[TgClient.ID].delete_many({"_id": {"$in": user_ids}})
+
+    async def save_broadcast(self, state):
+        if self._return:
+            return
+        await self.db.broadcast[TgClient.ID].replace_one(
+            {"_id": "active"},
+            state,
+            upsert=True,
+        )
+
+    async def get_broadcast(self):
+        if self._return:
+            return None
+        return await self.db.broadcast[TgClient.ID].find_one({"_id": "active"})
+
+    async def rm_broadcast(self):
+        if self._return:
+            return
+        await self.db.broadcast[TgClient.ID].delete_one({"_id": "active"})
+
+    async def get_imdb(self, key):
+        if self._return:
+            return None
+        return await self.db.imdb.find_one(
+            {"_id": key, "expires": {"$gt": datetime.now(UTC)}},
+        )
+
+    async def save_imdb(self, key, data, ttl):
+        if self._return:
+            return
+        await self.db.imdb.replace_one(
+            {"_id": key},
+            {"data": data, "expires": datetime.now(UTC) + timedelta(seconds=ttl)},
+            upsert=True,
+        )
+
+    async def get_user(self, user_id):
+        if self._return:
+            return None
+        return await self.db.users.find_one({"_id": user_id})
+
+    async def setup_cluster(self):
+        if self._return:
+            return
+        await self.db.cluster[TgClient.ID].create_index(
+            [("state", 1), ("created", 1)]
+        )
+
+    async def cluster_submit(self, doc):
+        """Queues a cluster task, returns False if it was queued before."""
+        if self._return:
+            return False
+        result = await self.db.cluster[TgClient.ID].update_one(
+            {"_id": doc["_id"]},
+            {"$setOnInsert": doc},
+            upsert=True,
+        )
+        return result.upserted_id is not None
+
+    async def cluster_claim(self, worker, lease):
+        """Leases the oldest queued cluster task to a worker."""
+        if self._return:
+            return None
+        return await self.db.cluster[TgClient.ID].find_one_and_update(
+            {"state": "queued"},
+            {
+                "$set": {
+                    "state": "claimed",
+                    "worker": worker,
+                    "lease": datetime.now(UTC) + timedelta(seconds=lease),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def cluster_renew(self, worker, progress, lease):
+        """
+        Extends the leases of a worker and stores the progress of its tasks,
+        a progress of None only extends the lease.
+
+        Returns:
+            dict: The ids of the tasks the worker still holds, mapped to
+                whether they were cancelled.
+        """
+        if self._return:
+            return {}
+        expires = datetime.now(UTC) + timedelta(seconds=lease)
+        if progress:
+            await self.db.cluster[TgClient.ID].bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": task_id, "worker": worker, "state": "claimed"},
+                        {
+                            "$set": {"lease": expires}
+                            if snapshot is None
+                            else {"lease": expires, "progress": snapshot},
+                        },
+                    )
+                    for task_id, snapshot in progress.items()
+                ],
+                ordered=False,
+            )
+        return {
+            doc["_id"]: doc.get("cancel", False)
+            async for doc in self.db.cluster[TgClient.ID].find(
+                {"worker": worker, "state": "claimed"},
+                {"cancel": 1},
+            )
+        }
+
+    async def cluster_finish(self, task_id, worker):
+        if self._return:
+            return
+        await self.db.cluster[TgClient.ID].delete_one(
+            {"_id": task_id, "worker": worker},
+        )
+
+    async def cluster_requeue(self, task_id, worker):
+        if self._return:
+            return
+        await self.db.cluster[TgClient.ID].update_one(
+            {"_id": task_id, "worker": worker, "state": "claimed"},
+            {"$set": {"state": "queued", "worker": None, "progress": None}},
+        )
+
+    async def cluster_release(self, worker):
+        """Re-queues the tasks a worker held before it restarted."""
+        if self._return:
+            return []
+        docs = (
+            await self.db.cluster[TgClient.ID]
+            .find(
+                {"worker": worker, "state": "claimed"},
+            )
+            .to_list()
+        )
+        for doc in docs:
+            await self.cluster_requeue(doc["_id"], worker)
+        return docs
+
+    async def cluster_expired(self):
+        if self._return:
+            return []
+        return (
+            await self.db.cluster[TgClient.ID]
+            .find(
+                {"state": "claimed", "lease": {"$lt": datetime.now(UTC)}},
+            )
+            .to_list()
+        )
+
+    async def cluster_tasks(self):
+        if self._return:
+            return []
+        return await self.db.cluster[TgClient.ID].find({}).to_list()
+
+    async def cluster_cancel(self, task_id):
+        """
+        Removes a queued cluster task, or asks its worker to cancel it.
+
+        Returns:
+            bool: True if the task was still queued and has been removed.
+        """
+        if self._return:
+            return False
+        result = await self.db.cluster[TgClient.ID].delete_one(
+            {"_id": task_id, "state": "queued"},
+        )
+        if result.deleted_count:
+            return True
+        await self.db.cluster[TgClient.ID].update_one(
+            {"_id": task_id},
+            {"$set": {"cancel": True}},
+        )
+        return False
+
+    async def cluster_remove(self, task_id):
+        if self._return:
+            return
+        await self.db.cluster[TgClient.ID].delete_one({"_id": task_id})
+
+    async def get_yt_session(self, key):
+        if self._return:
+            return None
+        return await self.db.yt_sessions.find_one(
+            {"_id": key, "expires": {"$gt": datetime.now(UTC)}},
+        )
+
+    async def save_yt_session(self, key, uri, offset, ttl):
+        """Stores the session URI and confirmed offset of a YouTube upload.
+        The expiry is set when the session is created, Google drops resumable
+        sessions after about a week.
+        """
+        if self._return:
+            return
+        await self.db.yt_sessions.update_one(
+            {"_id": key},
+            {
+                "$set": {"uri": uri, "offset": offset},
+                "$setOnInsert": {
+                    "expires": datetime.now(UTC) + timedelta(seconds=ttl),
+                },
+            },
+            upsert=True,
+        )
+
+    async def rm_yt_session(self, key):
+        if self._return:
+            return
+        await self.db.yt_sessions.delete_one({"_id": key})
+
     async def update_user_tdata(self, user_id, token, time):
         if self._return:
             return
@@ -0,0 +1,88 @@
+import contextlib
+
+from psutil import disk_usage
+
+from bot import DOWNLOAD_DIR, LOGGER, task_dict
+
+
+class DiskReserve:
+    """
+    Tracks how much disk space admitted downloads will still need.
+
+    A task reserves its download size plus one extra copy for every enabled
+    post-processing stage that writes new files next to the originals
+    (extraction, FFmpeg based stages, compression and splitting). The
+    reservation shrinks as the download and each stage finish, and is released
+    when the task ends. Bytes a running download already wrote no longer
+    count as free space, so they are taken off its reservation.
+    """
+
+    def __init__(self, path=DOWNLOAD_DIR):
+        self._path = path
+        self._tasks = {}
+
+    @staticmethod
+    def _stages(listener):
+        stages = {"download"}
+        if listener.extract and not listener.is_nzb:
+            stages.add("extract")
+        if (
+            listener.watermark
+            or listener.metadata
+            or listener.ffmpeg_cmds
+            or listener.convert_audio
+            or listener.convert_video
+            or listener.sample_video
+        ):
+            stages.add("ffmpeg")
+        if listener.compress:
+            stages.add("compress")
+        elif listener.is_leech:
+            stages.add("split")
+        return stages
+
+    def estimate(self, listener, stages=None):
+        stages = self._stages(listener) if stages is None else stages
+        return listener.size * len(stages)
+
+    def _outstanding(self, mid, listener, stages):
+        needed = self.estimate(listener, stages)
+        if "download" in stages and (task := task_dict.get(mid)) is not None:
+            with contextlib.suppress(Exception):
+                needed -= min(max(task.processed_raw(), 0), listener.size)
+        return needed
+
+    def reserved(self, exclude=None):
+        return sum(
+            self._outstanding(mid, listener, stages)
+            for mid, (listener, stages) in self._tasks.items()
+            if mid != exclude
+        )
+
+    def fits(self, listener):
+        """
+        Checks whether a task can be admitted without overcommitting the disk.
+        A task is always admitted when nothing else holds a reservation, so a
+        download larger than the disk fails fast instead of waiting forever.
+        """
+        if all(mid == listener.mid for mid in self._tasks):
+            return True
+        try:
+            free = disk_usage(self._path).free
+        except Exception as e:
+            LOGGER.error(f"Disk usage check failed: {e}")
+            return True
+        return self.estimate(listener) <= free - self.reserved(listener.mid)
+
+    def reserve(self, listener):
+        self._tasks[listener.mid] = (listener, self._stages(listener))
+
+    def stage_done(self, listener, stage):
+        if task := self._tasks.get(listener.mid):
+            task[1].discard(stage)
+
+    def release(self, mid):
+        self._tasks.pop(mid, None)
+
+
+disk_reserve = DiskReserve()
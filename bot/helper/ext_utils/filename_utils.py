@@ -132,7 +132,7 @@ async def _auto_rename_single_file(
         imdb_info = None
         imdb_data = {}
         if probable_title:
-            imdb_info = get_poster(probable_title)
+            imdb_info = await get_poster(probable_title)
         if imdb_info:
             imdb_data = {
                 "title": imdb_info.get("title", ""),
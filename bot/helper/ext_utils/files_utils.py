@@ -1,5 +1,4 @@
 from asyncio import create_subprocess_exec, sleep, wait_for
-from asyncio.subprocess import PIPE
 from os import path as ospath
 from os import readlink, walk
 from re import IGNORECASE, escape
@@ -29,6 +28,7 @@ from bot.core.torrent_manager import TorrentManager
 
 from .bot_utils import cmd_exec, sync_to_async
 from .exceptions import NotSupportedExtractionArchive
+from .process_utils import spawn
 
 ARCH_EXT = [
     ".tar.bz2",
@@ -277,14 +277,16 @@ async def split_file(f_path, split_size, listener):
     out_path = f"{f_path}."
     if listener.is_cancelled:
         return False
-    listener.subproc = await create_subprocess_exec(
+    listener.subproc = await spawn(
         "split",
         "--numeric-suffixes=1",
         "--suffix-length=3",
         f"--bytes={split_size}",
         f_path,
         out_path,
-        stderr=PIPE,
+        stdout=None,
+        limit=False,
+        task=listener.mid,
     )
     _, stderr = await listener.subproc.communicate()
     code = listener.subproc.returncode
@@ -376,10 +378,10 @@ class SevenZ:
             del cmd[2]
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
+        self._listener.subproc = await spawn(
             *cmd,
-            stdout=PIPE,
-            stderr=PIPE,
+            limit=False,
+            task=self._listener.mid,
         )
         await self._sevenz_progress()
         _, stderr = await self._listener.subproc.communicate()
@@ -423,10 +425,10 @@ class SevenZ:
             LOGGER.info(f"Zip: orig_path: {dl_path}, zip_path: {up_path}")
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
+        self._listener.subproc = await spawn(
             *cmd,
-            stdout=PIPE,
-            stderr=PIPE,
+            limit=False,
+            task=self._listener.mid,
         )
         await self._sevenz_progress()
         _, stderr = await self._listener.subproc.communicate()
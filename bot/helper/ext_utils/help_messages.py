@@ -501,6 +501,7 @@ NOTE: Try each command without any argument to see more detalis.
 /{BotCommands.BotSetCommand} [query]: Bot settings.
 /{BotCommands.SelectCommand}: Select files from torrents by gid or reply.
 /{BotCommands.ForceStartCommand[0]} or /{BotCommands.ForceStartCommand[1]} [gid]: Force start task by gid or reply.
+/{BotCommands.PriorityCommand} [gid] [class]: Re-rank a queued task (Only Owner & Sudo).
 /{BotCommands.CancelAllCommand} [query]: Cancel all [status] tasks.
 /{BotCommands.ListCommand} [query]: Search in Google Drive(s).
 /{BotCommands.SearchCommand} [query]: Search for torrents with API.
@@ -0,0 +1,130 @@
+from re import search as re_search
+
+from aiofiles import open as aiopen
+from aiohttp import ClientSession
+from cachetools import LRUCache
+
+from bot.core.aeon_client import TgClient
+
+USER_AGENT = "Mozilla/5.0 (Linux; Android 12; 2201116PI) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/107.0.0.0 Mobile Safari/537.36"
+# Telegram serves files in chunks of 1 MiB, stream_media offsets count chunks.
+TG_CHUNK_SIZE = 1024 * 1024
+# Container headers and the first frames of every stream.
+HEAD_SIZE = 10 * 1024 * 1024
+# MP4 files muxed without faststart keep their moov atom at the end, MKV files
+# keep their cues and often their tags there.
+TAIL_SIZE = 4 * 1024 * 1024
+
+# Results of earlier inspections, keyed by file_unique_id or link.
+probe_cache = LRUCache(maxsize=512)
+
+
+def cache_key(link=None, media=None):
+    return media.file_unique_id if media else link
+
+
+def byte_ranges(size, head=HEAD_SIZE, tail=TAIL_SIZE):
+    """
+    Returns the [start, end) ranges worth fetching for a file of `size`
+    bytes: the head and the tail, or the whole file when they overlap.
+    """
+    if not size:
+        return [(0, head)]
+    if size <= head + tail:
+        return [(0, size)]
+    return [(0, head)] if not tail else [(0, head), (size - tail, size)]
+
+
+async def _fetch_http(link, path, head, tail):
+    """
+    Writes the head and tail of `link` at their offsets into a sparse file.
+    Servers ignoring Range requests only contribute the head, since reading
+    further would mean downloading the file.
+    """
+    async with (
+        ClientSession(headers={"user-agent": USER_AGENT}) as session,
+        aiopen(path, "wb") as f,
+    ):
+        async with session.get(
+            link,
+            headers={"Range": f"bytes=0-{head - 1}"},
+        ) as response:
+            response.raise_for_status()
+            if response.status == 206 and (
+                match := re_search(
+                    r"/(\d+)",
+                    response.headers.get("Content-Range", ""),
+                )
+            ):
+                size = int(match.group(1))
+            else:
+                size = int(response.headers.get("Content-Length", 0))
+            ranged = response.status == 206
+            written = 0
+            async for chunk in response.content.iter_chunked(TG_CHUNK_SIZE):
+                chunk = chunk[: head - written]
+                await f.write(chunk)
+                written += len(chunk)
+                if written >= head:
+                    break
+            complete = written < head or written == size
+        for start, end in byte_ranges(size, head, tail):
+            if complete or (start := max(start, written)) >= end:
+                continue
+            if not ranged:
+                break
+            async with session.get(
+                link,
+                headers={"Range": f"bytes={start}-{end - 1}"},
+            ) as response:
+                if response.status != 206:
+                    break
+                await f.seek(start)
+                async for chunk in response.content.iter_chunked(TG_CHUNK_SIZE):
+                    await f.write(chunk)
+        else:
+            complete = complete or size <= head + tail
+        if size and ranged and tail:
+            await f.truncate(size)
+    return size, complete
+
+
+async def _fetch_telegram(media, path, head, tail):
+    size = media.file_size
+    async with aiopen(path, "wb") as f:
+        for start, end in byte_ranges(size, head, tail):
+            offset = start // TG_CHUNK_SIZE
+            limit = -(-(end - offset * TG_CHUNK_SIZE) // TG_CHUNK_SIZE)
+            await f.seek(offset * TG_CHUNK_SIZE)
+            async for chunk in TgClient.bot.stream_media(
+                media,
+                limit=limit,
+                offset=offset,
+            ):
+                await f.write(chunk)
+        if size and tail:
+            await f.truncate(size)
+    return size, size <= head + tail
+
+
+async def fetch_ranges(path, link=None, media=None, head=HEAD_SIZE, tail=TAIL_SIZE):
+    """
+    Fetches only the parts of a remote file a media parser needs into `path`,
+    through HTTP Range requests for links or stream_media offsets for Telegram
+    media. The head and tail are written at their real offsets into a sparse
+    file of the real size, so parsers seeking to trailing atoms or cues find
+    them where they expect. Without a tail the file holds only the head.
+
+    Args:
+        path: Local file to write.
+        link: A direct download link.
+        media: A Telegram document, video or audio.
+        head: Bytes to fetch from the start.
+        tail: Bytes to fetch from the end, 0 for none.
+
+    Returns:
+        tuple: (size of the remote file, whether the whole file was fetched)
+    """
+    if media:
+        return await _fetch_telegram(media, path, head, tail)
+    return await _fetch_http(link, path, head, tail)
@@ -1,8 +1,6 @@
 import contextlib
-from asyncio import create_subprocess_exec, gather, sleep, wait_for
-from asyncio.subprocess import PIPE
+from asyncio import gather, sleep, wait_for
 from os import path as ospath
-from re import escape
 from re import search as re_search
 from time import time
 
@@ -15,6 +13,7 @@ from bot import DOWNLOAD_DIR, LOGGER, cpu_no
 
 from .bot_utils import cmd_exec, sync_to_async
 from .files_utils import get_mime_type, is_archive, is_archive_split
+from .process_utils import spawn
 from .status_utils import time_to_seconds
 
 
@@ -197,54 +196,177 @@ async def get_document_type(path):
     return is_video, is_audio, is_image
 
 
-async def take_ss(video_file, ss_nb) -> bool:
-    duration = (await get_media_info(video_file))[0]
-    if duration != 0:
-        dirpath, name = video_file.rsplit("/", 1)
-        name, _ = ospath.splitext(name)
-        dirpath = f"{dirpath}/{name}_ss"
-        await makedirs(dirpath, exist_ok=True)
-        interval = duration // (ss_nb + 1)
-        cap_time = interval
-        cmds = []
+# Video path -> {"thumb": path, "tile": path} extracted together with its
+# screenshots, handed to the uploader so it does not decode the file again.
+extracted_frames = {}
+
+
+def _thumb_output():
+    return ospath.join(f"{DOWNLOAD_DIR}thumbnails", f"{time()}.jpg")
+
+
+async def extract_frames(
+    video_file,
+    ss_nb=0,
+    ss_dir=None,
+    thumb=None,
+    layout=None,
+    tile=None,
+    duration=None,
+):
+    """
+    Extracts every requested frame of a video with one ffmpeg run.
+
+    Each timestamp is a separate input seeked to its nearest keyframe, with
+    non key frames skipped by the decoder, so only a handful of frames are
+    ever decoded. The screenshots and the cells of the tile are spread over
+    the video on their own, and a frame is decoded once when their
+    timestamps coincide.
+
+    Args:
+        video_file: The video.
+        ss_nb: Number of evenly spaced screenshots.
+        ss_dir: Directory to write the screenshots to as PNG files.
+        thumb: Output path of a 640px wide JPEG of the middle frame.
+        layout: Tile layout like "3x3", with one evenly spaced frame per cell.
+        tile: Output path of the tile JPEG.
+        duration: The duration if already known.
+
+    Returns:
+        bool: Whether every output was produced.
+    """
+    if duration is None:
+        duration = (await get_media_info(video_file))[0]
+    if not duration:
+        LOGGER.error(f"extract_frames: Can't get the duration of {video_file}")
+        return False
+    # Timestamp -> labels of the outputs using its frame.
+    stamps = {}
+
+    def use(stamp, label):
+        stamps.setdefault(f"{stamp:.3f}", []).append(label)
+
+    if ss_dir:
         for i in range(ss_nb):
-            output = f"{dirpath}/SS.{name}_{i:02}.png"
-            cmd = [
-                "xtra",
-                "-hide_banner",
-                "-loglevel",
-                "error",
+            use(duration * (i + 1) / (ss_nb + 1), f"[s{i}]")
+    cells = 0
+    if tile:
+        columns, rows = map(int, layout.split("x"))
+        cells = columns * rows
+        for i in range(cells):
+            use(duration * (i + 1) / (cells + 1), f"[t{i}]")
+    if thumb:
+        use(duration / 2, "[th]")
+    if not stamps:
+        return True
+
+    cmd = ["xtra", "-hide_banner", "-loglevel", "error"]
+    filters = []
+    for index, (stamp, labels) in enumerate(stamps.items()):
+        cmd.extend(
+            (
+                "-skip_frame",
+                "nokey",
+                "-noaccurate_seek",
                 "-ss",
-                f"{cap_time}",
+                stamp,
                 "-i",
                 video_file,
-                "-q:v",
-                "1",
-                "-frames:v",
-                "1",
-                "-threads",
-                f"{max(1, cpu_no // 2)}",
-                output,
-            ]
-            cap_time += interval
-            cmds.append(cmd_exec(cmd))
-        try:
-            resutls = await wait_for(gather(*cmds), timeout=60)
-            if resutls[0][2] != 0:
-                LOGGER.error(
-                    f"Error while creating sreenshots from video. Path: {video_file}. stderr: {resutls[0][1]}",
-                )
-                await rmtree(dirpath, ignore_errors=True)
-                return False
-        except Exception:
-            LOGGER.error(
-                f"Error while creating sreenshots from video. Path: {video_file}. Error: Timeout some issues with ffmpeg with specific arch!",
-            )
-            await rmtree(dirpath, ignore_errors=True)
-            return False
-        return dirpath
-    LOGGER.error("take_ss: Can't get the duration of video")
-    return False
+            ),
+        )
+        filters.append(
+            f"[{index}:v:0]trim=end_frame=1,setpts=PTS-STARTPTS,"
+            f"split={len(labels)}{''.join(labels)}",
+        )
+    name = ospath.splitext(ospath.basename(video_file))[0]
+    maps = []
+    outputs = []
+    if ss_dir:
+        for i in range(ss_nb):
+            outputs.append(f"{ss_dir}/SS.{name}_{i:02}.png")
+            maps.extend(("-map", f"[s{i}]", "-frames:v", "1", outputs[-1]))
+    if tile:
+        cells_in = "".join(f"[t{i}]" for i in range(cells))
+        filters.append(f"{cells_in}concat=n={cells}:v=1:a=0,tile={layout}[tile]")
+        outputs.append(tile)
+        maps.extend(
+            ("-map", "[tile]", "-frames:v", "1", "-q:v", "1", "-f", "mjpeg", tile),
+        )
+    if thumb:
+        filters.append("[th]scale=640:-1[thumb]")
+        outputs.append(thumb)
+        maps.extend(("-map", "[thumb]", "-frames:v", "1", "-q:v", "5", thumb))
+    cmd.extend(("-filter_complex", ";".join(filters), *maps))
+    try:
+        _, err, code = await wait_for(
+            cmd_exec(cmd, priority="background"),
+            timeout=120,
+        )
+    except Exception:
+        LOGGER.error(
+            f"Error while extracting frames from video. Path: {video_file}. Error: Timeout some issues with ffmpeg with specific arch!",
+        )
+        return False
+    if code != 0 or not all(
+        await gather(*(aiopath.exists(output) for output in outputs)),
+    ):
+        LOGGER.error(
+            f"Error while extracting frames from video. Path: {video_file}. stderr: {err}",
+        )
+        return False
+    return True
+
+
+async def take_ss(video_file, ss_nb, layout=None, thumb=False) -> bool:
+    """
+    Takes screenshots of a video into a `<name>_ss` directory beside it. The
+    default thumbnail and the `layout` tile can be taken in the same run,
+    they are kept in `extracted_frames` for the uploader.
+    """
+    dirpath, name = video_file.rsplit("/", 1)
+    name, _ = ospath.splitext(name)
+    dirpath = f"{dirpath}/{name}_ss"
+    await makedirs(dirpath, exist_ok=True)
+    frames = {}
+    if thumb or layout:
+        await makedirs(f"{DOWNLOAD_DIR}thumbnails", exist_ok=True)
+    if thumb:
+        frames["thumb"] = _thumb_output()
+    if layout:
+        frames["tile"] = f"{_thumb_output()[:-4]}_tile.jpg"
+    if not await extract_frames(
+        video_file,
+        ss_nb,
+        dirpath,
+        thumb=frames.get("thumb"),
+        layout=layout,
+        tile=frames.get("tile"),
+    ):
+        await rmtree(dirpath, ignore_errors=True)
+        for path in frames.values():
+            if await aiopath.exists(path):
+                await remove(path)
+        return False
+    if frames:
+        extracted_frames[video_file] = frames
+    return dirpath
+
+
+def move_extracted_frames(old_path, new_path):
+    if frames := extracted_frames.pop(old_path, None):
+        extracted_frames[new_path] = frames
+
+
+async def pop_extracted_frame(video_file, kind):
+    """
+    Returns the frame of `kind` extracted earlier for a video, if any, and
+    removes the unused ones.
+    """
+    frames = extracted_frames.pop(video_file, {})
+    for other, path in frames.items():
+        if other != kind and await aiopath.exists(path):
+            await remove(path)
+    return frames.get(kind)
 
 
 async def get_audio_thumbnail(audio_file):
@@ -281,94 +403,41 @@ async def get_audio_thumbnail(audio_file):
 
 
 async def get_video_thumbnail(video_file, duration):
-    output_dir = f"{DOWNLOAD_DIR}thumbnails"
-    await makedirs(output_dir, exist_ok=True)
-    output = ospath.join(output_dir, f"{time()}.jpg")
+    if output := await pop_extracted_frame(video_file, "thumb"):
+        return output
+    await makedirs(f"{DOWNLOAD_DIR}thumbnails", exist_ok=True)
+    output = _thumb_output()
 
     if duration is None:
         duration = (await get_media_info(video_file))[0]
     if duration == 0:
         duration = 3
-    duration = duration // 2
-    cmd = [
-        "xtra",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-ss",
-        f"{duration}",
-        "-i",
-        video_file,
-        "-vf",
-        "scale=640:-1",
-        "-q:v",
-        "5",
-        "-vframes",
-        "1",
-        "-threads",
-        "1",
-        output,
-    ]
-    try:
-        _, err, code = await wait_for(cmd_exec(cmd), timeout=60)
-        if code != 0 or not await aiopath.exists(output):
-            LOGGER.error(
-                f"Error while extracting thumbnail from video. Name: {video_file} stderr: {err}",
-            )
-            return None
-    except Exception:
-        LOGGER.error(
-            f"Error while extracting thumbnail from video. Name: {video_file}. Error: Timeout some issues with ffmpeg with specific arch!",
-        )
+    if not await extract_frames(video_file, thumb=output, duration=duration):
         return None
     return output
 
 
 async def get_multiple_frames_thumbnail(video_file, layout, keep_screenshots):
-    ss_nb = layout.split("x")
-    ss_nb = int(ss_nb[0]) * int(ss_nb[1])
-    dirpath = await take_ss(video_file, ss_nb)
-    if not dirpath:
-        return None
-    output_dir = f"{DOWNLOAD_DIR}thumbnails"
-    await makedirs(output_dir, exist_ok=True)
-    output = ospath.join(output_dir, f"{time()}.jpg")
-    cmd = [
-        "xtra",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-pattern_type",
-        "glob",
-        "-i",
-        f"{escape(dirpath)}/*.png",
-        "-vf",
-        f"tile={layout}, thumbnail",
-        "-q:v",
-        "1",
-        "-frames:v",
-        "1",
-        "-f",
-        "mjpeg",
-        "-threads",
-        f"{max(1, cpu_no // 2)}",
-        output,
-    ]
-    try:
-        _, err, code = await wait_for(cmd_exec(cmd), timeout=60)
-        if code != 0 or not await aiopath.exists(output):
-            LOGGER.error(
-                f"Error while combining thumbnails for video. Name: {video_file} stderr: {err}",
-            )
-            return None
-    except Exception:
-        LOGGER.error(
-            f"Error while combining thumbnails from video. Name: {video_file}. Error: Timeout some issues with ffmpeg with specific arch!",
-        )
-        return None
-    finally:
-        if not keep_screenshots:
+    if output := await pop_extracted_frame(video_file, "tile"):
+        return output
+    await makedirs(f"{DOWNLOAD_DIR}thumbnails", exist_ok=True)
+    output = _thumb_output()
+    dirpath = None
+    if keep_screenshots:
+        dirpath, name = video_file.rsplit("/", 1)
+        dirpath = f"{dirpath}/{ospath.splitext(name)[0]}_ss"
+        await makedirs(dirpath, exist_ok=True)
+    columns, rows = map(int, layout.split("x"))
+    if not await extract_frames(
+        video_file,
+        columns * rows if dirpath else 0,
+        dirpath,
+        layout=layout,
+        tile=output,
+    ):
+        if dirpath:
             await rmtree(dirpath, ignore_errors=True)
+        return None
     return output
 
 
@@ -488,10 +557,10 @@ class FFMpeg:
             ffmpeg[index] = output
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
+        self._listener.subproc = await spawn(
             *ffmpeg,
-            stdout=PIPE,
-            stderr=PIPE,
+            limit=False,
+            task=self._listener.mid,
         )
         await self._ffmpeg_progress()
         _, stderr = await self._listener.subproc.communicate()
@@ -520,10 +589,10 @@ class FFMpeg:
         self._total_time = (await get_media_info(f_path))[0]
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
+        self._listener.subproc = await spawn(
             *ffmpeg,
-            stdout=PIPE,
-            stderr=PIPE,
+            limit=False,
+            task=self._listener.mid,
         )
         await self._ffmpeg_progress()
         _, stderr = await self._listener.subproc.communicate()
@@ -595,10 +664,10 @@ class FFMpeg:
             ]
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
+        self._listener.subproc = await spawn(
             *cmd,
-            stdout=PIPE,
-            stderr=PIPE,
+            limit=False,
+            task=self._listener.mid,
         )
         await self._ffmpeg_progress()
         _, stderr = await self._listener.subproc.communicate()
@@ -643,10 +712,10 @@ class FFMpeg:
         ]
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
+        self._listener.subproc = await spawn(
             *cmd,
-            stdout=PIPE,
-            stderr=PIPE,
+            limit=False,
+            task=self._listener.mid,
         )
         await self._ffmpeg_progress()
         _, stderr = await self._listener.subproc.communicate()
@@ -725,10 +794,10 @@ class FFMpeg:
 
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
+        self._listener.subproc = await spawn(
             *cmd,
-            stdout=PIPE,
-            stderr=PIPE,
+            limit=False,
+            task=self._listener.mid,
         )
         await self._ffmpeg_progress()
         _, stderr = await self._listener.subproc.communicate()
@@ -793,10 +862,10 @@ class FFMpeg:
                 del cmd[12]
             if self._listener.is_cancelled:
                 return False
-            self._listener.subproc = await create_subprocess_exec(
+            self._listener.subproc = await spawn(
                 *cmd,
-                stdout=PIPE,
-                stderr=PIPE,
+                limit=False,
+                task=self._listener.mid,
             )
             await self._ffmpeg_progress()
             _, stderr = await self._listener.subproc.communicate()
@@ -0,0 +1,440 @@
+import sys
+from asyncio import all_tasks, sleep, to_thread
+from collections import Counter as StackCounter
+from contextlib import contextmanager
+from functools import wraps
+from inspect import iscoroutinefunction
+from os import path as ospath
+from threading import Lock, get_ident
+from time import perf_counter
+from time import sleep as thread_sleep
+
+from aiofiles import open as aiopen
+from aiofiles.os import rename
+
+from bot import LOGGER, bot_loop, cpu_eater_lock, sabnzbd_client, task_dict
+
+# The web server runs in its own gunicorn process, so the bot publishes its
+# metrics to a file in the working directory that `/metrics` serves as is.
+METRICS_FILE = "metrics.prom"
+EXPORT_INTERVAL = 15
+LAG_INTERVAL = 0.5
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LONG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600)
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, key, extra=""):
+    pairs = [
+        f'{name}="{_escape(value)}"'
+        for name, value in zip(labelnames, key, strict=True)
+    ]
+    if extra:
+        pairs.append(extra)
+    return f"{{{','.join(pairs)}}}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._values = {}
+        self._lock = Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            if (entry := self._values.get(key)) is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = {
+                key: (list(buckets), total, count)
+                for key, (buckets, total, count) in self._values.items()
+            }
+        for key, (buckets, total, count) in values.items():
+            for bound, hits in zip(self.buckets, buckets, strict=True):
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                yield f"{self.name}_bucket{labels} {hits}"
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {count}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, *args, **kwargs):
+        return self._register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self._register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self._register(Histogram(*args, **kwargs))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Renders every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+LOOP_LAG = registry.histogram(
+    "mltb_event_loop_lag_seconds",
+    "Delay between a scheduled event loop wakeup and the actual one.",
+)
+LOOP_TASKS = registry.gauge(
+    "mltb_event_loop_tasks",
+    "Pending asyncio tasks on the bot loop.",
+)
+ACTIVE_TASKS = registry.gauge("mltb_active_tasks", "Tasks in the task dict.")
+POOL_QUEUE = registry.gauge(
+    "mltb_thread_pool_queue_depth",
+    "Calls waiting for a free worker of the thread pool.",
+)
+POOL_THREADS = registry.gauge(
+    "mltb_thread_pool_threads",
+    "Worker threads started by the thread pool.",
+)
+EXECUTOR_WAIT = registry.histogram(
+    "mltb_thread_pool_wait_seconds",
+    "Time sync_to_async calls spend queued before a worker picks them up.",
+)
+EXECUTOR_RUN = registry.histogram(
+    "mltb_thread_pool_run_seconds",
+    "Run time of sync_to_async calls.",
+    ("func",),
+    LONG_BUCKETS,
+)
+SUBPROCESS_RUN = registry.histogram(
+    "mltb_subprocess_seconds",
+    "Run time of subprocesses.",
+    ("cmd",),
+    LONG_BUCKETS,
+)
+SUBPROCESS_WAIT = registry.histogram(
+    "mltb_subprocess_wait_seconds",
+    "Time subprocesses spend waiting for a free slot of their binary.",
+    ("cmd",),
+)
+SUBPROCESS_RUNNING = registry.gauge(
+    "mltb_subprocesses_running",
+    "Subprocesses currently running.",
+    ("cmd",),
+)
+SUBPROCESS_CPU = registry.counter(
+    "mltb_subprocess_cpu_seconds_total",
+    "CPU time used by subprocesses and their children, sampled while they run.",
+    ("cmd",),
+)
+LOCK_WAIT = registry.histogram(
+    "mltb_lock_wait_seconds",
+    "Time spent waiting to acquire an instrumented lock.",
+    ("lock",),
+    LONG_BUCKETS,
+)
+LOCK_HOLD = registry.histogram(
+    "mltb_lock_hold_seconds",
+    "Time an instrumented lock is held.",
+    ("lock",),
+    LONG_BUCKETS,
+)
+FLOOD_WAITS = registry.counter(
+    "mltb_flood_waits_total",
+    "FloodWait errors returned by Telegram.",
+    ("method",),
+)
+FLOOD_WAIT_SECONDS = registry.counter(
+    "mltb_flood_wait_seconds_total",
+    "Seconds Telegram asked the bot to wait.",
+    ("method",),
+)
+RPC_LATENCY = registry.histogram(
+    "mltb_rpc_seconds",
+    "Latency of download engine RPC calls.",
+    ("engine", "method"),
+)
+RPC_ERRORS = registry.counter(
+    "mltb_rpc_errors_total",
+    "Download engine RPC calls that raised.",
+    ("engine", "method"),
+)
+TASK_EVENTS = registry.counter(
+    "mltb_task_events_total",
+    "Task listener events.",
+    ("event",),
+)
+UPLOAD_TIME = registry.histogram(
+    "mltb_upload_seconds",
+    "Duration of a task upload.",
+    ("service",),
+    LONG_BUCKETS,
+)
+UPLOAD_BYTES = registry.counter(
+    "mltb_upload_bytes_total",
+    "Bytes handed to the uploaders.",
+    ("service",),
+)
+
+
+def count_flood_wait(method, seconds):
+    FLOOD_WAITS.inc(method=method)
+    FLOOD_WAIT_SECONDS.inc(seconds, method=method)
+
+
+def timed_call(func, name):
+    """
+    Wraps a synchronous callable submitted to the thread pool so that its queue
+    wait and run time are recorded from the worker thread.
+    """
+    submitted = perf_counter()
+
+    def run():
+        started = perf_counter()
+        EXECUTOR_WAIT.observe(started - submitted)
+        try:
+            return func()
+        finally:
+            EXECUTOR_RUN.observe(perf_counter() - started, func=name)
+
+    return run
+
+
+def instrument_rpc(obj, engine, prefix="", skip=()):
+    """
+    Wraps all awaitable methods of an object so every call records its latency
+    and failures under the given engine.
+
+    Args:
+        obj: The client or API group whose methods to wrap.
+        engine: The engine label, e.g. "aria2".
+        prefix: Prepended to the method label, e.g. "torrents".
+        skip: Method names left untouched.
+
+    Returns:
+        The object with its awaitable methods wrapped.
+    """
+    for attr_name in dir(obj):
+        if attr_name.startswith("_") or attr_name in skip:
+            continue
+        attr = getattr(obj, attr_name)
+        if not iscoroutinefunction(attr):
+            continue
+        method = f"{prefix}.{attr_name}" if prefix else attr_name
+
+        def wrap(func, method):
+            @wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    RPC_ERRORS.inc(engine=engine, method=method)
+                    raise
+                finally:
+                    RPC_LATENCY.observe(
+                        perf_counter() - start,
+                        engine=engine,
+                        method=method,
+                    )
+
+            return wrapper
+
+        setattr(obj, attr_name, wrap(attr, method))
+    return obj
+
+
+def instrument_lock(lock, name):
+    """
+    Records wait and hold times of an asyncio lock. Works for both explicit
+    acquire/release calls and `async with`, which goes through them.
+    """
+    acquire, release = lock.acquire, lock.release
+    held_since = None
+
+    async def timed_acquire():
+        nonlocal held_since
+        start = perf_counter()
+        result = await acquire()
+        held_since = perf_counter()
+        LOCK_WAIT.observe(held_since - start, lock=name)
+        return result
+
+    def timed_release():
+        nonlocal held_since
+        if held_since is not None:
+            LOCK_HOLD.observe(perf_counter() - held_since, lock=name)
+            held_since = None
+        release()
+
+    lock.acquire = timed_acquire
+    lock.release = timed_release
+    return lock
+
+
+async def _export():
+    tmp_file = f"{METRICS_FILE}.tmp"
+    async with aiopen(tmp_file, "w") as f:
+        await f.write(registry.render())
+    await rename(tmp_file, METRICS_FILE)
+
+
+async def _monitor(executor):
+    last_export = 0
+    while True:
+        start = perf_counter()
+        await sleep(LAG_INTERVAL)
+        now = perf_counter()
+        LOOP_LAG.observe(max(now - start - LAG_INTERVAL, 0))
+        if now - last_export < EXPORT_INTERVAL:
+            continue
+        last_export = now
+        LOOP_TASKS.set(len(all_tasks(bot_loop)))
+        ACTIVE_TASKS.set(len(task_dict))
+        POOL_QUEUE.set(executor._work_queue.qsize())
+        POOL_THREADS.set(len(executor._threads))
+        try:
+            await _export()
+        except Exception as e:
+            LOGGER.error(f"Failed to export metrics: {e}")
+
+
+def start_metrics(executor):
+    """
+    Instruments the shared lock and SABnzbd client and starts the event loop
+    monitor, which also publishes the metrics file.
+
+    Args:
+        executor: The thread pool behind sync_to_async.
+    """
+    instrument_lock(cpu_eater_lock, "cpu_eater")
+    instrument_rpc(sabnzbd_client, "sabnzbd", skip=("call", "close"))
+    bot_loop.create_task(_monitor(executor))
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{ospath.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+def _sample(thread_id, seconds, interval):
+    stacks = StackCounter()
+    leaves = StackCounter()
+    idle = 0
+    deadline = perf_counter() + seconds
+    while perf_counter() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            break
+        if frame.f_back is None or frame.f_code.co_filename.endswith("selectors.py"):
+            idle += 1
+        else:
+            leaves[_frame_name(frame)] += 1
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stacks[";".join(reversed(stack))] += 1
+        del frame
+        thread_sleep(interval)
+    return stacks, leaves, idle
+
+
+async def profile_loop(seconds=10, interval=0.005):
+    """
+    Samples the stack of the event loop thread from a helper thread.
+
+    Samples where the loop waits for I/O (uvloop leaves only the loop runner
+    frame on the stack, asyncio sits in the selector) are counted as idle. The
+    report lists the busiest frames followed by the sampled stacks in the
+    folded format understood by flame graph tools.
+
+    Returns:
+        The report as text.
+    """
+    stacks, leaves, idle = await to_thread(_sample, get_ident(), seconds, interval)
+    busy = sum(stacks.values())
+    total = busy + idle
+    report = [
+        f"Event loop profile: {seconds}s, {total} samples every {interval * 1000:g}ms",
+        f"Busy: {busy} samples ({busy / total:.1%})" if total else "No samples",
+        "",
+        "Top frames:",
+    ]
+    report.extend(
+        f"{count:>6} {count / total:6.1%}  {name}"
+        for name, count in leaves.most_common(30)
+    )
+    report.extend(["", "Folded stacks:"])
+    report.extend(f"{stack} {count}" for stack, count in stacks.most_common())
+    return "\n".join(report)
@@ -0,0 +1,98 @@
+import contextlib
+from asyncio import Event, shield, wait_for
+from time import monotonic
+
+from bot import bot_loop
+
+MIN_INTERVAL = 1
+BUSY_INTERVAL = 2
+MAX_INTERVAL = 30
+# Growth of the interval of a job every poll its state stays the same.
+BACKOFF = 1.5
+
+
+class SharedQuery:
+    """
+    A request to an engine shared by everyone reading it. Readers arriving
+    while the request runs await the same one, and its result is reused for
+    max_age seconds.
+    """
+
+    def __init__(self, fetch, max_age=1):
+        self._fetch = fetch
+        self._max_age = max_age
+        self._result = None
+        self._stamp = 0
+        self._task = None
+
+    async def _run(self):
+        result = await self._fetch()
+        self._result, self._stamp = result, monotonic()
+        return result
+
+    async def get(self, max_age=None):
+        max_age = self._max_age if max_age is None else max_age
+        if self._result is not None and self._stamp >= monotonic() - max_age:
+            return self._result
+        if self._task is None or self._task.done():
+            self._task = bot_loop.create_task(self._run())
+        return await shield(self._task)
+
+
+class AdaptivePoller:
+    """
+    Decides when the listener of an engine without a push API polls it.
+
+    Every job has its own interval. A job that changed state is polled again
+    after MIN_INTERVAL, one in a busy state (post-processing) every
+    BUSY_INTERVAL, and otherwise the interval grows by BACKOFF up to
+    MAX_INTERVAL, capped at a quarter of the ETA of the job so its end is
+    seen in time. Queued jobs ignore their ETA. The listener wakes when the
+    first job is due and a poll covers all jobs.
+    """
+
+    def __init__(self, busy_states=(), queued_states=()):
+        self._busy = set(busy_states)
+        self._queued = set(queued_states)
+        self._jobs = {}
+        self._woken = Event()
+
+    def add(self, job_id):
+        """Makes a new job due at once and wakes the listener."""
+        self._jobs[job_id] = (None, MIN_INTERVAL, monotonic())
+        self._woken.set()
+
+    def observe(self, job_id, state, eta=None):
+        last_state, interval, _ = self._jobs.get(job_id, (None, MIN_INTERVAL, 0))
+        if state != last_state:
+            interval = MIN_INTERVAL
+        elif state in self._busy:
+            interval = BUSY_INTERVAL
+        else:
+            interval = min(interval * BACKOFF, MAX_INTERVAL)
+            if eta and eta > 0 and state not in self._queued:
+                interval = min(interval, max(eta / 4, MIN_INTERVAL))
+        self._jobs[job_id] = (state, interval, monotonic() + interval)
+
+    def retain(self, job_ids):
+        for job_id in self._jobs.keys() - set(job_ids):
+            del self._jobs[job_id]
+
+    def wait_time(self):
+        if not self._jobs:
+            return 0
+        return max(min(due for *_, due in self._jobs.values()) - monotonic(), 0)
+
+    async def wait(self):
+        """
+        Sleeps until a job is due or one was added. Due jobs are moved to
+        their next poll, so a job missing from the answer of the engine
+        isn't polled in a tight loop.
+        """
+        self._woken.clear()
+        with contextlib.suppress(TimeoutError):
+            await wait_for(self._woken.wait(), self.wait_time())
+        now = monotonic()
+        for job_id, (state, interval, due) in self._jobs.items():
+            if due <= now:
+                self._jobs[job_id] = (state, interval, now + interval)
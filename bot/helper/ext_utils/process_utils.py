@@ -0,0 +1,256 @@
+import contextlib
+from asyncio import (
+    Semaphore,
+    create_subprocess_exec,
+    create_subprocess_shell,
+    gather,
+    sleep,
+)
+from asyncio.subprocess import PIPE
+from collections import deque
+from os import PRIO_PROCESS, killpg, setpriority
+from os import path as ospath
+from signal import SIGKILL
+from time import monotonic
+
+from psutil import IOPRIO_CLASS_BE, IOPRIO_CLASS_IDLE, Process
+
+from bot import LOGGER, bot_loop, cpu_no
+
+from .metrics import (
+    SUBPROCESS_CPU,
+    SUBPROCESS_RUN,
+    SUBPROCESS_RUNNING,
+    SUBPROCESS_WAIT,
+)
+
+# nice value, ionice class and ionice level of every priority class. Commands
+# a user is waiting on stay at the default, task stages run below them.
+PRIORITIES = {
+    "interactive": (0, IOPRIO_CLASS_BE, 4),
+    "background": (10, IOPRIO_CLASS_BE, 7),
+    "idle": (19, IOPRIO_CLASS_IDLE, 0),
+}
+# How many short lived processes of a binary may run at once. Long running
+# task stages pass limit=False, the task queue already bounds them.
+BINARY_LIMITS = {
+    "xtra": max(2, cpu_no),
+    "ffprobe": cpu_no * 2,
+    "mediainfo": 4,
+    "7z": max(2, cpu_no // 2),
+    "xone": 8,
+    "sox": 2,
+}
+DEFAULT_LIMIT = 16
+STDERR_TAIL = 65536
+SAMPLE_INTERVAL = 2
+
+_slots = {}
+# task id -> {"processes": count, "wall": seconds, "cpu": seconds}
+task_usage = {}
+
+
+def _slot(name):
+    if name not in _slots:
+        _slots[name] = Semaphore(BINARY_LIMITS.get(name, DEFAULT_LIMIT))
+    return _slots[name]
+
+
+def _binary(cmd, shell):
+    return "shell" if shell else ospath.basename(cmd[0])
+
+
+def _set_priority(pid, priority):
+    nice, io_class, io_level = PRIORITIES[priority]
+    try:
+        if nice:
+            setpriority(PRIO_PROCESS, pid, nice)
+        Process(pid).ionice(
+            io_class,
+            io_level if io_class != IOPRIO_CLASS_IDLE else None,
+        )
+    except Exception as e:
+        LOGGER.debug(f"Failed to set priority of {pid}: {e}")
+
+
+def kill_group(proc):
+    """
+    Kills a process together with everything it started. Every process of
+    this module leads its own process group, so shells, 7z helpers and
+    ffmpeg children die with it.
+    """
+    if proc is None or proc.returncode is not None:
+        return
+    try:
+        killpg(proc.pid, SIGKILL)
+    except Exception:
+        with contextlib.suppress(Exception):
+            proc.kill()
+
+
+def _cpu_time(pid):
+    times = Process(pid).cpu_times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+async def _sample(proc, cpu):
+    while proc.returncode is None:
+        with contextlib.suppress(Exception):
+            cpu[0] = _cpu_time(proc.pid)
+        await sleep(SAMPLE_INTERVAL)
+
+
+async def spawn(
+    *cmd,
+    shell=False,
+    priority="background",
+    limit=True,
+    task=None,
+    stdout=PIPE,
+    stderr=PIPE,
+    **kwargs,
+):
+    """
+    Starts a subprocess in its own process group.
+
+    The call first waits for a free slot of the binary unless `limit` is
+    False, then applies the nice and ionice values of `priority`. The slot is
+    released and the run and CPU time are accounted to `task` once the
+    process exits, whoever waits for it.
+
+    Args:
+        cmd: The command, or a single string when `shell` is True.
+        shell: Whether to run the command through the shell.
+        priority: A key of PRIORITIES.
+        limit: Whether to wait for a slot of the binary.
+        task: An id, usually the listener mid, to account the usage to.
+
+    Returns:
+        The asyncio Process.
+    """
+    name = _binary(cmd, shell)
+    slot = _slot(name) if limit else None
+    if slot is not None:
+        with SUBPROCESS_WAIT.time(cmd=name):
+            await slot.acquire()
+    try:
+        if shell:
+            proc = await create_subprocess_shell(
+                cmd[0],
+                stdout=stdout,
+                stderr=stderr,
+                start_new_session=True,
+                **kwargs,
+            )
+        else:
+            proc = await create_subprocess_exec(
+                *cmd,
+                stdout=stdout,
+                stderr=stderr,
+                start_new_session=True,
+                **kwargs,
+            )
+    except BaseException:
+        if slot is not None:
+            slot.release()
+        raise
+    _set_priority(proc.pid, priority)
+    SUBPROCESS_RUNNING.inc(cmd=name)
+    cpu = [0]
+    sampler = bot_loop.create_task(_sample(proc, cpu))
+    started = monotonic()
+
+    async def _reap():
+        try:
+            await proc.wait()
+        finally:
+            sampler.cancel()
+            if slot is not None:
+                slot.release()
+            wall = monotonic() - started
+            SUBPROCESS_RUNNING.inc(-1, cmd=name)
+            SUBPROCESS_RUN.observe(wall, cmd=name)
+            SUBPROCESS_CPU.inc(cpu[0], cmd=name)
+            if task is not None:
+                usage = task_usage.setdefault(
+                    task,
+                    {"processes": 0, "wall": 0, "cpu": 0},
+                )
+                usage["processes"] += 1
+                usage["wall"] += wall
+                usage["cpu"] += cpu[0]
+
+    bot_loop.create_task(_reap())
+    return proc
+
+
+async def run(
+    cmd,
+    shell=False,
+    consumer=None,
+    priority="interactive",
+    limit=True,
+    task=None,
+):
+    """
+    Runs a command to completion.
+
+    Without a `consumer` the whole stdout is returned. With one, every stdout
+    line is passed to `await consumer(line)` as bytes while the process runs
+    and nothing is buffered, so huge listings stay out of memory. Only the
+    last STDERR_TAIL bytes of stderr are kept in either case. Cancelling the
+    caller kills the process group.
+
+    Returns:
+        A tuple (stdout_str, stderr_str, return_code).
+    """
+    proc = await spawn(
+        *([cmd] if shell else cmd),
+        shell=shell,
+        priority=priority,
+        limit=limit,
+        task=task,
+    )
+    out = bytearray()
+    err = deque()
+    err_size = 0
+
+    async def _read_stdout():
+        if consumer is None:
+            out.extend(await proc.stdout.read())
+            return
+        while line := await proc.stdout.readline():
+            await consumer(line)
+
+    async def _read_stderr():
+        nonlocal err_size
+        while chunk := await proc.stderr.read(8192):
+            err.append(chunk)
+            err_size += len(chunk)
+            while err_size - len(err[0]) >= STDERR_TAIL:
+                err_size -= len(err.popleft())
+
+    try:
+        await gather(_read_stdout(), _read_stderr())
+        await proc.wait()
+    except BaseException:
+        kill_group(proc)
+        raise
+    try:
+        stdout = out.decode().strip()
+    except Exception:
+        stdout = "Unable to decode the response!"
+    try:
+        stderr = b"".join(err).decode(errors="replace").strip()
+    except Exception:
+        stderr = "Unable to decode the error!"
+    return stdout, stderr, proc.returncode
+
+
+def release_usage(task):
+    """Forgets the usage of a finished task and logs it."""
+    if usage := task_usage.pop(task, None):
+        LOGGER.info(
+            f"Subprocess usage of task {task}: {usage['processes']} processes, "
+            f"{usage['wall']:.1f}s wall, {usage['cpu']:.1f}s CPU",
+        )
@@ -1,7 +1,9 @@
 import contextlib
 from asyncio import gather, iscoroutinefunction
+from collections import Counter, defaultdict
 from html import escape
 from time import time
+from weakref import WeakValueDictionary
 
 from psutil import cpu_percent, disk_usage, virtual_memory
 
@@ -9,6 +11,12 @@ from bot import DOWNLOAD_DIR, bot_start_time, status_dict, task_dict, task_dict_
 from bot.helper.telegram_helper.button_build import ButtonMaker
 
 SIZE_UNITS = ["B", "KB", "MB", "GB", "TB", "PB"]
+STATS_TTL = 2
+
+# Listeners of batch items by the message the item was made from. Batch items
+# run under mids no message has, so replies to their message are looked up
+# here. Entries go away with the listener.
+item_listeners = WeakValueDictionary()
 
 
 class MirrorStatus:
@@ -51,6 +59,80 @@ STATUSES = {
 }
 
 
+class TaskMetrics:
+    """
+    The numbers of a task: bytes processed, total bytes, bytes per second
+    and seconds left. Status classes return what their engine reports and
+    inherit the rest. The values are only formatted when a status message
+    is rendered.
+    """
+
+    def processed_raw(self):
+        return 0
+
+    def size_raw(self):
+        return 0
+
+    def speed_raw(self):
+        return 0
+
+    def eta_raw(self):
+        """Seconds left, None when it isn't known."""
+        if speed := self.speed_raw():
+            return max(self.size_raw() - self.processed_raw(), 0) / speed
+        return None
+
+    def progress_raw(self):
+        if size := self.size_raw():
+            return self.processed_raw() / size * 100
+        return 0
+
+
+_task_stats = {"time": 0, "stats": None}
+
+
+async def _task_status(task):
+    if iscoroutinefunction(task.status):
+        return await task.status()
+    return task.status()
+
+
+async def get_task_stats():
+    """
+    Counts the tasks per status and sums their speeds per direction, tool
+    and user. Statuses that aren't in STATUSES count as downloads. The
+    result is kept for STATS_TTL seconds, so the status messages of all
+    chats and the overview share one pass. The caller holds task_dict_lock.
+    """
+    if _task_stats["stats"] and time() - _task_stats["time"] < STATS_TTL:
+        return _task_stats["stats"]
+    tasks = list(task_dict.values())
+    statuses = await gather(*(_task_status(task) for task in tasks))
+    stats = {
+        "statuses": Counter(statuses),
+        "download": 0,
+        "upload": 0,
+        "tools": defaultdict(int),
+        "users": defaultdict(lambda: {"download": 0, "upload": 0}),
+    }
+    for task, status in zip(tasks, statuses, strict=True):
+        if status == MirrorStatus.STATUS_UPLOAD:
+            direction = "upload"
+        elif (
+            status == MirrorStatus.STATUS_DOWNLOAD or status not in STATUSES.values()
+        ):
+            direction = "download"
+        else:
+            continue
+        speed = task.speed_raw()
+        stats[direction] += speed
+        stats["users"][task.listener.user_id][direction] += speed
+        if direction == "download":
+            stats["tools"][task.tool] += speed
+    _task_stats.update(time=time(), stats=stats)
+    return stats
+
+
 async def get_task_by_gid(gid: str):
     async with task_dict_lock:
         for task in task_dict.values():
@@ -62,6 +144,14 @@ async def get_task_by_gid(gid: str):
         return None
 
 
+async def get_task_by_message(message_id):
+    """The task a reply to message_id refers to."""
+    async with task_dict_lock:
+        if (listener := item_listeners.get(message_id)) is not None:
+            return task_dict.get(listener.mid)
+        return task_dict.get(message_id)
+
+
 async def get_specific_tasks(status, user_id):
     if status == "All":
         if user_id:
@@ -168,6 +258,10 @@ def speed_string_to_bytes(size_text: str):
     return size
 
 
+def get_readable_eta(seconds):
+    return get_readable_time(seconds) if seconds and seconds > 0 else "-"
+
+
 def get_progress_bar_string(pct):
     if isinstance(pct, str):
         pct = float(pct.strip("%"))
@@ -232,8 +326,8 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
             tstatus not in [MirrorStatus.STATUS_SEED, MirrorStatus.STATUS_QUEUEUP]
             and task.listener.progress
         ):
-            progress = task.progress()
-            msg += f"{get_progress_bar_string(progress)} {progress}\n"
+            progress = task.progress_raw()
+            msg += f"{get_progress_bar_string(progress)} {round(progress, 2)}%\n"
 
             if task.listener.subname:
                 subsize = f"/{get_readable_file_size(task.listener.subsize)}"
@@ -243,12 +337,14 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
                 subsize = ""
                 count = ""
 
-            msg += f"┊📊 <b>Processed:</b> {task.processed_bytes()}{subsize}\n"
+            msg += f"┊📊 <b>Processed:</b> {get_readable_file_size(task.processed_raw())}{subsize}\n"
             if count:
                 msg += f"┊🔢 <b>Count:</b> {count}\n"
-            msg += f"┊💾 <b>Size:</b> {task.size()}\n"
-            msg += f"┊⚡ <b>Speed:</b> {task.speed()}\n"
-            msg += f"┊⏱️ <b>ETA:</b> {task.eta()}\n"
+            msg += f"┊💾 <b>Size:</b> {get_readable_file_size(task.size_raw())}\n"
+            msg += (
+                f"┊⚡ <b>Speed:</b> {get_readable_file_size(task.speed_raw())}/s\n"
+            )
+            msg += f"┊⏱️ <b>ETA:</b> {get_readable_eta(task.eta_raw())}\n"
 
             if (
                 tstatus == MirrorStatus.STATUS_DOWNLOAD and task.listener.is_torrent
@@ -257,13 +353,13 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
                     msg += f"┊🌱 <b>Seeders:</b> {task.seeders_num()} | 🔗 <b>Leechers:</b> {task.leechers_num()}\n"
 
         elif tstatus == MirrorStatus.STATUS_SEED:
-            msg += f"┊💾 <b>Size:</b> {task.size()}\n"
+            msg += f"┊💾 <b>Size:</b> {get_readable_file_size(task.size_raw())}\n"
             msg += f"┊⚡ <b>Speed:</b> {task.seed_speed()}\n"
             msg += f"┊📤 <b>Uploaded:</b> {task.uploaded_bytes()}\n"
             msg += f"┊📈 <b>Ratio:</b> {task.ratio()}\n"
             msg += f"┊⏳ <b>Time:</b> {task.seeding_time()}\n"
         else:
-            msg += f"┊💾 <b>Size:</b> {task.size()}\n"
+            msg += f"┊💾 <b>Size:</b> {get_readable_file_size(task.size_raw())}\n"
 
         msg += f"┊🔧 <b>Tool:</b> {task.tool}\n"
         msg += f"┊👤 <b>By:</b> {source(task.listener)}\n"
@@ -300,6 +396,9 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
     msg += "<blockquote>⧉ <b>𝐁𝐨𝐭 𝐒𝐭𝐚𝐭𝐬</b></blockquote>\n"
     msg += f"<blockquote>╭🖥️ <b>CPU:</b> {cpu_percent()}%\n"
     msg += f"┊🐏 <b>RAM:</b> {virtual_memory().percent}%\n"
+    stats = await get_task_stats()
+    speeds = stats["users"][sid] if is_user else stats
+    msg += f"┊🔻 <b>DL:</b> {get_readable_file_size(speeds['download'])}/s | 🔺 <b>UP:</b> {get_readable_file_size(speeds['upload'])}/s\n"
     msg += f"┊⏰ <b>UPTIME:</b> {get_readable_time(time() - bot_start_time)}\n"
     msg += f"╰💿 <b>FREE:</b> {get_readable_file_size(disk_usage(DOWNLOAD_DIR).free)}</blockquote>\n"
 
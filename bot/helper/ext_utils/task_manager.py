@@ -1,19 +1,30 @@
-from asyncio import Event
+from asyncio import Event, sleep
+from collections import Counter
 
 from bot import (
     LOGGER,
+    intervals,
     non_queued_dl,
     non_queued_up,
     queue_dict_lock,
     queued_dl,
     queued_up,
+    sudo_users,
+    task_dict,
+    user_data,
 )
 from bot.core.config_manager import Config
+from bot.helper.aeon_utils.access_check import is_paid
 from bot.helper.mirror_leech_utils.gdrive_utils.search import GoogleDriveSearch
 
-from .bot_utils import get_telegraph_list, sync_to_async
+from .bot_utils import get_telegraph_list, new_task, sync_to_async
+from .disk_reserve import disk_reserve
 from .files_utils import get_base_name
 from .links_utils import is_gdrive_id
+from .task_scheduler import task_scheduler
+
+# Seconds between checks for free space while queued downloads wait for it.
+DISK_RECHECK_INTERVAL = 30
 
 
 async def stop_duplicate_check(listener):
@@ -54,40 +65,92 @@ async def stop_duplicate_check(listener):
     return False, None
 
 
+async def get_priority_class(user_id):
+    if user_id == Config.OWNER_ID:
+        return "owner"
+    if user_id in sudo_users or user_data.get(user_id, {}).get("SUDO"):
+        return "sudo"
+    if Config.PAID_CHANNEL_ID and await is_paid(user_id):
+        return "paid"
+    return "normal"
+
+
+def _running_per_user():
+    running = Counter()
+    for mid in non_queued_dl | non_queued_up:
+        if task := task_dict.get(mid):
+            running[task.listener.user_id] += 1
+    return running
+
+
+def _count_running(running, mid):
+    if task := task_dict.get(mid):
+        running[task.listener.user_id] += 1
+
+
 async def check_running_tasks(listener, state="dl"):
     all_limit = Config.QUEUE_ALL
     state_limit = Config.QUEUE_DOWNLOAD if state == "dl" else Config.QUEUE_UPLOAD
+    user_limit = Config.QUEUE_USER_LIMIT
     event = None
     is_over_limit = False
+    forced = (
+        listener.force_run
+        or (listener.force_upload and state == "up")
+        or (listener.force_download and state == "dl")
+    )
     async with queue_dict_lock:
         if state == "up" and listener.mid in non_queued_dl:
             non_queued_dl.remove(listener.mid)
-        if (
-            (all_limit or state_limit)
-            and not listener.force_run
-            and not (listener.force_upload and state == "up")
-            and not (listener.force_download and state == "dl")
-        ):
+        if (all_limit or state_limit or user_limit) and not forced:
             dl_count = len(non_queued_dl)
             up_count = len(non_queued_up)
             t_count = dl_count if state == "dl" else up_count
             is_over_limit = (
-                all_limit
-                and dl_count + up_count >= all_limit
-                and (not state_limit or t_count >= state_limit)
-            ) or (state_limit and t_count >= state_limit)
-            if is_over_limit:
-                event = Event()
-                if state == "dl":
-                    queued_dl[listener.mid] = event
-                else:
-                    queued_up[listener.mid] = event
-        if not is_over_limit:
-            if state == "up":
-                non_queued_up.add(listener.mid)
+                (
+                    all_limit
+                    and dl_count + up_count >= all_limit
+                    and (not state_limit or t_count >= state_limit)
+                )
+                or (state_limit and t_count >= state_limit)
+                or (
+                    user_limit
+                    and _running_per_user()[listener.user_id] >= user_limit
+                )
+            )
+        if (
+            state == "dl"
+            and not is_over_limit
+            and not forced
+            and Config.DISK_ADMISSION
+            and not disk_reserve.fits(listener)
+        ):
+            LOGGER.info(f"Not enough free disk space, queued: {listener.name}")
+            is_over_limit = True
+            await _watch_disk()
+        if is_over_limit:
+            event = Event()
+            if state == "dl":
+                queued_dl[listener.mid] = event
             else:
-                non_queued_dl.add(listener.mid)
+                queued_up[listener.mid] = event
+            task_scheduler.add(
+                state,
+                listener.mid,
+                listener.user_id,
+                listener.priority,
+            )
+        elif state == "up":
+            non_queued_up.add(listener.mid)
+        else:
+            non_queued_dl.add(listener.mid)
+            disk_reserve.reserve(listener)
 
+    # Resolved once per task, and only for tasks that wait. Until then the task
+    # is ranked as normal.
+    if is_over_limit and listener.priority is None:
+        listener.priority = await get_priority_class(listener.user_id)
+        task_scheduler.set_priority(listener.mid, listener.priority)
     return is_over_limit, event
 
 
@@ -95,12 +158,69 @@ async def start_dl_from_queued(mid: int):
     queued_dl[mid].set()
     del queued_dl[mid]
     non_queued_dl.add(mid)
+    task_scheduler.remove("dl", mid)
+    if task := task_dict.get(mid):
+        disk_reserve.reserve(task.listener)
 
 
 async def start_up_from_queued(mid: int):
     queued_up[mid].set()
     del queued_up[mid]
     non_queued_up.add(mid)
+    task_scheduler.remove("up", mid)
+
+
+def _select_queued(state, slots, running, fits=None):
+    """Returns the queued mids to release, in the order the scheduler ranks them."""
+    task_scheduler.aging_interval = Config.QUEUE_AGING_TIME
+    return task_scheduler.select(
+        state,
+        queued_dl if state == "dl" else queued_up,
+        slots,
+        running,
+        Config.QUEUE_USER_LIMIT,
+        fits,
+    )
+
+
+def _fits_disk(mid):
+    task = task_dict.get(mid)
+    return task is None or disk_reserve.fits(task.listener)
+
+
+@new_task
+async def _disk_watcher():
+    """Starts queued downloads once space freed outside the bot fits them."""
+    while True:
+        await sleep(DISK_RECHECK_INTERVAL)
+        await start_from_queued()
+        async with queue_dict_lock:
+            if not Config.DISK_ADMISSION or all(map(_fits_disk, queued_dl)):
+                intervals["disk"] = ""
+                break
+
+
+async def _watch_disk():
+    if not intervals["disk"]:
+        intervals["disk"] = await _disk_watcher()
+
+
+async def _start_queued_dl(slots, running):
+    """
+    Starts up to `slots` queued downloads. Those the disk can't fit yet are
+    passed over, one at a time, so every start sees the space reserved by the
+    ones before it.
+    """
+    fits = _fits_disk if Config.DISK_ADMISSION else None
+    started = 0
+    while slots is None or started < slots:
+        if not (mids := _select_queued("dl", 1, running, fits)):
+            break
+        await start_dl_from_queued(mids[0])
+        _count_running(running, mids[0])
+        started += 1
+    if fits and not all(map(fits, queued_dl)):
+        await _watch_disk()
 
 
 async def start_from_queued():
@@ -113,45 +233,33 @@ async def start_from_queued():
             all_ = dl + up
             if all_ < all_limit:
                 f_tasks = all_limit - all_
+                running = _running_per_user()
                 if queued_up and (not up_limit or up < up_limit):
-                    for index, mid in enumerate(list(queued_up.keys()), start=1):
+                    slots = min(f_tasks, up_limit - up) if up_limit else f_tasks
+                    for mid in _select_queued("up", slots, running):
                         await start_up_from_queued(mid)
+                        _count_running(running, mid)
                         f_tasks -= 1
-                        if f_tasks == 0 or (up_limit and index >= up_limit - up):
-                            break
                 if queued_dl and (not dl_limit or dl < dl_limit) and f_tasks != 0:
-                    for index, mid in enumerate(list(queued_dl.keys()), start=1):
-                        await start_dl_from_queued(mid)
-                        if (dl_limit and index >= dl_limit - dl) or index == f_tasks:
-                            break
+                    slots = min(f_tasks, dl_limit - dl) if dl_limit else f_tasks
+                    await _start_queued_dl(slots, running)
         return
 
-    if up_limit := Config.QUEUE_UPLOAD:
-        async with queue_dict_lock:
+    running = _running_per_user()
+    async with queue_dict_lock:
+        if queued_up:
+            up_limit = Config.QUEUE_UPLOAD
             up = len(non_queued_up)
-            if queued_up and up < up_limit:
-                f_tasks = up_limit - up
-                for index, mid in enumerate(list(queued_up.keys()), start=1):
-                    await start_up_from_queued(mid)
-                    if index == f_tasks:
-                        break
-    else:
-        async with queue_dict_lock:
-            if queued_up:
-                for mid in list(queued_up.keys()):
+            if not up_limit or up < up_limit:
+                slots = up_limit - up if up_limit else None
+                for mid in _select_queued("up", slots, running):
                     await start_up_from_queued(mid)
+                    _count_running(running, mid)
 
-    if dl_limit := Config.QUEUE_DOWNLOAD:
-        async with queue_dict_lock:
+    async with queue_dict_lock:
+        if queued_dl:
+            dl_limit = Config.QUEUE_DOWNLOAD
             dl = len(non_queued_dl)
-            if queued_dl and dl < dl_limit:
-                f_tasks = dl_limit - dl
-                for index, mid in enumerate(list(queued_dl.keys()), start=1):
-                    await start_dl_from_queued(mid)
-                    if index == f_tasks:
-                        break
-    else:
-        async with queue_dict_lock:
-            if queued_dl:
-                for mid in list(queued_dl.keys()):
-                    await start_dl_from_queued(mid)
+            if not dl_limit or dl < dl_limit:
+                slots = dl_limit - dl if dl_limit else None
+                await _start_queued_dl(slots, running)
@@ -0,0 +1,146 @@
+from itertools import count
+from time import time
+
+PRIORITY_CLASSES = ("owner", "sudo", "paid", "normal")
+CLASS_WEIGHTS = {"owner": 8, "sudo": 4, "paid": 2, "normal": 1}
+
+
+class QueuedTask:
+    __slots__ = ("enqueued", "mid", "priority", "seq", "top", "user_id")
+
+    def __init__(self, mid, user_id, priority, enqueued, seq):
+        self.mid = mid
+        self.user_id = user_id
+        self.priority = priority
+        self.enqueued = enqueued
+        self.seq = seq
+        self.top = False
+
+
+class TaskScheduler:
+    """
+    Decides which queued tasks are released when download or upload slots free up.
+
+    Every queued task belongs to a priority class whose weight sets the share of
+    slots its user is entitled to. A task is released ahead of another when its
+    user's running tasks divided by its weight is lower, so heavier classes get
+    proportionally more slots without starving anyone. Waiting tasks age into
+    the next class every `aging_interval` seconds, and ties fall back to the
+    order of arrival. The clock is injectable so that every decision is
+    reproducible.
+    """
+
+    def __init__(self, aging_interval=600, clock=time):
+        self.aging_interval = aging_interval
+        self._clock = clock
+        self._seq = count()
+        self._queues = {"dl": {}, "up": {}}
+
+    def add(self, state, mid, user_id, priority="normal"):
+        if priority not in CLASS_WEIGHTS:
+            priority = "normal"
+        self._queues[state][mid] = QueuedTask(
+            mid,
+            user_id,
+            priority,
+            self._clock(),
+            next(self._seq),
+        )
+
+    def remove(self, state, mid):
+        self._queues[state].pop(mid, None)
+
+    def get(self, mid):
+        for queue in self._queues.values():
+            if mid in queue:
+                return queue[mid]
+        return None
+
+    def set_priority(self, mid, priority):
+        """
+        Re-ranks a queued task. `priority` is a class name or "top", which
+        releases the task before every other waiting task regardless of fair
+        share, behind tasks moved to the top later. The per-user limit still
+        applies.
+
+        Returns:
+            True if the task was queued, False otherwise.
+        """
+        if (entry := self.get(mid)) is None:
+            return False
+        if priority == "top":
+            entry.top = True
+            entry.seq = -next(self._seq) - 1
+        else:
+            entry.top = False
+            entry.priority = priority
+        return True
+
+    def effective_class(self, entry, now=None):
+        now = self._clock() if now is None else now
+        rank = PRIORITY_CLASSES.index(entry.priority)
+        if self.aging_interval:
+            rank -= int((now - entry.enqueued) // self.aging_interval)
+        return PRIORITY_CLASSES[max(rank, 0)]
+
+    def select(self, state, mids, slots, running=None, user_limit=0, fits=None):
+        """
+        Picks the queued tasks to release.
+
+        Args:
+            state: "dl" or "up".
+            mids: The mids currently waiting in that queue. Entries of tasks that
+                left the queue by other means are dropped, and waiting tasks the
+                scheduler does not know yet are treated as normal newcomers.
+            slots: The number of tasks that may be released. None means no limit.
+            running: A mapping of user_id to the number of running tasks.
+            user_limit: The maximum running tasks per user. 0 means no limit.
+            fits: Tells whether the task of a mid can start now. Tasks it
+                rejects are passed over without using up their user's share.
+
+        Returns:
+            A list of mids in release order.
+        """
+        queue = self._queues[state]
+        mids = list(mids)
+        for mid in set(queue) - set(mids):
+            del queue[mid]
+        for mid in mids:
+            if mid not in queue:
+                self.add(state, mid, None)
+        running = dict(running or {})
+        now = self._clock()
+        pending = [queue[mid] for mid in mids]
+        selected = []
+        while pending and (slots is None or len(selected) < slots):
+            candidates = [
+                entry
+                for entry in pending
+                if not user_limit or running.get(entry.user_id, 0) < user_limit
+            ]
+            if not candidates:
+                break
+            entry = min(
+                candidates,
+                key=lambda e: (
+                    not e.top,
+                    e.seq if e.top else 0,
+                    (running.get(e.user_id, 0) + 1)
+                    / CLASS_WEIGHTS[self.effective_class(e, now)],
+                    PRIORITY_CLASSES.index(self.effective_class(e, now)),
+                    e.seq,
+                ),
+            )
+            pending.remove(entry)
+            if fits is not None and not fits(entry.mid):
+                continue
+            selected.append(entry.mid)
+            running[entry.user_id] = running.get(entry.user_id, 0) + 1
+        return selected
+
+    def order(self, state, running=None):
+        """Returns the current release order of a queue without changing it."""
+        return self.select(state, list(self._queues[state]), None, running)
+
+
+task_scheduler = TaskScheduler()
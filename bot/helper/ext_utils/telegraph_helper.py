@@ -1,17 +1,63 @@
-from asyncio import sleep
+from asyncio import Semaphore, gather, sleep
 from secrets import token_hex
+from time import monotonic
 
 from telegraph.aio import Telegraph
 from telegraph.exceptions import RetryAfterError
 
 from bot import LOGGER
 
+# Telegraph rejects pages whose node tree exceeds 64 KiB. The HTML we send
+# expands a little once converted to nodes, so pages are planned in HTML bytes
+# with enough headroom for that expansion and the navigation footer.
+PAGE_BUDGET = 39000
+NAV_RESERVE = 300
+
+
+def plan_pages(entries, budget=PAGE_BUDGET):
+    """
+    Packs HTML entries into pages without splitting an entry across pages.
+
+    Args:
+        entries: An iterable of HTML strings, one per result block.
+        budget: The maximum size of one page in UTF-8 bytes, navigation included.
+
+    Returns:
+        A list of HTML strings, one per Telegraph page.
+    """
+    limit = budget - NAV_RESERVE
+    pages = []
+    page = []
+    size = 0
+    for entry in entries:
+        entry_size = len(entry.encode("utf-8"))
+        if page and size + entry_size > limit:
+            pages.append("".join(page))
+            page = []
+            size = 0
+        page.append(entry)
+        size += entry_size
+    if page:
+        pages.append("".join(page))
+    return pages
+
+
+def _nav_footer(paths, index):
+    links = []
+    if index > 0:
+        links.append(f'<a href="https://telegra.ph/{paths[index - 1]}">Prev</a>')
+    if index < len(paths) - 1:
+        links.append(f'<a href="https://telegra.ph/{paths[index + 1]}">Next</a>')
+    return f"<b>{' | '.join(links)}</b>" if links else ""
+
 
 class TelegraphHelper:
-    def __init__(self, author_name=None, author_url=None):
+    def __init__(self, author_name=None, author_url=None, concurrency=8):
         self._telegraph = Telegraph(domain="graph.org")
         self._author_name = author_name
         self._author_url = author_url
+        self._slots = Semaphore(concurrency)
+        self._resume_at = 0
 
     async def create_account(self):
         LOGGER.info("Creating Telegraph Account")
@@ -24,64 +70,81 @@ class TelegraphHelper:
         except Exception as e:
             LOGGER.error(f"Failed to create Telegraph Account: {e}")
 
+    async def _call(self, method, **kwargs):
+        """
+        Runs a Telegraph API call under the shared rate limiter. A RetryAfter
+        seen by any call pauses every pending call until the flood wait ends.
+        """
+        while True:
+            if (delay := self._resume_at - monotonic()) > 0:
+                await sleep(delay)
+                continue
+            async with self._slots:
+                if self._resume_at > monotonic():
+                    continue
+                try:
+                    return await method(
+                        author_name=self._author_name,
+                        author_url=self._author_url,
+                        **kwargs,
+                    )
+                except RetryAfterError as st:
+                    resume_at = monotonic() + st.retry_after
+                    if resume_at > self._resume_at:
+                        LOGGER.warning(
+                            f"Telegraph Flood control exceeded. I will sleep for {st.retry_after} seconds.",
+                        )
+                        self._resume_at = resume_at
+
     async def create_page(self, title, content):
-        try:
-            return await self._telegraph.create_page(
-                title=title,
-                author_name=self._author_name,
-                author_url=self._author_url,
-                html_content=content,
-            )
-        except RetryAfterError as st:
-            LOGGER.warning(
-                f"Telegraph Flood control exceeded. I will sleep for {st.retry_after} seconds.",
-            )
-            await sleep(st.retry_after)
-            return await self.create_page(title, content)
+        return await self._call(
+            self._telegraph.create_page,
+            title=title,
+            html_content=content,
+        )
 
     async def edit_page(self, path, title, content):
-        try:
-            return await self._telegraph.edit_page(
-                path=path,
-                title=title,
-                author_name=self._author_name,
-                author_url=self._author_url,
-                html_content=content,
-            )
-        except RetryAfterError as st:
-            LOGGER.warning(
-                f"Telegraph Flood control exceeded. I will sleep for {st.retry_after} seconds.",
-            )
-            await sleep(st.retry_after)
-            return await self.edit_page(path, title, content)
-
-    async def edit_telegraph(self, path, telegraph_content):
-        nxt_page = 1
-        prev_page = 0
-        num_of_path = len(path)
-        for content in telegraph_content:
-            if nxt_page == 1:
-                content += (
-                    f'<b><a href="https://telegra.ph/{path[nxt_page]}">Next</a></b>'
-                )
-                nxt_page += 1
-            else:
-                if prev_page <= num_of_path:
-                    content += f'<b><a href="https://telegra.ph/{path[prev_page]}">Prev</a></b>'
-                    prev_page += 1
-                if nxt_page < num_of_path:
-                    content += f'<b> | <a href="https://telegra.ph/{path[nxt_page]}">Next</a></b>'
-                    nxt_page += 1
-            await self.edit_page(
-                path=path[prev_page],
-                title="Mirror-leech-bot Torrent Search",
-                content=content,
+        return await self._call(
+            self._telegraph.edit_page,
+            path=path,
+            title=title,
+            html_content=content,
+        )
+
+    async def publish(self, title, pages):
+        """
+        Publishes a series of pages linked with Prev/Next navigation.
+
+        Telegraph assigns page paths on creation, so the paths of a series are
+        reserved first with lightweight placeholder pages. Every page is then
+        written once with its full content and final navigation. Both rounds
+        run concurrently under the shared rate limiter.
+
+        Args:
+            title: The title used for every page.
+            pages: A list of HTML strings, usually from `plan_pages`.
+
+        Returns:
+            A list of page paths in reading order.
+        """
+        if len(pages) == 1:
+            return [(await self.create_page(title, pages[0]))["path"]]
+        paths = [
+            page["path"]
+            for page in await gather(
+                *(self.create_page(title, "<p>...</p>") for _ in pages),
             )
+        ]
+        await gather(
+            *(
+                self.edit_page(paths[i], title, content + _nav_footer(paths, i))
+                for i, content in enumerate(pages)
+            ),
+        )
+        return paths
 
 
 telegraph = TelegraphHelper(
     "Mirror-Leech-Telegram-Bot",
     "https://github.com/anasty17/mirror-leech-telegram-bot",
 )
-
-print(__name__)
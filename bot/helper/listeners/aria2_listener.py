@@ -1,5 +1,4 @@
 import contextlib
-from asyncio import sleep
 from time import time
 
 from aiofiles.os import path as aiopath
@@ -8,10 +7,14 @@ from aiohttp.client_exceptions import ClientError
 
 from bot import LOGGER, intervals, task_dict, task_dict_lock
 from bot.core.config_manager import Config
-from bot.core.torrent_manager import TorrentManager, aria2_name, is_metadata
+from bot.core.torrent_manager import (
+    TorrentManager,
+    aria2_name,
+    aria2_state,
+    is_metadata,
+)
 from bot.helper.ext_utils.bot_utils import bt_selection_buttons
 from bot.helper.ext_utils.files_utils import clean_unwanted
-from bot.helper.ext_utils.status_utils import get_task_by_gid
 from bot.helper.ext_utils.task_manager import stop_duplicate_check
 from bot.helper.mirror_leech_utils.status_utils.aria2_status import Aria2Status
 from bot.helper.telegram_helper.message_utils import (
@@ -21,36 +24,33 @@ from bot.helper.telegram_helper.message_utils import (
 )
 
 
-async def _on_download_started(api, data):
+def _name_known(download):
+    return aria2_name(download) or download.get("status", "") != "active"
+
+
+def _metadata_done(download):
+    return download.get("status", "") == "removed" or download.get("followedBy", [])
+
+
+async def _on_download_started(_, data):
     gid = data["params"][0]["gid"]
-    download = await api.tellStatus(gid)
-    options = await api.getOption(gid)
+    download, options = await aria2_state.fetch(gid)
     if options.get("follow-torrent", "") == "false":
         return
     if is_metadata(download):
         LOGGER.info(f"onDownloadStarted: {gid} METADATA")
-        await sleep(1)
-        if task := await get_task_by_gid(gid):
+        if task := await aria2_state.wait_task(gid):
             task.listener.is_torrent = True
             if task.listener.select:
                 metamsg = "Downloading Metadata, wait then you can select files. Use torrent file to avoid this wait."
                 meta = await send_message(task.listener.message, metamsg)
-                while True:
-                    await sleep(0.5)
-                    if download.get("status", "") == "removed" or download.get(
-                        "followedBy",
-                        [],
-                    ):
-                        await delete_message(meta)
-                        break
-                    download = await api.tellStatus(gid)
+                await aria2_state.wait_until(gid, _metadata_done)
+                await delete_message(meta)
         return
     LOGGER.info(f"onDownloadStarted: {aria2_name(download)} - Gid: {gid}")
-    await sleep(1)
-
-    await sleep(2)
-    if task := await get_task_by_gid(gid):
-        download = await api.tellStatus(gid)
+    if task := await aria2_state.wait_task(gid):
+        # Direct links only get their file name with the first response.
+        download = await aria2_state.wait_until(gid, _name_known, interval=1)
         task.listener.name = aria2_name(download)
         msg, button = await stop_duplicate_check(task.listener)
         if msg:
@@ -58,11 +58,10 @@ async def _on_download_started(api, data):
             await task.listener.on_download_error(msg, button)
 
 
-async def _on_download_complete(api, data):
+async def _on_download_complete(_, data):
     try:
         gid = data["params"][0]["gid"]
-        download = await api.tellStatus(gid)
-        options = await api.getOption(gid)
+        download, options = await aria2_state.fetch(gid)
     except (TimeoutError, ClientError, Exception) as e:
         LOGGER.error(f"onDownloadComplete: {e}")
         return
@@ -71,16 +70,17 @@ async def _on_download_complete(api, data):
     if download.get("followedBy", []):
         new_gid = download.get("followedBy", [])[0]
         LOGGER.info(f"Gid changed from {gid} to {new_gid}")
-        if task := await get_task_by_gid(new_gid):
+        aria2_state.followed(gid, new_gid)
+        if task := aria2_state.task(new_gid):
             task.listener.is_torrent = True
             if Config.BASE_URL and task.listener.select:
                 if not task.queued:
-                    await api.forcePause(new_gid)
+                    await TorrentManager.aria2.forcePause(new_gid)
                 SBUTTONS = bt_selection_buttons(new_gid)
                 msg = "Your download paused. Choose files then press Done Selecting button to start downloading."
                 await send_message(task.listener.message, msg, SBUTTONS)
     elif "bittorrent" in download:
-        if task := await get_task_by_gid(gid):
+        if task := aria2_state.task(gid):
             task.listener.is_torrent = True
             if hasattr(task, "seeding") and task.seeding:
                 LOGGER.info(
@@ -92,19 +92,18 @@ async def _on_download_complete(api, data):
                 )
     else:
         LOGGER.info(f"onDownloadComplete: {aria2_name(download)} - Gid: {gid}")
-        if task := await get_task_by_gid(gid):
+        if task := await aria2_state.wait_task(gid):
             await task.listener.on_download_complete()
             if intervals["stopAll"]:
                 return
             await TorrentManager.aria2_remove(download)
 
 
-async def _on_bt_download_complete(api, data):
+async def _on_bt_download_complete(_, data):
     gid = data["params"][0]["gid"]
-    await sleep(1)
-    download = await api.tellStatus(gid)
+    download, _ = await aria2_state.fetch(gid)
     LOGGER.info(f"onBtDownloadComplete: {aria2_name(download)} - Gid: {gid}")
-    if task := await get_task_by_gid(gid):
+    if task := await aria2_state.wait_task(gid):
         task.listener.is_torrent = True
         if task.listener.select:
             res = download.get("files", [])
@@ -115,38 +114,37 @@ async def _on_bt_download_complete(api, data):
                 ):
                     with contextlib.suppress(Exception):
                         await remove(f_path)
-            await clean_unwanted(download.dir)
+            await clean_unwanted(download["dir"])
         if task.listener.seed:
             try:
-                await api.changeOption(gid, {"max-upload-limit": "0"})
+                await TorrentManager.aria2.changeOption(
+                    gid,
+                    {"max-upload-limit": "0"},
+                )
             except (TimeoutError, ClientError, Exception) as e:
                 LOGGER.error(
                     f"{e} You are not able to seed because you added global option seed-time=0 without adding specific seed_time for this torrent GID: {gid}",
                 )
         else:
             try:
-                await api.forcePause(gid)
+                await TorrentManager.aria2.forcePause(gid)
             except (TimeoutError, ClientError, Exception) as e:
                 LOGGER.error(f"onBtDownloadComplete: {e} GID: {gid}")
         await task.listener.on_download_complete()
         if intervals["stopAll"]:
             return
-        download = await api.tellStatus(gid)
+        download = await aria2_state.status(gid, 0)
         if (
             task.listener.seed
             and download.get("status", "") == "complete"
-            and await get_task_by_gid(gid)
+            and aria2_state.task(gid)
         ):
             LOGGER.info(f"Cancelling Seed: {aria2_name(download)}")
             await TorrentManager.aria2_remove(download)
             await task.listener.on_upload_error(
                 f"Seeding stopped with Ratio: {task.ratio()} and Time: {task.seeding_time()}",
             )
-        elif (
-            task.listener.seed
-            and download.get("status", "") == "complete"
-            and not await get_task_by_gid(gid)
-        ):
+        elif task.listener.seed and download.get("status", "") == "complete":
             pass
         elif task.listener.seed and not task.listener.is_cancelled:
             async with task_dict_lock:
@@ -163,24 +161,27 @@ async def _on_bt_download_complete(api, data):
 
 async def _on_download_stopped(_, data):
     gid = data["params"][0]["gid"]
-    await sleep(4)
-    if task := await get_task_by_gid(gid):
+    # Wakes waiters on the gid, e.g. for the metadata of a cancelled task.
+    with contextlib.suppress(Exception):
+        await aria2_state.fetch(gid)
+    if aria2_state.removed_by_bot(gid):
+        return
+    if (task := aria2_state.task(gid)) and not task.listener.is_cancelled:
         await task.listener.on_download_error("Dead torrent!")
 
 
-async def _on_download_error(api, data):
+async def _on_download_error(_, data):
     gid = data["params"][0]["gid"]
-    await sleep(1)
     LOGGER.info(f"onDownloadError: {gid}")
     error = "None"
+    options = {}
     with contextlib.suppress(TimeoutError, ClientError, Exception):
-        download = await api.tellStatus(gid)
-        options = await api.getOption(gid)
+        download, options = await aria2_state.fetch(gid)
         error = download.get("errorMessage", "")
         LOGGER.info(f"Download Error: {error}")
     if options.get("follow-torrent", "") == "false":
         return
-    if task := await get_task_by_gid(gid):
+    if task := await aria2_state.wait_task(gid):
         await task.listener.on_download_error(error)
 
 
@@ -3,7 +3,12 @@ from asyncio import sleep
 from bot import intervals, jd_downloads, jd_listener_lock
 from bot.core.jdownloader_booter import jdownloader
 from bot.helper.ext_utils.bot_utils import new_task
+from bot.helper.ext_utils.poll_utils import AdaptivePoller
 from bot.helper.ext_utils.status_utils import get_task_by_gid
+from bot.helper.mirror_leech_utils.status_utils.jdownloader_status import (
+    get_info,
+    jd_packages,
+)
 
 
 @new_task
@@ -41,40 +46,55 @@ async def _on_download_complete(gid):
                 del jd_downloads[gid]
 
 
+jd_poller = AdaptivePoller(["Extracting"], ["Queued"])
+
+
+def _poll_state(info):
+    status = info.get("status", "")
+    if "extract" in status.lower():
+        return "Extracting"
+    if not status and not info.get("bytesLoaded", 0):
+        return "Queued"
+    return status
+
+
 @new_task
 async def _jd_listener():
     while True:
-        await sleep(3)
+        await jd_poller.wait()
+        try:
+            all_packages = await jd_packages.get()
+        except Exception:
+            await sleep(3)
+            continue
         async with jd_listener_lock:
             if len(jd_downloads) == 0:
                 intervals["jd"] = ""
                 break
-            try:
-                packages = await jdownloader.device.downloads.query_packages(
-                    [{"finished": True, "saveTo": True}],
-                )
-            except Exception:
-                continue
-
-            all_packages = {pack["uuid"]: pack for pack in packages}
+            jd_poller.retain(jd_downloads)
             for d_gid, d_dict in list(jd_downloads.items()):
                 if d_dict["status"] == "down":
-                    for index, pid in enumerate(d_dict["ids"]):
-                        if pid not in all_packages:
-                            del jd_downloads[d_gid]["ids"][index]
-                    if len(jd_downloads[d_gid]["ids"]) == 0:
-                        path = jd_downloads[d_gid]["path"]
-                        jd_downloads[d_gid]["ids"] = [
+                    d_dict["ids"] = [
+                        pid for pid in d_dict["ids"] if pid in all_packages
+                    ]
+                    if len(d_dict["ids"]) == 0:
+                        path = d_dict["path"]
+                        d_dict["ids"] = [
                             uid
                             for uid, pk in all_packages.items()
                             if pk["saveTo"].startswith(path)
                         ]
-                    if len(jd_downloads[d_gid]["ids"]) == 0:
+                    if len(d_dict["ids"]) == 0:
                         await remove_download(d_gid)
+                        continue
+                    info = get_info(d_gid, all_packages, {})
+                    jd_poller.observe(d_gid, _poll_state(info), info.get("eta"))
 
-            if completed_packages := [
-                pack["uuid"] for pack in packages if pack.get("finished", False)
-            ]:
+            if completed_packages := {
+                uid
+                for uid, pack in all_packages.items()
+                if pack.get("finished", False)
+            }:
                 for d_gid, d_dict in list(jd_downloads.items()):
                     if d_dict["status"] == "down":
                         is_finished = all(
@@ -85,7 +105,8 @@ async def _jd_listener():
                             await _on_download_complete(d_gid)
 
 
-async def on_download_start():
+async def on_download_start(gid):
     async with jd_listener_lock:
+        jd_poller.add(gid)
         if not intervals["jd"]:
             intervals["jd"] = await _jd_listener()
@@ -2,8 +2,15 @@ from asyncio import gather, sleep
 
 from bot import LOGGER, intervals, nzb_jobs, nzb_listener_lock, sabnzbd_client
 from bot.helper.ext_utils.bot_utils import new_task
+from bot.helper.ext_utils.poll_utils import AdaptivePoller
 from bot.helper.ext_utils.status_utils import get_task_by_gid
 from bot.helper.ext_utils.task_manager import stop_duplicate_check
+from bot.helper.mirror_leech_utils.status_utils.nzb_status import (
+    PHASE_COMPLETED,
+    PHASE_FAILED,
+    sab_jobs,
+    sab_models,
+)
 
 
 async def _remove_job(nzo_id, mid):
@@ -16,6 +23,7 @@ async def _remove_job(nzo_id, mid):
     async with nzb_listener_lock:
         if nzo_id in nzb_jobs:
             del nzb_jobs[nzo_id]
+        sab_models.pop(nzo_id, None)
 
 
 @new_task
@@ -35,7 +43,7 @@ async def _stop_duplicate(nzo_id):
         task.listener.name = task.name()
         msg, button = await stop_duplicate_check(task.listener)
         if msg:
-            _on_download_error(msg, nzo_id, button)
+            await _on_download_error(msg, nzo_id, button)
 
 
 @new_task
@@ -47,44 +55,68 @@ async def _on_download_complete(nzo_id):
         await _remove_job(nzo_id, task.listener.mid)
 
 
+# Post-processing states, polled often, and states of jobs that wait.
+BUSY_STATES = [
+    "QuickCheck",
+    "Verifying",
+    "Repairing",
+    "Fetching",
+    "Extracting",
+    "Moving",
+    "Running",
+]
+QUEUED_STATES = ["Queued", "Paused", "Propagating", "Grabbing"]
+nzb_poller = AdaptivePoller(BUSY_STATES, QUEUED_STATES)
+
+
 @new_task
 async def _nzb_listener():
     while not intervals["stopAll"]:
+        await nzb_poller.wait()
+        try:
+            downloads, jobs = await sab_jobs.get()
+        except Exception as e:
+            LOGGER.error(str(e))
+            await sleep(3)
+            continue
         async with nzb_listener_lock:
             try:
-                jobs = (await sabnzbd_client.get_history())["history"]["slots"]
-                downloads = (await sabnzbd_client.get_downloads())["queue"]["slots"]
                 if len(nzb_jobs) == 0:
                     intervals["nzb"] = ""
                     break
-                for job in jobs:
-                    nzo_id = job["nzo_id"]
+                nzb_poller.retain(nzb_jobs)
+                for nzo_id, job in jobs.items():
                     if nzo_id not in nzb_jobs:
                         continue
-                    if job["status"] == "Completed":
+                    nzb_poller.observe(nzo_id, job.state)
+                    if job.phase == PHASE_COMPLETED:
                         if not nzb_jobs[nzo_id]["uploaded"]:
                             nzb_jobs[nzo_id]["uploaded"] = True
                             await _on_download_complete(nzo_id)
                             nzb_jobs[nzo_id]["status"] = "Completed"
-                    elif job["status"] == "Failed":
-                        await _on_download_error(job["fail_message"], nzo_id)
-                for dl in downloads:
-                    nzo_id = dl["nzo_id"]
+                    elif job.phase == PHASE_FAILED:
+                        await _on_download_error(job.fail_message, nzo_id)
+                for nzo_id, dl in downloads.items():
                     if nzo_id not in nzb_jobs:
                         continue
-                    if dl["labels"] and dl["labels"][0] == "ALTERNATIVE":
+                    trying = dl.name.startswith("Trying")
+                    nzb_poller.observe(
+                        nzo_id,
+                        "Trying" if trying else dl.state,
+                        dl.eta,
+                    )
+                    if dl.labels and dl.labels[0] == "ALTERNATIVE":
                         await _on_download_error("Duplicated Job!", nzo_id)
                         continue
                     if (
-                        dl["status"] == "Downloading"
+                        dl.state == "Downloading"
                         and not nzb_jobs[nzo_id]["stop_dup_check"]
-                        and not dl["filename"].startswith("Trying")
+                        and not trying
                     ):
                         nzb_jobs[nzo_id]["stop_dup_check"] = True
                         await _stop_duplicate(nzo_id)
             except Exception as e:
                 LOGGER.error(str(e))
-        await sleep(3)
 
 
 async def on_download_start(nzo_id):
@@ -94,5 +126,6 @@ async def on_download_start(nzo_id):
             "stop_dup_check": False,
             "status": "Downloading",
         }
+        nzb_poller.add(nzo_id)
         if not intervals["nzb"]:
             intervals["nzb"] = await _nzb_listener()
@@ -16,7 +16,7 @@ from bot import (
     task_dict_lock,
 )
 from bot.core.config_manager import Config
-from bot.core.torrent_manager import TorrentManager
+from bot.core.torrent_manager import TorrentManager, qbit_state
 from bot.helper.ext_utils.bot_utils import new_task
 from bot.helper.ext_utils.files_utils import clean_unwanted
 from bot.helper.ext_utils.status_utils import get_readable_time, get_task_by_gid
@@ -65,7 +65,7 @@ async def _stop_duplicate(tor):
         )[0]
         msg, button = await stop_duplicate_check(task.listener)
         if msg:
-            _on_download_error(msg, tor, button)
+            await _on_download_error(msg, tor, button)
 
 
 @new_task
@@ -112,91 +112,108 @@ async def _on_download_complete(tor):
         await _remove_torrent(ext_hash, tag)
 
 
+# States that are checked every tick whether they changed or not, for their
+# timeouts and reannounces.
+WAITING_STATES = ["metaDL", "stalledDL"]
+UPLOAD_STATES = ["queuedUP", "stalledUP", "uploading", "forcedUP"]
+
+
+def _transitions(tor, entry, now, actions):
+    """
+    Decides what a torrent of the bot needs. Only bookkeeping is done here,
+    under qb_listener_lock; requests and handlers go into actions.
+    """
+    state = tor.state
+    if state == "metaDL":
+        entry["stalled_time"] = now
+        if (
+            Config.TORRENT_TIMEOUT
+            and now - entry["start_time"] >= Config.TORRENT_TIMEOUT
+        ):
+            entry["failed"] = True
+            actions["handlers"].append((_on_download_error, "Dead Torrent!", tor))
+        else:
+            actions["reannounce"].append(tor.hash)
+    elif state == "downloading":
+        entry["stalled_time"] = now
+        if not entry["stop_dup_check"]:
+            entry["stop_dup_check"] = True
+            actions["handlers"].append((_stop_duplicate, tor))
+    elif state == "stalledDL":
+        if entry["state"] != "stalledDL":
+            entry["stalled_time"] = now
+        if not entry["rechecked"] and 0.99989999999999999 < tor.progress < 1:
+            msg = f"Force recheck - Name: {tor.name} Hash: "
+            msg += f"{tor.hash} Downloaded Bytes: {tor.downloaded} "
+            msg += f"Size: {tor.size} Total Size: {tor.total_size}"
+            LOGGER.warning(msg)
+            entry["rechecked"] = True
+            actions["recheck"].append(tor.hash)
+        elif (
+            Config.TORRENT_TIMEOUT
+            and now - entry["stalled_time"] >= Config.TORRENT_TIMEOUT
+        ):
+            entry["failed"] = True
+            actions["handlers"].append((_on_download_error, "Dead Torrent!", tor))
+        else:
+            actions["reannounce"].append(tor.hash)
+    elif state == "missingFiles":
+        actions["recheck"].append(tor.hash)
+    elif state == "error":
+        entry["failed"] = True
+        actions["handlers"].append(
+            (_on_download_error, "No enough space for this torrent on device", tor),
+        )
+    elif (
+        int(tor.completion_on.timestamp()) != -1
+        and not entry["uploaded"]
+        and state in UPLOAD_STATES
+    ):
+        entry["uploaded"] = True
+        actions["handlers"].append((_on_download_complete, tor))
+    elif state in ["stoppedUP", "stoppedDL"] and entry["seeding"]:
+        entry["seeding"] = False
+        actions["handlers"].append((_on_seed_finish, tor))
+    entry["state"] = state
+
+
 @new_task
 async def _qb_listener():
+    """
+    Follows the torrents of the bot through the deltas of qbit_state. A
+    torrent is looked at when it changed, or while it waits for metadata or
+    peers, so a tick costs in proportion to the changes and not to the
+    torrents qBittorrent holds.
+    """
     while True:
+        try:
+            changed = await qbit_state.sync()
+        except (ClientError, TimeoutError, Exception, AQError) as e:
+            LOGGER.error(str(e))
+            await sleep(3)
+            continue
+        actions = {"handlers": [], "reannounce": [], "recheck": []}
         async with qb_listener_lock:
-            try:
-                torrents = await TorrentManager.qbittorrent.torrents.info()
-                if len(torrents) == 0:
-                    intervals["qb"] = ""
-                    break
-                for tor_info in torrents:
-                    tag = tor_info.tags[0]
-                    if tag not in qb_torrents:
-                        continue
-                    state = tor_info.state
-                    if state == "metaDL":
-                        qb_torrents[tag]["stalled_time"] = time()
-                        if (
-                            Config.TORRENT_TIMEOUT
-                            and time() - qb_torrents[tag]["start_time"]
-                            >= Config.TORRENT_TIMEOUT
-                        ):
-                            await _on_download_error("Dead Torrent!", tor_info)
-                        else:
-                            await TorrentManager.qbittorrent.torrents.reannounce(
-                                [tor_info.hash],
-                            )
-                    elif state == "downloading":
-                        qb_torrents[tag]["stalled_time"] = time()
-                        if not qb_torrents[tag]["stop_dup_check"]:
-                            qb_torrents[tag]["stop_dup_check"] = True
-                            await _stop_duplicate(tor_info)
-                    elif state == "stalledDL":
-                        if (
-                            not qb_torrents[tag]["rechecked"]
-                            and 0.99989999999999999 < tor_info.progress < 1
-                        ):
-                            msg = f"Force recheck - Name: {tor_info.name} Hash: "
-                            msg += f"{tor_info.hash} Downloaded Bytes: {tor_info.downloaded} "
-                            msg += f"Size: {tor_info.size} Total Size: {tor_info.total_size}"
-                            LOGGER.warning(msg)
-                            await TorrentManager.qbittorrent.torrents.recheck(
-                                [tor_info.hash],
-                            )
-                            qb_torrents[tag]["rechecked"] = True
-                        elif (
-                            Config.TORRENT_TIMEOUT
-                            and time() - qb_torrents[tag]["stalled_time"]
-                            >= Config.TORRENT_TIMEOUT
-                        ):
-                            await _on_download_error("Dead Torrent!", tor_info)
-                        else:
-                            await TorrentManager.qbittorrent.torrents.reannounce(
-                                [tor_info.hash],
-                            )
-                    elif state == "missingFiles":
-                        await TorrentManager.qbittorrent.torrents.recheck(
-                            [tor_info.hash],
-                        )
-                    elif state == "error":
-                        await _on_download_error(
-                            "No enough space for this torrent on device",
-                            tor_info,
-                        )
-                    elif (
-                        int(tor_info.completion_on.timestamp()) != -1
-                        and not qb_torrents[tag]["uploaded"]
-                        and state
-                        in [
-                            "queuedUP",
-                            "stalledUP",
-                            "uploading",
-                            "forcedUP",
-                        ]
-                    ):
-                        qb_torrents[tag]["uploaded"] = True
-                        await _on_download_complete(tor_info)
-                    elif (
-                        state in ["stoppedUP", "stoppedDL"]
-                        and qb_torrents[tag]["seeding"]
-                    ):
-                        qb_torrents[tag]["seeding"] = False
-                        await _on_seed_finish(tor_info)
-                        await sleep(0.5)
-            except (ClientError, TimeoutError, Exception, AQError) as e:
-                LOGGER.error(str(e))
+            if len(qbit_state) == 0:
+                intervals["qb"] = ""
+                break
+            now = time()
+            for tag, entry in qb_torrents.items():
+                if entry["failed"] or (tor := qbit_state.by_tag(tag)) is None:
+                    continue
+                if tor.hash in changed or tor.state in WAITING_STATES:
+                    _transitions(tor, entry, now, actions)
+        for handler, *args in actions["handlers"]:
+            await handler(*args)
+        try:
+            if actions["reannounce"]:
+                await TorrentManager.qbittorrent.torrents.reannounce(
+                    actions["reannounce"],
+                )
+            if actions["recheck"]:
+                await TorrentManager.qbittorrent.torrents.recheck(actions["recheck"])
+        except (ClientError, TimeoutError, Exception, AQError) as e:
+            LOGGER.error(str(e))
         await sleep(3)
 
 
@@ -209,6 +226,8 @@ async def on_download_start(tag):
             "rechecked": False,
             "uploaded": False,
             "seeding": False,
+            "failed": False,
+            "state": "",
         }
         if not intervals["qb"]:
             intervals["qb"] = await _qb_listener()
@@ -1,6 +1,7 @@
 # ruff: noqa: RUF006
 from asyncio import create_task, gather, sleep
 from html import escape
+from time import perf_counter
 
 from aiofiles.os import listdir, makedirs, remove
 from aiofiles.os import path as aiopath
@@ -25,6 +26,7 @@ from bot.core.torrent_manager import TorrentManager
 from bot.helper.common import TaskConfig
 from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.ext_utils.db_handler import database
+from bot.helper.ext_utils.disk_reserve import disk_reserve
 from bot.helper.ext_utils.files_utils import (
     clean_download,
     clean_target,
@@ -34,6 +36,8 @@ from bot.helper.ext_utils.files_utils import (
     remove_excluded_files,
 )
 from bot.helper.ext_utils.links_utils import is_gdrive_id
+from bot.helper.ext_utils.metrics import TASK_EVENTS, UPLOAD_BYTES, UPLOAD_TIME
+from bot.helper.ext_utils.process_utils import release_usage
 from bot.helper.ext_utils.status_utils import get_readable_file_size
 from bot.helper.ext_utils.task_manager import check_running_tasks, start_from_queued
 from bot.helper.mirror_leech_utils.gdrive_utils.upload import GoogleDriveUpload
@@ -60,6 +64,8 @@ from bot.helper.telegram_helper.message_utils import (
 class TaskListener(TaskConfig):
     def __init__(self):
         super().__init__()
+        # The service and start time of the running upload, for the metrics.
+        self._upload = None
 
     async def clean(self):
         try:
@@ -126,6 +132,7 @@ class TaskListener(TaskConfig):
                 self.same_dir[self.folder_name]["total"] -= 1
 
     async def on_download_start(self):
+        TASK_EVENTS.inc(event="download_start")
         if (
             self.is_super_chat
             and Config.INCOMPLETE_TASK_NOTIFIER
@@ -138,6 +145,7 @@ class TaskListener(TaskConfig):
             )
 
     async def on_download_complete(self):
+        TASK_EVENTS.inc(event="download_complete")
         await sleep(2)
         if self.is_cancelled:
             return
@@ -225,6 +233,7 @@ class TaskListener(TaskConfig):
         dl_path = f"{self.dir}/{self.name}"
         self.size = await get_path_size(dl_path)
         self.is_file = await aiopath.isfile(dl_path)
+        disk_reserve.stage_done(self, "download")
         if self.seed:
             up_dir = self.up_dir = f"{self.dir}10000"
             up_path = f"{self.up_dir}/{self.name}"
@@ -255,6 +264,7 @@ class TaskListener(TaskConfig):
             self.size = await get_path_size(up_dir)
             self.clear()
             await remove_excluded_files(up_dir, self.excluded_extensions)
+            disk_reserve.stage_done(self, "extract")
 
         if self.watermark:
             up_path = await self.proceed_watermark(
@@ -335,6 +345,8 @@ class TaskListener(TaskConfig):
             self.size = await get_path_size(up_dir)
             self.clear()
 
+        disk_reserve.stage_done(self, "ffmpeg")
+
         if self.compress:
             up_path = await self.proceed_compress(
                 up_path,
@@ -344,6 +356,7 @@ class TaskListener(TaskConfig):
             if self.is_cancelled:
                 return
             self.clear()
+            disk_reserve.stage_done(self, "compress")
 
         self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
         self.size = await get_path_size(up_dir)
@@ -356,6 +369,7 @@ class TaskListener(TaskConfig):
             if self.is_cancelled:
                 return
             self.clear()
+            disk_reserve.stage_done(self, "split")
 
         self.subproc = None
 
@@ -435,6 +449,7 @@ class TaskListener(TaskConfig):
             tg = TelegramUploader(self, up_dir)
             async with task_dict_lock:
                 task_dict[self.mid] = TelegramStatus(self, tg, gid, "up")
+            self._start_upload("telegram")
             await gather(
                 update_status_message(self.message.chat.id),
                 tg.upload(),
@@ -467,6 +482,7 @@ class TaskListener(TaskConfig):
             )
             async with task_dict_lock:
                 task_dict[self.mid] = YtStatus(self, yt, gid)
+            self._start_upload("youtube")
             await gather(
                 update_status_message(self.message.chat.id),
                 sync_to_async(yt.upload),
@@ -484,6 +500,7 @@ class TaskListener(TaskConfig):
             gofile = GoFileUpload(self, up_path)
             async with task_dict_lock:
                 task_dict[self.mid] = GoFileStatus(self, gofile, gid, "up")
+            self._start_upload("gofile")
             await gather(
                 update_status_message(self.message.chat.id),
                 gofile.upload(),
@@ -494,6 +511,7 @@ class TaskListener(TaskConfig):
             drive = GoogleDriveUpload(self, up_path)
             async with task_dict_lock:
                 task_dict[self.mid] = GoogleDriveStatus(self, drive, gid, "up")
+            self._start_upload("gdrive")
             await gather(
                 update_status_message(self.message.chat.id),
                 sync_to_async(drive.upload),
@@ -504,12 +522,16 @@ class TaskListener(TaskConfig):
             RCTransfer = RcloneTransferHelper(self)
             async with task_dict_lock:
                 task_dict[self.mid] = RcloneStatus(self, RCTransfer, gid, "up")
+            self._start_upload("rclone")
             await gather(
                 update_status_message(self.message.chat.id),
                 RCTransfer.upload(up_path),
             )
             del RCTransfer
 
+    def _start_upload(self, service):
+        self._upload = (service, perf_counter())
+
     async def on_upload_complete(
         self,
         link,
@@ -520,6 +542,12 @@ class TaskListener(TaskConfig):
         rclone_path="",
         dir_id="",
     ):
+        TASK_EVENTS.inc(event="upload_complete")
+        if self._upload is not None:
+            service, start = self._upload
+            self._upload = None
+            UPLOAD_TIME.observe(perf_counter() - start, service=service)
+            UPLOAD_BYTES.inc(self.size, service=service)
         if (
             self.is_super_chat
             and Config.INCOMPLETE_TASK_NOTIFIER
@@ -742,6 +770,8 @@ class TaskListener(TaskConfig):
             async with queue_dict_lock:
                 if self.mid in non_queued_up:
                     non_queued_up.remove(self.mid)
+                disk_reserve.release(self.mid)
+                release_usage(self.mid)
             await start_from_queued()
             return
         await clean_download(self.dir)
@@ -757,10 +787,13 @@ class TaskListener(TaskConfig):
         async with queue_dict_lock:
             if self.mid in non_queued_up:
                 non_queued_up.remove(self.mid)
+            disk_reserve.release(self.mid)
+            release_usage(self.mid)
 
         await start_from_queued()
 
     async def on_download_error(self, error, button=None):
+        TASK_EVENTS.inc(event="download_error")
         async with task_dict_lock:
             if self.mid in task_dict:
                 del task_dict[self.mid]
@@ -792,6 +825,8 @@ class TaskListener(TaskConfig):
                 non_queued_dl.remove(self.mid)
             if self.mid in non_queued_up:
                 non_queued_up.remove(self.mid)
+            disk_reserve.release(self.mid)
+            release_usage(self.mid)
 
         await start_from_queued()
         await sleep(3)
@@ -802,6 +837,7 @@ class TaskListener(TaskConfig):
             await remove(self.thumb)
 
     async def on_upload_error(self, error):
+        TASK_EVENTS.inc(event="upload_error")
         async with task_dict_lock:
             if self.mid in task_dict:
                 del task_dict[self.mid]
@@ -831,6 +867,8 @@ class TaskListener(TaskConfig):
                 non_queued_dl.remove(self.mid)
             if self.mid in non_queued_up:
                 non_queued_up.remove(self.mid)
+            disk_reserve.release(self.mid)
+            release_usage(self.mid)
 
         await start_from_queued()
         await sleep(3)
@@ -7,7 +7,12 @@ from aiohttp.client_exceptions import ClientError
 
 from bot import LOGGER, task_dict, task_dict_lock
 from bot.core.config_manager import Config
-from bot.core.torrent_manager import TorrentManager, aria2_name, is_metadata
+from bot.core.torrent_manager import (
+    TorrentManager,
+    aria2_name,
+    aria2_state,
+    is_metadata,
+)
 from bot.helper.ext_utils.bot_utils import bt_selection_buttons
 from bot.helper.ext_utils.task_manager import check_running_tasks
 from bot.helper.mirror_leech_utils.status_utils.aria2_status import Aria2Status
@@ -54,7 +59,7 @@ async def add_aria2_download(listener, dpath, header, ratio, seed_time):
         LOGGER.info(f"Aria2c Download Error: {e}")
         await listener.on_download_error(f"{e}")
         return
-    download = await TorrentManager.aria2.tellStatus(gid)
+    download, _ = await aria2_state.fetch(gid)
     if download.get("errorMessage"):
         error = str(download["errorMessage"]).replace("<", " ").replace(">", " ")
         LOGGER.info(f"Aria2c Download Error: {error}")
@@ -7,8 +7,6 @@ from time import time
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
 from aiofiles.os import remove
-from pyrogram.filters import regex, user
-from pyrogram.handlers import CallbackQueryHandler
 
 from bot import LOGGER, jd_downloads, jd_listener_lock, task_dict, task_dict_lock
 from bot.core.jdownloader_booter import jdownloader
@@ -23,6 +21,7 @@ from bot.helper.mirror_leech_utils.status_utils.jdownloader_status import (
 )
 from bot.helper.mirror_leech_utils.status_utils.queue_status import QueueStatus
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.conversation import conversation
 from bot.helper.telegram_helper.message_utils import (
     delete_message,
     edit_message,
@@ -54,21 +53,15 @@ class JDownloaderHelper:
 
     async def _event_handler(self):
         pfunc = partial(configureDownload, obj=self)
-        handler = self.listener.client.add_handler(
-            CallbackQueryHandler(
-                pfunc,
-                filters=regex("^jdq") & user(self.listener.user_id),
-            ),
-            group=-1,
-        )
-        try:
-            await wait_for(self.event.wait(), timeout=self._timeout)
-        except Exception:
-            await edit_message(self._reply_to, "Timed Out. Task has been cancelled!")
-            self.listener.is_cancelled = True
-            self.event.set()
-        finally:
-            self.listener.client.remove_handler(*handler)
+        with conversation.callbacks(self.listener.user_id, "jdq", pfunc):
+            try:
+                await wait_for(self.event.wait(), timeout=self._timeout)
+            except Exception:
+                await edit_message(
+                    self._reply_to, "Timed Out. Task has been cancelled!"
+                )
+                self.listener.is_cancelled = True
+                self.event.set()
 
     async def wait_for_configurations(self):
         buttons = ButtonMaker()
@@ -337,7 +330,7 @@ async def add_jd_download(listener, path):
         async with task_dict_lock:
             task_dict[listener.mid] = JDownloaderStatus(listener, gid)
 
-        await on_download_start()
+        await on_download_start(gid)
 
         if add_to_queue:
             LOGGER.info(f"Start Queued Download from JDownloader: {listener.name}")
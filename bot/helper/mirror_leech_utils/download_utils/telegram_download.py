@@ -6,6 +6,7 @@ from pyrogram.errors import FloodPremiumWait, FloodWait
 
 from bot import LOGGER, task_dict, task_dict_lock
 from bot.core.aeon_client import TgClient
+from bot.helper.ext_utils.metrics import count_flood_wait
 from bot.helper.ext_utils.task_manager import (
     check_running_tasks,
     stop_duplicate_check,
@@ -13,6 +14,7 @@ from bot.helper.ext_utils.task_manager import (
 from bot.helper.mirror_leech_utils.status_utils.queue_status import QueueStatus
 from bot.helper.mirror_leech_utils.status_utils.telegram_status import TelegramStatus
 from bot.helper.telegram_helper.message_utils import send_status_message
+from bot.helper.telegram_helper.session_pool import session_pool
 
 global_lock = Lock()
 GLOBAL_GID = set()
@@ -80,6 +82,7 @@ class TelegramDownloadHelper:
                 return
         except (FloodWait, FloodPremiumWait) as f:
             LOGGER.warning(str(f))
+            count_flood_wait("download_media", f.value)
             await sleep(f.value)
             await self._download(message, path)
             return
@@ -93,7 +96,16 @@ class TelegramDownloadHelper:
             await self._on_download_error("Internal error occurred")
 
     async def add_download(self, message, path, session):
+        """Downloads the media of message. A pooled session is released once
+        the download ended.
+        """
         self.session = session
+        try:
+            await self._add_download(message, path)
+        finally:
+            session_pool.release(session)
+
+    async def _add_download(self, message, path):
         if self.session != TgClient.bot:
             message = await self.session.get_messages(
                 chat_id=message.chat.id,
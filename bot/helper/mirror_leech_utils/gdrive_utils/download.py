@@ -1,48 +1,86 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from io import FileIO
 from logging import getLogger
-from os import makedirs
+from os import O_WRONLY, close, makedirs, pwrite
+from os import open as osopen
 from os import path as ospath
+from threading import Lock, local
+from time import sleep
 
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
-from tenacity import (
-    RetryError,
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_exponential,
-)
+from tenacity import RetryError
 
 from bot.helper.ext_utils.bot_utils import SetInterval, async_to_sync
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from bot.helper.mirror_leech_utils.gdrive_utils.walker import (
+    RATE_REASONS,
+    RETRY_STATUSES,
+    DriveSession,
+    DriveWalker,
+    error_reason,
+)
 
 LOGGER = getLogger(__name__)
 
+DRIVE_API = "https://www.googleapis.com/drive/v3"
+# Threads fetching ranges at once, and the bytes of one range request. A
+# thread holds one range in memory while it writes it.
+WORKERS = 8
+SEGMENT_SIZE = 16 * 1024 * 1024
+RETRIES = 10
+QUOTA_REASONS = ["downloadQuotaExceeded", "dailyLimitExceeded"]
+GOOGLE_APPS_MIME_TYPE = "application/vnd.google-apps."
+
 
 class GoogleDriveDownload(GoogleDriveHelper):
-    def __init__(self, listener, path):
+    """
+    Downloads a Drive file or folder.
+
+    Folders are listed with DriveWalker before anything is downloaded. Every
+    file is then cut into SEGMENT_SIZE byte ranges, and WORKERS threads fetch
+    the ranges of all files in path order, written in place into files
+    created at their full size. Small files thus download side by side and a
+    large file over many parallel streams. Google Docs are exported as PDF in
+    one stream. The API URL can point to a local server for testing.
+    """
+
+    def __init__(self, listener, path, api_url=DRIVE_API):
         self.listener = listener
         self._updater = None
         self._path = path
+        self._api_url = api_url
+        self._local = local()
+        self._lock = Lock()
+        self._aborted = False
         super().__init__()
         self.is_downloading = True
 
+    async def progress(self):
+        self.total_time += self.update_interval
+
     def download(self):
         file_id = self.get_id_from_url(self.listener.link, self.listener.user_id)
         self.service = self.authorize()
         self._updater = SetInterval(self.update_interval, self.progress)
+        self.proc_bytes = 0
+        self._aborted = False
         try:
             meta = self.get_file_metadata(file_id)
             if meta.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, self._path, self.listener.name)
+                files = self._list_tree(file_id)
             else:
                 makedirs(self._path, exist_ok=True)
-                self._download_file(
-                    file_id,
-                    self._path,
-                    self.listener.name,
-                    meta.get("mimeType"),
-                )
+                files = [
+                    (
+                        self._path,
+                        self.listener.name,
+                        file_id,
+                        meta.get("mimeType"),
+                        meta.get("size"),
+                    ),
+                ]
+            self._download_files(files)
         except Exception as err:
             if isinstance(err, RetryError):
                 LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
@@ -66,112 +104,133 @@ class GoogleDriveDownload(GoogleDriveHelper):
                 async_to_sync(self.listener.on_download_complete)
         return None
 
-    def _download_folder(self, folder_id, path, folder_name):
-        folder_name = folder_name.replace("/", "")
-        if not ospath.exists(f"{path}/{folder_name}"):
-            makedirs(f"{path}/{folder_name}")
-        path += f"/{folder_name}"
-        result = self.get_files_by_folder_id(folder_id)
-        if len(result) == 0:
-            return
-        result = sorted(result, key=lambda k: k["name"])
-        for item in result:
-            file_id = item["id"]
-            filename = item["name"]
-            shortcut_details = item.get("shortcutDetails")
-            if shortcut_details is not None:
-                file_id = shortcut_details["targetId"]
-                mime_type = shortcut_details["targetMimeType"]
-            else:
-                mime_type = item.get("mimeType")
-            if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, path, filename)
-            elif not ospath.isfile(
-                f"{path}{filename}",
-            ) and not filename.strip().lower().endswith(
-                tuple(self.listener.excluded_extensions),
-            ):
-                self._download_file(file_id, path, filename, mime_type)
-            if self.listener.is_cancelled:
-                break
+    def _list_tree(self, folder_id):
+        """
+        Lists a folder tree and creates its directories.
 
-    @retry(
-        wait=wait_exponential(multiplier=2, min=3, max=6),
-        stop=stop_after_attempt(3),
-        retry=retry_if_exception_type(Exception),
-    )
-    def _download_file(self, file_id, path, filename, mime_type, export=False):
-        if export:
-            request = self.service.files().export_media(
-                fileId=file_id,
-                mimeType="application/pdf",
-            )
-        else:
-            request = self.service.files().get_media(
-                fileId=file_id,
-                supportsAllDrives=True,
-                acknowledgeAbuse=True,
-            )
+        Returns:
+            list: (directory, name, file_id, mime_type, size) of every file,
+            sorted by path.
+        """
+        files = []
+        excluded = tuple(self.listener.excluded_extensions)
+        paths = {folder_id: f"{self._path}/{self.listener.name.replace('/', '')}"}
+        makedirs(paths[folder_id], exist_ok=True)
+        for parent_id, item in DriveWalker(self, self._stopped).walk(folder_id):
+            path = paths[parent_id]
+            if item.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
+                paths[item["id"]] = f"{path}/{item['name'].replace('/', '')}"
+                makedirs(paths[item["id"]], exist_ok=True)
+            elif not item["name"].strip().lower().endswith(excluded):
+                files.append(
+                    (
+                        path,
+                        item["name"],
+                        item["id"],
+                        item.get("mimeType"),
+                        item.get("size"),
+                    )
+                )
+        files.sort()
+        return files
+
+    def _local_name(self, filename, export):
         filename = filename.replace("/", "")
         if export:
             filename = f"{filename}.pdf"
         if len(filename.encode()) > 255:
             ext = ospath.splitext(filename)[1]
             filename = f"{filename[:245]}{ext}"
-
             if self.listener.name.strip().endswith(ext):
                 self.listener.name = filename
-        if self.listener.is_cancelled:
-            return None
-        fh = FileIO(f"{path}/{filename}", "wb")
-        downloader = MediaIoBaseDownload(fh, request, chunksize=100 * 1024 * 1024)
-        done = False
+        return filename
+
+    def _download_files(self, files):
+        jobs = []
+        for path, filename, file_id, mime_type, size in files:
+            export = bool(mime_type and mime_type.startswith(GOOGLE_APPS_MIME_TYPE))
+            file_path = f"{path}/{self._local_name(filename, export)}"
+            if export or size is None:
+                jobs.append((file_id, file_path, None, None))
+                continue
+            size = int(size)
+            with open(file_path, "wb") as f:
+                f.truncate(size)
+            jobs.extend(
+                (file_id, file_path, start, min(start + SEGMENT_SIZE, size))
+                for start in range(0, size, SEGMENT_SIZE)
+            )
+        if not jobs:
+            return
+        with ThreadPoolExecutor(max_workers=min(WORKERS, len(jobs))) as pool:
+            futures = [pool.submit(self._fetch, *job) for job in jobs]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                self._aborted = True
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _session(self):
+        if (session := getattr(self._local, "session", None)) is None:
+            session = self._local.session = DriveSession(self)
+        return session
+
+    def _stopped(self):
+        return self.listener.is_cancelled or self._aborted
+
+    def _fetch(self, file_id, file_path, start, end):
+        if self._stopped():
+            return
+        session = self._session()
+        if start is None:
+            self._export(session, file_id, file_path)
+            return
         retries = 0
-        while not done:
-            if self.listener.is_cancelled:
-                fh.close()
+        while True:
+            response, content = session.http.request(
+                f"{self._api_url}/files/{file_id}?alt=media&supportsAllDrives=true&acknowledgeAbuse=true",
+                headers={"Range": f"bytes={start}-{end - 1}"},
+            )
+            if response.status in [200, 206]:
                 break
-            try:
-                self.status, done = downloader.next_chunk()
-            except HttpError as err:
+            err = HttpError(response, content)
+            reason = error_reason(err)
+            if (
+                response.status in RETRY_STATUSES or reason in RATE_REASONS
+            ) and retries < RETRIES:
+                retries += 1
+                sleep(min(2**retries, 30))
+            elif reason in QUOTA_REASONS and session.switch():
+                LOGGER.info(f"Got: {reason}, Trying Again...")
+            else:
                 LOGGER.error(err)
-                if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
-                    retries += 1
-                    continue
-                if err.resp.get("content-type", "").startswith("application/json"):
-                    reason = (
-                        eval(err.content).get("error").get("errors")[0].get("reason")
-                    )
-                    if "fileNotDownloadable" in reason and "document" in mime_type:
-                        return self._download_file(
-                            file_id,
-                            path,
-                            filename,
-                            mime_type,
-                            True,
-                        )
-                    if reason not in [
-                        "downloadQuotaExceeded",
-                        "dailyLimitExceeded",
-                    ]:
-                        raise err
-                    if self.use_sa:
-                        if self.sa_count >= self.sa_number:
-                            LOGGER.info(
-                                f"Reached maximum number of service accounts switching, which is {self.sa_count}",
-                            )
-                            raise err
-                        if self.listener.is_cancelled:
-                            return None
-                        self.switch_service_account()
-                        LOGGER.info(f"Got: {reason}, Trying Again...")
-                        return self._download_file(
-                            file_id,
-                            path,
-                            filename,
-                            mime_type,
-                        )
-                    LOGGER.error(f"Got: {reason}")
-                    raise err
-        self.file_processed_bytes = 0
-        return None
+                raise err
+            if self._stopped():
+                return
+        if response.status == 200:
+            content = content[start:end]
+        fd = osopen(file_path, O_WRONLY)
+        try:
+            pwrite(fd, content, start)
+        finally:
+            close(fd)
+        with self._lock:
+            self.proc_bytes += len(content)
+
+    def _export(self, session, file_id, file_path):
+        request = session.service.files().export_media(
+            fileId=file_id,
+            mimeType="application/pdf",
+        )
+        with FileIO(file_path, "wb") as fh:
+            downloader = MediaIoBaseDownload(fh, request, chunksize=SEGMENT_SIZE)
+            done = False
+            written = 0
+            while not done and not self._stopped():
+                _, done = downloader.next_chunk(num_retries=RETRIES)
+                with self._lock:
+                    self.proc_bytes += fh.tell() - written
+                written = fh.tell()
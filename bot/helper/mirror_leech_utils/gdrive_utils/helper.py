@@ -75,17 +75,22 @@ class GoogleDriveHelper:
             self.proc_bytes += chunk_size
             self.total_time += self.update_interval
 
-    def authorize(self):
+    def authorized_http(self, sa_index=None):
+        """
+        Returns an authorized HTTP client. Service accounts are picked at
+        random unless `sa_index` is given, which leaves self.sa_index as is.
+        """
         credentials = None
         if self.use_sa:
             json_files = listdir("accounts")
             self.sa_number = len(json_files)
-            self.sa_index = randrange(self.sa_number)
+            if sa_index is None:
+                self.sa_index = sa_index = randrange(self.sa_number)
             LOGGER.info(
-                f"Authorizing with {json_files[self.sa_index]} service account",
+                f"Authorizing with {json_files[sa_index]} service account",
             )
             credentials = service_account.Credentials.from_service_account_file(
-                f"accounts/{json_files[self.sa_index]}",
+                f"accounts/{json_files[sa_index]}",
                 scopes=self._OAUTH_SCOPE,
             )
         elif ospath.exists(self.token_path):
@@ -96,7 +101,15 @@ class GoogleDriveHelper:
             LOGGER.error("token.pickle not found!")
         authorized_http = AuthorizedHttp(credentials, http=build_http())
         authorized_http.http.disable_ssl_certificate_validation = True
-        return build("drive", "v3", http=authorized_http, cache_discovery=False)
+        return authorized_http
+
+    def authorize(self, sa_index=None):
+        return build(
+            "drive",
+            "v3",
+            http=self.authorized_http(sa_index),
+            cache_discovery=False,
+        )
 
     def switch_service_account(self):
         if self.sa_index == self.sa_number - 1:
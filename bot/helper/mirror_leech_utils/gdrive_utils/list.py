@@ -5,8 +5,6 @@ from time import time
 
 from aiofiles.os import path as aiopath
 from natsort import natsorted
-from pyrogram.filters import regex, user
-from pyrogram.handlers import CallbackQueryHandler
 from tenacity import RetryError
 
 from bot.core.config_manager import Config
@@ -18,6 +16,7 @@ from bot.helper.ext_utils.status_utils import (
 )
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.conversation import conversation
 from bot.helper.telegram_helper.message_utils import (
     delete_message,
     edit_message,
@@ -141,21 +140,13 @@ class GoogleDriveList(GoogleDriveHelper):
 
     async def _event_handler(self):
         pfunc = partial(id_updates, obj=self)
-        handler = self.listener.client.add_handler(
-            CallbackQueryHandler(
-                pfunc,
-                filters=regex("^gdq") & user(self.listener.user_id),
-            ),
-            group=-1,
-        )
-        try:
-            await wait_for(self.event.wait(), timeout=self._timeout)
-        except Exception:
-            self.id = "Timed Out. Task has been cancelled!"
-            self.listener.is_cancelled = True
-            self.event.set()
-        finally:
-            self.listener.client.remove_handler(*handler)
+        with conversation.callbacks(self.listener.user_id, "gdq", pfunc):
+            try:
+                await wait_for(self.event.wait(), timeout=self._timeout)
+            except Exception:
+                self.id = "Timed Out. Task has been cancelled!"
+                self.listener.is_cancelled = True
+                self.event.set()
 
     async def _send_list_message(self, msg, button):
         if not self.listener.is_cancelled:
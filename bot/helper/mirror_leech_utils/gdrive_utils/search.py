@@ -3,6 +3,7 @@ from logging import getLogger
 from bot import drives_ids, drives_names, index_urls, user_data
 from bot.helper.ext_utils.status_utils import get_readable_file_size
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from bot.helper.mirror_leech_utils.gdrive_utils.walker import DriveWalker
 
 LOGGER = getLogger(__name__)
 
@@ -96,8 +97,23 @@ class GoogleDriveSearch(GoogleDriveHelper):
             LOGGER.error(err)
             return {"files": []}
 
+    def _tree_query(self, dir_id, file_name):
+        """
+        Finds file_name anywhere below a folder. Drive-wide queries only work
+        for shared drives, folders are walked instead.
+        """
+        files = []
+        try:
+            for _, item in DriveWalker(self).walk(dir_id, f"name = '{file_name}'"):
+                files.append(item)
+                if len(files) == 150:
+                    break
+        except Exception as err:
+            err = str(err).replace(">", "").replace("<", "")
+            LOGGER.error(err)
+        return {"files": files}
+
     def drive_list(self, file_name, target_id="", user_id=""):
-        msg = ""
         file_name = self.escapes(str(file_name))
         contents_no = 0
         telegraph_content = []
@@ -128,17 +144,23 @@ class GoogleDriveSearch(GoogleDriveHelper):
                 if self._is_recursive and len(dir_id) > 23
                 else self._is_recursive
             )
-            response = self._drive_query(dir_id, file_name, isRecur)
+            if self._stop_dup and self._is_recursive and len(dir_id) > 23:
+                response = self._tree_query(dir_id, file_name)
+            else:
+                response = self._drive_query(dir_id, file_name, isRecur)
             if not response["files"]:
                 if self._no_multi:
                     break
                 continue
             if not Title:
-                msg += f"<h4>Search Result For {file_name}</h4>"
+                telegraph_content.append(f"<h4>Search Result For {file_name}</h4>")
                 Title = True
             if drive_name:
-                msg += f"╾────────────╼<br><b>{drive_name}</b><br>╾────────────╼<br>"
+                telegraph_content.append(
+                    f"╾────────────╼<br><b>{drive_name}</b><br>╾────────────╼<br>",
+                )
             for file in response.get("files", []):
+                msg = ""
                 mime_type = file.get("mimeType")
                 if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
                     furl = self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(file.get("id"))
@@ -166,16 +188,11 @@ class GoogleDriveSearch(GoogleDriveHelper):
                             )
                             msg += f' <b>| <a href="{urlv}">View Link</a></b>'
                 msg += "<br><br>"
+                telegraph_content.append(msg)
                 contents_no += 1
-                if len(msg.encode("utf-8")) > 39000:
-                    telegraph_content.append(msg)
-                    msg = ""
             if self._no_multi:
                 break
 
-        if msg != "":
-            telegraph_content.append(msg)
-
         return telegraph_content, contents_no
 
     def get_user_drive(self, target_id, user_id):
@@ -0,0 +1,239 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from json import loads
+from logging import getLogger
+from threading import local
+from time import sleep
+
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+LOGGER = getLogger(__name__)
+
+# Folders listed by one query. Every folder adds about 50 characters to q,
+# this keeps it well below the length Drive accepts.
+PARENTS_PER_QUERY = 40
+# Shortcut targets looked up by one batch request, Drive allows up to 100.
+BATCH_SIZE = 100
+WORKERS = 8
+RETRIES = 5
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+RATE_REASONS = ["userRateLimitExceeded", "rateLimitExceeded"]
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+ITEM_FIELDS = "id, name, mimeType, size, parents, shortcutDetails"
+
+
+def error_reason(err):
+    try:
+        return loads(err.content)["error"]["errors"][0]["reason"]
+    except Exception:
+        return ""
+
+
+class DriveSession:
+    """
+    The Drive service of one worker thread. httplib2 clients can't be shared
+    between threads, and every thread moves through the service accounts on
+    its own when its account runs out of quota.
+    """
+
+    def __init__(self, helper):
+        self._helper = helper
+        self.sa_index = helper.sa_index
+        self.switches = 0
+        self.http = None
+        self.service = None
+        self.connect()
+
+    def connect(self):
+        self.http = self._helper.authorized_http(self.sa_index)
+        self.service = build("drive", "v3", http=self.http, cache_discovery=False)
+
+    def switch(self):
+        """Moves to the next service account, False once all were tried."""
+        helper = self._helper
+        if not helper.use_sa or self.switches >= helper.sa_number - 1:
+            return False
+        self.switches += 1
+        self.sa_index = (self.sa_index + 1) % helper.sa_number
+        LOGGER.info(f"Switching to {self.sa_index} index")
+        self.connect()
+        return True
+
+
+class DriveWalker:
+    """
+    Walks the folder tree below a Drive folder.
+
+    Folders aren't listed one by one: pending folders are listed
+    PARENTS_PER_QUERY at a time with `'a' in parents or 'b' in parents`
+    queries, on WORKERS threads. A chunk is sent as soon as a thread is free,
+    so deeper levels are listed while the level above is still paging.
+    Shortcuts to folders are walked like folders, and the targets of shortcuts
+    to files are looked up in batch requests. Every folder is listed once,
+    which also ends shortcut loops.
+    """
+
+    def __init__(self, helper, stopped=None, workers=WORKERS):
+        self._helper = helper
+        self._stopped = stopped or (lambda: False)
+        self._workers = workers
+        self._local = local()
+
+    def walk(self, folder_id, query=""):
+        """
+        Yields (parent_id, item) for every file and folder below folder_id.
+        A folder is yielded before its content. Shortcuts are replaced by
+        their target under the name of the shortcut.
+
+        With a query only the items matching it are yielded, shortcuts
+        included as they are, while all folders are still walked.
+        """
+        seen = {folder_id}
+        pending = deque([folder_id])
+        shortcuts = []
+        running = set()
+        with ThreadPoolExecutor(max_workers=self._workers) as pool:
+            try:
+                while pending or shortcuts or running:
+                    if self._stopped():
+                        break
+                    while pending and len(running) < self._workers:
+                        chunk = [
+                            pending.popleft()
+                            for _ in range(min(PARENTS_PER_QUERY, len(pending)))
+                        ]
+                        running.add(pool.submit(self._list, chunk, query))
+                    if len(shortcuts) >= BATCH_SIZE or (shortcuts and not running):
+                        running.add(
+                            pool.submit(self._resolve, shortcuts[:BATCH_SIZE]),
+                        )
+                        shortcuts = shortcuts[BATCH_SIZE:]
+                    done, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for parent_id, item, matched in future.result():
+                            details = item.get("shortcutDetails")
+                            if details and not query:
+                                item = {
+                                    "id": details["targetId"],
+                                    "name": item["name"],
+                                    "mimeType": details["targetMimeType"],
+                                }
+                                if item["mimeType"] != FOLDER_MIME_TYPE:
+                                    shortcuts.append((parent_id, item))
+                                    continue
+                            if item.get("mimeType") == FOLDER_MIME_TYPE and (
+                                not query or not matched
+                            ):
+                                if item["id"] in seen:
+                                    continue
+                                seen.add(item["id"])
+                                pending.append(item["id"])
+                            if matched:
+                                yield parent_id, item
+            finally:
+                for future in running:
+                    future.cancel()
+
+    def _session(self):
+        if (session := getattr(self._local, "session", None)) is None:
+            session = self._local.session = DriveSession(self._helper)
+        return session
+
+    def _list(self, chunk, query):
+        parents = " or ".join(f"'{folder_id}' in parents" for folder_id in chunk)
+        if not query:
+            return [
+                (parent_id, item, True)
+                for parent_id, item in self._query(
+                    chunk,
+                    f"({parents}) and trashed = false",
+                )
+            ]
+        folders = self._query(
+            chunk,
+            f"({parents}) and mimeType = '{FOLDER_MIME_TYPE}' and trashed = false",
+        )
+        matches = self._query(
+            chunk, f"({parents}) and ({query}) and trashed = false"
+        )
+        return [(parent_id, item, False) for parent_id, item in folders] + [
+            (parent_id, item, True) for parent_id, item in matches
+        ]
+
+    def _query(self, chunk, q):
+        """Lists every page of a query, paired with the parents in chunk."""
+        service = self._session().service
+        chunk = set(chunk)
+        items = []
+        page_token = None
+        while not self._stopped():
+            response = (
+                service.files()
+                .list(
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                    q=q,
+                    spaces="drive",
+                    pageSize=1000,
+                    fields=f"nextPageToken, files({ITEM_FIELDS})",
+                    pageToken=page_token,
+                )
+                .execute(num_retries=RETRIES)
+            )
+            for item in response.get("files", []):
+                items.extend(
+                    (parent_id, item)
+                    for parent_id in item.get("parents", [])
+                    if parent_id in chunk
+                )
+            page_token = response.get("nextPageToken")
+            if page_token is None:
+                break
+        return items
+
+    def _resolve(self, shortcuts):
+        """Adds the size of the targets of shortcuts to files."""
+        service = self._session().service
+        sizes = {}
+        failed = {}
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                sizes[request_id] = response.get("size")
+            else:
+                failed[request_id] = exception
+
+        requests = {str(i): item["id"] for i, (_, item) in enumerate(shortcuts)}
+        for attempt in range(RETRIES + 1):
+            failed.clear()
+            batch = service.new_batch_http_request(callback=callback)
+            for request_id, file_id in requests.items():
+                batch.add(
+                    service.files().get(
+                        fileId=file_id,
+                        supportsAllDrives=True,
+                        fields="size",
+                    ),
+                    request_id=request_id,
+                )
+            batch.execute()
+            if not failed:
+                break
+            err = next(iter(failed.values()))
+            retryable = all(
+                isinstance(e, HttpError)
+                and (
+                    e.resp.status in RETRY_STATUSES
+                    or error_reason(e) in RATE_REASONS
+                )
+                for e in failed.values()
+            )
+            if not retryable or attempt == RETRIES:
+                raise err
+            requests = {request_id: requests[request_id] for request_id in failed}
+            sleep(min(2**attempt, 30))
+        return [
+            (parent_id, {**item, "size": sizes[str(i)]}, True)
+            for i, (parent_id, item) in enumerate(shortcuts)
+        ]
@@ -1,3 +1,4 @@
+import contextlib
 from asyncio import Event, gather, wait_for
 from configparser import RawConfigParser
 from functools import partial
@@ -6,10 +7,9 @@ from time import time
 
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
-from pyrogram.filters import regex, user
-from pyrogram.handlers import CallbackQueryHandler
+from cachetools import TTLCache
 
-from bot import LOGGER
+from bot import LOGGER, bot_loop
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import cmd_exec, new_task, update_user_ldata
 from bot.helper.ext_utils.db_handler import database
@@ -18,6 +18,7 @@ from bot.helper.ext_utils.status_utils import (
     get_readable_time,
 )
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.conversation import conversation
 from bot.helper.telegram_helper.message_utils import (
     delete_message,
     edit_message,
@@ -25,6 +26,74 @@ from bot.helper.telegram_helper.message_utils import (
 )
 
 LIST_LIMIT = 6
+# Seconds a folder is shown only once fully listed, after that it is shown
+# while the listing goes on and refreshed every PARTIAL_INTERVAL seconds.
+PARTIAL_WAIT = 2
+PARTIAL_INTERVAL = 5
+# Folders of the shown page listed ahead in the background.
+PREFETCH = 6
+
+
+class _Listing:
+    """
+    The files and folders of one remote folder from a single lsjson run.
+    Entries are appended as rclone streams them, so a huge folder can be
+    browsed before it is fully listed.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.error = None
+        self.done = Event()
+
+    async def fetch(self, key, priority):
+        config_path, path = key
+        cmd = [
+            "xone",
+            "lsjson",
+            "--fast-list",
+            "--no-mimetype",
+            "--no-modtime",
+            "--config",
+            config_path,
+            path,
+        ]
+
+        async def _parse(line):
+            line = line.strip().rstrip(b",")
+            if line.startswith(b"{"):
+                self.entries.append(loads(line))
+
+        try:
+            _, err, code = await cmd_exec(cmd, consumer=_parse, priority=priority)
+            if code not in [0, -9]:
+                self.error = err
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            if self.error is not None and listing_cache.get(key) is self:
+                del listing_cache[key]
+            self.done.set()
+
+
+# (config_path, remote path) -> _Listing of recently browsed folders.
+listing_cache = TTLCache(maxsize=100, ttl=300)
+
+
+def get_listing(config_path, path, priority="interactive"):
+    """Returns the cached listing of a folder, starting one if there is none."""
+    key = (config_path, path)
+    if (listing := listing_cache.get(key)) is None:
+        listing = listing_cache[key] = _Listing()
+        bot_loop.create_task(listing.fetch(key, priority))
+    return listing
+
+
+def invalidate_listing(path):
+    """Drops cached listings of `path`, of anything under it and of its parents."""
+    for key in list(listing_cache):
+        if key[1].startswith(path) or path.startswith(key[1]):
+            listing_cache.pop(key, None)
 
 
 @new_task
@@ -152,6 +221,7 @@ class RcloneList:
         self.path = ""
         self.list_status = ""
         self.path_list = []
+        self._listing = None
         self.iter_start = 0
         self.page_step = 1
         self.select = False
@@ -159,22 +229,14 @@ class RcloneList:
 
     async def _event_handler(self):
         pfunc = partial(path_updates, obj=self)
-        handler = self.listener.client.add_handler(
-            CallbackQueryHandler(
-                pfunc,
-                filters=regex("^rcq") & user(self.listener.user_id),
-            ),
-            group=-1,
-        )
-        try:
-            await wait_for(self.event.wait(), timeout=self._timeout)
-        except Exception:
-            self.path = ""
-            self.remote = "Timed Out. Task has been cancelled!"
-            self.listener.is_cancelled = True
-            self.event.set()
-        finally:
-            self.listener.client.remove_handler(*handler)
+        with conversation.callbacks(self.listener.user_id, "rcq", pfunc):
+            try:
+                await wait_for(self.event.wait(), timeout=self._timeout)
+            except Exception:
+                self.path = ""
+                self.remote = "Timed Out. Task has been cancelled!"
+                self.listener.is_cancelled = True
+                self.event.set()
 
     async def _send_list_message(self, msg, button):
         if not self.listener.is_cancelled:
@@ -261,6 +323,8 @@ class RcloneList:
             default_path = Config.RCLONE_PATH
             msg += f"\nDefault Rclone Path: {default_path}" if default_path else ""
         msg += f"\n\nItems: {items_no}"
+        if self._listing is not None and not self._listing.done.is_set():
+            msg += "+ (listing...)"
         if items_no > LIST_LIMIT:
             msg += f" | Page: {int(page)}/{pages} | Page Step: {self.page_step}"
         msg += f"\n\nItem Type: {self.item_type}\nConfig Path: {self.config_path}"
@@ -270,50 +334,83 @@ class RcloneList:
         )
         await self._send_list_message(msg, button)
 
+    def _show(self, listing, itype, sort):
+        is_dir = self.item_type == "--dirs-only"
+        path_list = [e for e in listing.entries if e["IsDir"] == is_dir]
+        if (
+            not path_list
+            and listing.done.is_set()
+            and itype != self.item_type
+            and self.list_status == "rcd"
+        ):
+            self.item_type = "--files-only" if is_dir else "--dirs-only"
+            path_list = [e for e in listing.entries if e["IsDir"] != is_dir]
+        # Buttons hold indexes into path_list. Once a partial page was shown
+        # the entries keep the order they were listed in, even after the
+        # listing completes, so those indexes stay valid.
+        if sort:
+            path_list.sort(key=lambda x: x["Path"])
+        self.path_list = path_list
+
+    def _listing_failed(self, listing):
+        LOGGER.error(
+            f"While rclone listing. Path: {self.remote}{self.path}. Stderr: {listing.error}",
+        )
+        self.remote = listing.error[:4000]
+        self.path = ""
+        self.event.set()
+
     async def get_path(self, itype=""):
         if self.list_status == "rcu":
             self.item_type = "--dirs-only"
         elif itype:
             self.item_type = itype
-        cmd = [
-            "xone",
-            "lsjson",
-            self.item_type,
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            self.config_path,
-            f"{self.remote}{self.path}",
-        ]
         if self.listener.is_cancelled:
             return
-        res, err, code = await cmd_exec(cmd)
-        if code in [0, -9]:
-            result = loads(res)
-            if (
-                len(result) == 0
-                and itype != self.item_type
-                and self.list_status == "rcd"
-            ):
-                itype = (
-                    "--dirs-only"
-                    if self.item_type == "--files-only"
-                    else "--files-only"
-                )
-                self.item_type = itype
-                await self.get_path(itype)
-            else:
-                self.path_list = sorted(result, key=lambda x: x["Path"])
-                self.iter_start = 0
-                await self.get_path_buttons()
-        else:
-            LOGGER.error(
-                f"While rclone listing. Path: {self.remote}{self.path}. Stderr: {err}",
+        listing = get_listing(self.config_path, f"{self.remote}{self.path}")
+        self._listing = listing
+        with contextlib.suppress(TimeoutError):
+            await wait_for(listing.done.wait(), timeout=PARTIAL_WAIT)
+        if self._listing is not listing:
+            return
+        if listing.error is not None:
+            self._listing_failed(listing)
+            return
+        self._show(listing, itype, listing.done.is_set())
+        self.iter_start = 0
+        await self.get_path_buttons()
+        bot_loop.create_task(self._follow(listing, itype))
+
+    async def _follow(self, listing, itype):
+        """
+        Refreshes a folder shown before it was fully listed, then lists the
+        folders of the shown page ahead while the user stays in it.
+        """
+        while not listing.done.is_set():
+            with contextlib.suppress(TimeoutError):
+                await wait_for(listing.done.wait(), timeout=PARTIAL_INTERVAL)
+            if self._listing is not listing or self.event.is_set():
+                return
+            if listing.error is not None:
+                self._listing_failed(listing)
+                return
+            self._show(listing, itype, False)
+            await self.get_path_buttons()
+        base = f"{self.remote}{self.path}/" if self.path else self.remote
+        children = [
+            e["Path"]
+            for e in self.path_list[self.iter_start : self.iter_start + LIST_LIMIT]
+            if e["IsDir"]
+        ]
+        for name in children[:PREFETCH]:
+            if self._listing is not listing or self.event.is_set():
+                return
+            child = get_listing(
+                self.config_path,
+                f"{base}{name}",
+                priority="background",
             )
-            self.remote = err[:4000]
-            self.path = ""
-            self.event.set()
+            await child.done.wait()
 
     async def list_remotes(self):
         config = RawConfigParser()
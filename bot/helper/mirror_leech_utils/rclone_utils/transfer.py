@@ -1,6 +1,4 @@
-import contextlib
-from asyncio import create_subprocess_exec, gather, sleep, wait_for
-from asyncio.subprocess import PIPE
+from asyncio import gather, sleep, wait_for
 from configparser import RawConfigParser
 from json import loads
 from logging import getLogger
@@ -10,23 +8,38 @@ from re import findall as re_findall
 from aiofiles import open as aiopen
 from aiofiles.os import listdir, makedirs
 from aiofiles.os import path as aiopath
+from cachetools import TTLCache
 
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async
 from bot.helper.ext_utils.files_utils import count_files_and_folders, get_mime_type
+from bot.helper.ext_utils.process_utils import kill_group, spawn
+from bot.helper.ext_utils.status_utils import speed_string_to_bytes
+from bot.helper.mirror_leech_utils.rclone_utils.list import invalidate_listing
 
 LOGGER = getLogger(__name__)
 
+# (config_path, path) -> (files, folders, size) of recently counted remotes.
+count_cache = TTLCache(maxsize=100, ttl=600)
+ETA_UNITS = {"w": 604800, "d": 86400, "h": 3600, "m": 60, "s": 1}
+
+
+def invalidate_count(path):
+    """Drops cached counts of `path`, of anything under it and of its parents."""
+    for key in list(count_cache):
+        if key[1].startswith(path) or path.startswith(key[1]):
+            count_cache.pop(key, None)
+
 
 class RcloneTransferHelper:
     def __init__(self, listener):
         self._listener = listener
         self._proc = None
-        self._transferred_size = "0 B"
-        self._eta = "-"
-        self._percentage = "0%"
-        self._speed = "0 B/s"
-        self._size = "0 B"
+        self._transferred_size = 0
+        self._eta = None
+        self._percentage = 0
+        self._speed = 0
+        self._size = 0
         self._is_download = False
         self._is_upload = False
         self._sa_count = 1
@@ -69,16 +82,21 @@ class RcloneTransferHelper:
                 break
             data = data.decode().strip()
             if data := re_findall(
-                r"Transferred:\s+([\d.]+\s*\w+)\s+/\s+([\d.]+\s*\w+),\s+([\d.]+%)\s*,\s+([\d.]+\s*\w+/s),\s+ETA\s+([\dwdhms]+)",
+                r"Transferred:\s+([\d.]+\s*\w+)\s+/\s+([\d.]+\s*\w+),\s+([\d.]+)%\s*,\s+([\d.]+\s*\w+/s),\s+ETA\s+([\dwdhms]+)",
                 data,
             ):
-                (
-                    self._transferred_size,
-                    self._size,
-                    self._percentage,
-                    self._speed,
-                    self._eta,
-                ) = data[0]
+                transferred, size, percentage, speed, eta = data[0]
+                self._transferred_size = speed_string_to_bytes(transferred)
+                self._size = speed_string_to_bytes(size)
+                self._percentage = float(percentage)
+                self._speed = speed_string_to_bytes(speed)
+                self._eta = (
+                    sum(
+                        int(value) * ETA_UNITS[unit]
+                        for value, unit in re_findall(r"(\d+)([wdhms])", eta)
+                    )
+                    or None
+                )
             await sleep(0.5)
 
     def _switch_service_account(self):
@@ -117,7 +135,7 @@ class RcloneTransferHelper:
         return sa_conf_file
 
     async def _start_download(self, cmd, remote_type):
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+        self._proc = await spawn(*cmd, limit=False, task=self._listener.mid)
         await self._progress()
         _, stderr = await self._proc.communicate()
         return_code = self._proc.returncode
@@ -239,7 +257,7 @@ class RcloneTransferHelper:
         return link
 
     async def _start_upload(self, cmd, remote_type):
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+        self._proc = await spawn(*cmd, limit=False, task=self._listener.mid)
         await self._progress()
         _, stderr = await self._proc.communicate()
         return_code = self._proc.returncode
@@ -316,6 +334,8 @@ class RcloneTransferHelper:
                 fremote = f"sa{self._sa_index:03}"
                 LOGGER.info(f"Upload with service account {fremote}")
 
+        invalidate_count(f"{oremote}:{rc_path}")
+        invalidate_listing(f"{oremote}:{rc_path}")
         method = "move"
         cmd = self._get_updated_command(
             fconfig_path,
@@ -414,7 +434,9 @@ class RcloneTransferHelper:
                 ),
             )
 
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+        invalidate_count(destination)
+        invalidate_listing(destination)
+        self._proc = await spawn(*cmd, limit=False, task=self._listener.mid)
         await self._progress()
         _, stderr = await self._proc.communicate()
         return_code = self._proc.returncode
@@ -466,6 +488,51 @@ class RcloneTransferHelper:
         await self._listener.on_upload_error(error[:4000])
         return None, None
 
+    async def count(self, config_path, path):
+        """
+        Counts the files, folders and bytes under a remote path from a single
+        recursive listing. The listing is parsed line by line while rclone
+        streams it, so memory stays flat however many objects there are.
+
+        Returns:
+            tuple: (files, folders, size, error), with error None on success.
+        """
+        key = (config_path, path)
+        if cached := count_cache.get(key):
+            return (*cached, None)
+        cmd = [
+            "xone",
+            "lsjson",
+            "-R",
+            "--fast-list",
+            "--no-mimetype",
+            "--no-modtime",
+            "--config",
+            config_path,
+            path,
+        ]
+        files = folders = size = 0
+        self._proc = await spawn(*cmd, task=self._listener.mid)
+
+        async def _parse():
+            nonlocal files, folders, size
+            while line := await self._proc.stdout.readline():
+                line = line.strip().rstrip(b",")
+                if not line.startswith(b"{"):
+                    continue
+                entry = loads(line)
+                if entry["IsDir"]:
+                    folders += 1
+                else:
+                    files += 1
+                    size += max(entry["Size"], 0)
+
+        _, stderr = await gather(_parse(), self._proc.stderr.read())
+        if await self._proc.wait() != 0:
+            return None, None, 0, stderr.decode().strip()
+        count_cache[key] = (files, folders, size)
+        return files, folders, size, None
+
     def _get_updated_command(
         self,
         config_path,
@@ -520,9 +587,7 @@ class RcloneTransferHelper:
 
     async def cancel_task(self):
         self._listener.is_cancelled = True
-        if self._proc is not None:
-            with contextlib.suppress(Exception):
-                self._proc.kill()
+        kill_group(self._proc)
         if self._is_download:
             LOGGER.info(f"Cancelling Download: {self._listener.name}")
             await self._listener.on_download_error("Stopped by user!")
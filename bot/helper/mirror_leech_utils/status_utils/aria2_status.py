@@ -1,24 +1,16 @@
 from time import time
 
 from bot import LOGGER
-from bot.core.torrent_manager import TorrentManager, aria2_name
+from bot.core.torrent_manager import TorrentManager, aria2_name, aria2_state
 from bot.helper.ext_utils.status_utils import (
     MirrorStatus,
+    TaskMetrics,
     get_readable_file_size,
     get_readable_time,
 )
 
 
-async def get_download(gid, old_info=None):
-    try:
-        res = await TorrentManager.aria2.tellStatus(gid)
-        return res or old_info
-    except Exception as e:
-        LOGGER.error(f"{e}: Aria2c, Error while getting torrent info")
-        return old_info
-
-
-class Aria2Status:
+class Aria2Status(TaskMetrics):
     def __init__(self, listener, gid, seeding=False, queued=False):
         self._gid = gid
         self._download = {}
@@ -27,44 +19,26 @@ class Aria2Status:
         self.start_time = 0
         self.seeding = seeding
         self.tool = "aria2"
+        aria2_state.bind(gid, self)
 
     async def update(self):
-        self._download = await get_download(self._gid, self._download)
-        if self._download.get("followedBy", []):
-            self._gid = self._download["followedBy"][0]
-            self._download = await get_download(self._gid)
-
-    def progress(self):
-        try:
-            return f"{round(int(self._download.get('completedLength', '0')) / int(self._download.get('totalLength', '0')) * 100, 2)}%"
-        except Exception:
-            return "0%"
+        self._download = await aria2_state.status(self._gid) or self._download
+        if followed_by := self._download.get("followedBy", []):
+            aria2_state.followed(self._gid, followed_by[0])
+            self._gid = followed_by[0]
+            self._download = await aria2_state.status(self._gid)
 
-    def processed_bytes(self):
-        return get_readable_file_size(
-            int(self._download.get("completedLength", "0")),
-        )
+    def processed_raw(self):
+        return int(self._download.get("completedLength", "0"))
 
-    def speed(self):
-        return f"{get_readable_file_size(int(self._download.get('downloadSpeed', '0')))}/s"
+    def speed_raw(self):
+        return int(self._download.get("downloadSpeed", "0"))
 
     def name(self):
         return aria2_name(self._download)
 
-    def size(self):
-        return get_readable_file_size(int(self._download.get("totalLength", "0")))
-
-    def eta(self):
-        try:
-            return get_readable_time(
-                (
-                    int(self._download.get("totalLength", "0"))
-                    - int(self._download.get("completedLength", "0"))
-                )
-                / int(self._download.get("downloadSpeed", "0")),
-            )
-        except Exception:
-            return "-"
+    def size_raw(self):
+        return int(self._download.get("totalLength", "0"))
 
     async def status(self):
         await self.update()
@@ -109,10 +83,12 @@ class Aria2Status:
     def gid(self):
         return self._gid
 
-    async def cancel_task(self):
-        self.listener.is_cancelled = True
-        await self.update()
-        await TorrentManager.aria2_remove(self._download)
+    @staticmethod
+    async def remove_many(tasks):
+        """Removes the downloads of cancelled tasks with a single multicall."""
+        await TorrentManager.aria2_remove_many([task._download for task in tasks])
+
+    async def on_cancel(self):
         if self._download.get("seeder", "") == "true" and self.seeding:
             LOGGER.info(f"Cancelling Seed: {self.name()}")
             await self.listener.on_upload_error(
@@ -126,3 +102,9 @@ class Aria2Status:
                 LOGGER.info(f"Cancelling Download: {self.name()}")
                 msg = "Stopped by user!"
             await self.listener.on_download_error(msg)
+
+    async def cancel_task(self):
+        self.listener.is_cancelled = True
+        await self.update()
+        await TorrentManager.aria2_remove(self._download)
+        await self.on_cancel()
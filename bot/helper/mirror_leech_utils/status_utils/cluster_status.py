@@ -0,0 +1,119 @@
+from time import monotonic
+
+from bot import LOGGER
+from bot.helper.ext_utils.db_handler import database
+from bot.helper.ext_utils.status_utils import MirrorStatus, TaskMetrics
+from bot.helper.telegram_helper.message_utils import send_message
+
+
+class RemoteListener:
+    """The parts of a task listener the status message reads, as reported by a worker."""
+
+    def __init__(self, message, user_id, name):
+        self.message = message
+        self.user_id = user_id
+        self.name = name
+        self.is_super_chat = message.chat.type.name in ["SUPERGROUP", "CHANNEL"]
+        self.is_cancelled = False
+        self.subname = ""
+        self.subsize = 0
+        self.files_to_proceed = []
+        self.proceed_count = 0
+        self.progress = True
+        self.is_torrent = False
+        self.is_qbit = False
+
+
+class ClusterStatus(TaskMetrics):
+    """
+    Shows a task of the cluster queue on the coordinator. Until a worker
+    claims it the task is shown as queued, afterwards as the worker last
+    reported it.
+    """
+
+    def __init__(self, listener, doc):
+        self.listener = listener
+        self._doc = doc
+        self._progress = {}
+        self.added = monotonic()
+        self.update(doc)
+
+    @property
+    def task_id(self):
+        return self._doc["_id"]
+
+    @property
+    def tool(self):
+        if worker := self._doc.get("worker"):
+            return f"{self._progress.get('tool', 'cluster')} @ {worker}"
+        return "cluster"
+
+    def update(self, doc):
+        self._doc = doc
+        self._progress = doc.get("progress") or {}
+        listener = self.listener
+        listener.name = self._progress.get("name") or doc["name"]
+        listener.subname = self._progress.get("subname", "")
+        listener.subsize = self._progress.get("subsize", 0)
+        listener.files_to_proceed = [None] * self._progress.get("files", 0)
+        listener.proceed_count = self._progress.get("proceed_count", 0)
+        listener.progress = self._progress.get("show_progress", True)
+        listener.is_torrent = self._progress.get("is_torrent", False)
+        listener.is_qbit = self._progress.get("is_qbit", False)
+
+    def gid(self):
+        return self._progress.get("gid") or f"cl{self._doc['message_id']}"
+
+    def name(self):
+        return self.listener.name
+
+    def status(self):
+        return self._progress.get("status", MirrorStatus.STATUS_QUEUEDL)
+
+    def _field(self, key, default):
+        return self._progress.get(key, default)
+
+    def progress_raw(self):
+        return self._field("progress_raw", 0)
+
+    def processed_raw(self):
+        return self._field("processed_raw", 0)
+
+    def size_raw(self):
+        return self._field("size_raw", 0)
+
+    def speed_raw(self):
+        return self._field("speed_raw", 0)
+
+    def eta_raw(self):
+        return self._field("eta_raw", None)
+
+    def seeders_num(self):
+        return self._field("seeders_num", 0)
+
+    def leechers_num(self):
+        return self._field("leechers_num", 0)
+
+    def seed_speed(self):
+        return self._field("seed_speed", "0B/s")
+
+    def uploaded_bytes(self):
+        return self._field("uploaded_bytes", "0B")
+
+    def ratio(self):
+        return self._field("ratio", "0")
+
+    def seeding_time(self):
+        return self._field("seeding_time", "-")
+
+    def task(self):
+        return self
+
+    async def cancel_task(self):
+        self.listener.is_cancelled = True
+        LOGGER.info(f"Cancelling cluster task: {self.listener.name}")
+        if await database.cluster_cancel(self.task_id):
+            await send_message(
+                self.listener.message,
+                "Task has been removed from the cluster queue",
+            )
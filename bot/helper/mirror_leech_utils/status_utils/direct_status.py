@@ -1,11 +1,7 @@
-from bot.helper.ext_utils.status_utils import (
-    MirrorStatus,
-    get_readable_file_size,
-    get_readable_time,
-)
+from bot.helper.ext_utils.status_utils import MirrorStatus, TaskMetrics
 
 
-class DirectStatus:
+class DirectStatus(TaskMetrics):
     def __init__(self, listener, obj, gid):
         self._gid = gid
         self._obj = obj
@@ -15,32 +11,14 @@ class DirectStatus:
     def gid(self):
         return self._gid
 
-    def progress_raw(self):
-        try:
-            return self._obj.processed_bytes / self.listener.size * 100
-        except Exception:
-            return 0
-
-    def progress(self):
-        return f"{round(self.progress_raw(), 2)}%"
-
-    def speed(self):
-        return f"{get_readable_file_size(self._obj.speed)}/s"
+    def speed_raw(self):
+        return self._obj.speed
 
     def name(self):
         return self.listener.name
 
-    def size(self):
-        return get_readable_file_size(self.listener.size)
-
-    def eta(self):
-        try:
-            seconds = (
-                self.listener.size - self._obj.processed_bytes
-            ) / self._obj.speed
-            return get_readable_time(seconds)
-        except Exception:
-            return "-"
+    def size_raw(self):
+        return self.listener.size
 
     def status(self):
         if (
@@ -50,8 +28,8 @@ class DirectStatus:
             return MirrorStatus.STATUS_QUEUEDL
         return MirrorStatus.STATUS_DOWNLOAD
 
-    def processed_bytes(self):
-        return get_readable_file_size(self._obj.processed_bytes)
+    def processed_raw(self):
+        return self._obj.processed_bytes
 
     def task(self):
         return self._obj
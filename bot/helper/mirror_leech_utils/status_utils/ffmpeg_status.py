@@ -1,14 +1,9 @@
-import contextlib
-
 from bot import LOGGER
-from bot.helper.ext_utils.status_utils import (
-    MirrorStatus,
-    get_readable_file_size,
-    get_readable_time,
-)
+from bot.helper.ext_utils.process_utils import kill_group
+from bot.helper.ext_utils.status_utils import MirrorStatus, TaskMetrics
 
 
-class FFmpegStatus:
+class FFmpegStatus(TaskMetrics):
     def __init__(self, listener, obj, gid, status=""):
         self.listener = listener
         self._obj = obj
@@ -16,14 +11,14 @@ class FFmpegStatus:
         self._cstatus = status
         self.tool = "ffmpeg"
 
-    def speed(self):
-        return f"{get_readable_file_size(self._obj.speed_raw)}/s"
+    def speed_raw(self):
+        return self._obj.speed_raw
 
-    def processed_bytes(self):
-        return get_readable_file_size(self._obj.processed_bytes)
+    def processed_raw(self):
+        return self._obj.processed_bytes
 
-    def progress(self):
-        return f"{round(self._obj.progress_raw, 2)}%"
+    def progress_raw(self):
+        return self._obj.progress_raw
 
     def gid(self):
         return self._gid
@@ -31,11 +26,11 @@ class FFmpegStatus:
     def name(self):
         return self.listener.name
 
-    def size(self):
-        return get_readable_file_size(self.listener.size)
+    def size_raw(self):
+        return self.listener.size
 
-    def eta(self):
-        return get_readable_time(self._obj.eta_raw) if self._obj.eta_raw else "-"
+    def eta_raw(self):
+        return self._obj.eta_raw or None
 
     def status(self):
         if self._cstatus == "Convert":
@@ -58,10 +53,5 @@ class FFmpegStatus:
     async def cancel_task(self):
         LOGGER.info(f"Cancelling {self._cstatus}: {self.listener.name}")
         self.listener.is_cancelled = True
-        if (
-            self.listener.subproc is not None
-            and self.listener.subproc.returncode is None
-        ):
-            with contextlib.suppress(Exception):
-                self.listener.subproc.kill()
+        kill_group(self.listener.subproc)
         await self.listener.on_upload_error(f"{self._cstatus} stopped by user!")
@@ -1,11 +1,7 @@
-from bot.helper.ext_utils.status_utils import (
-    MirrorStatus,
-    get_readable_file_size,
-    get_readable_time,
-)
+from bot.helper.ext_utils.status_utils import MirrorStatus, TaskMetrics
 
 
-class GoogleDriveStatus:
+class GoogleDriveStatus(TaskMetrics):
     def __init__(self, listener, obj, gid, status):
         self.listener = listener
         self._obj = obj
@@ -14,11 +10,11 @@ class GoogleDriveStatus:
         self._status = status
         self.tool = "gdriveAPI"
 
-    def processed_bytes(self):
-        return get_readable_file_size(self._obj.processed_bytes)
+    def processed_raw(self):
+        return self._obj.processed_bytes
 
-    def size(self):
-        return get_readable_file_size(self._size)
+    def size_raw(self):
+        return self._size
 
     def status(self):
         if self._status == "up":
@@ -33,24 +29,8 @@ class GoogleDriveStatus:
     def gid(self) -> str:
         return self._gid
 
-    def progress_raw(self):
-        try:
-            return self._obj.processed_bytes / self._size * 100
-        except Exception:
-            return 0
-
-    def progress(self):
-        return f"{round(self.progress_raw(), 2)}%"
-
-    def speed(self):
-        return f"{get_readable_file_size(self._obj.speed)}/s"
-
-    def eta(self):
-        try:
-            seconds = (self._size - self._obj.processed_bytes) / self._obj.speed
-            return get_readable_time(seconds)
-        except Exception:
-            return "-"
+    def speed_raw(self):
+        return self._obj.speed
 
     def task(self):
         return self._obj
@@ -2,11 +2,8 @@ from time import time
 
 from bot import LOGGER, jd_downloads, jd_listener_lock
 from bot.core.jdownloader_booter import jdownloader
-from bot.helper.ext_utils.status_utils import (
-    MirrorStatus,
-    get_readable_file_size,
-    get_readable_time,
-)
+from bot.helper.ext_utils.poll_utils import SharedQuery
+from bot.helper.ext_utils.status_utils import MirrorStatus, TaskMetrics
 
 
 def _get_combined_info(result, old_info):
@@ -44,30 +41,46 @@ def _get_combined_info(result, old_info):
     }
 
 
+async def _fetch_packages():
+    packages = await jdownloader.device.downloads.query_packages(
+        [
+            {
+                "bytesLoaded": True,
+                "bytesTotal": True,
+                "enabled": True,
+                "maxResults": -1,
+                "running": True,
+                "speed": True,
+                "eta": True,
+                "status": True,
+                "hosts": True,
+                "finished": True,
+                "saveTo": True,
+            },
+        ],
+    )
+    return {pack["uuid"]: pack for pack in packages}
+
+
+# Every package of JDownloader, shared by the listener and all status updates.
+jd_packages = SharedQuery(_fetch_packages)
+
+
+def get_info(gid, packages, old_info):
+    result = [packages[pid] for pid in jd_downloads[gid]["ids"] if pid in packages]
+    if not result:
+        return old_info
+    return _get_combined_info(result, old_info) if len(result) > 1 else result[0]
+
+
 async def get_download(gid, old_info):
     try:
-        result = await jdownloader.device.downloads.query_packages(
-            [
-                {
-                    "bytesLoaded": True,
-                    "bytesTotal": True,
-                    "enabled": True,
-                    "packageUUIDs": jd_downloads[gid]["ids"],
-                    "maxResults": -1,
-                    "running": True,
-                    "speed": True,
-                    "eta": True,
-                    "status": True,
-                    "hosts": True,
-                },
-            ],
-        )
-        return _get_combined_info(result, old_info) if len(result) > 1 else result[0]
+        return get_info(gid, await jd_packages.get(), old_info)
     except Exception:
         return old_info
 
 
-class JDownloaderStatus:
+class JDownloaderStatus(TaskMetrics):
     def __init__(self, listener, gid):
         self.listener = listener
         self._gid = gid
@@ -77,17 +90,11 @@ class JDownloaderStatus:
     async def _update(self):
         self._info = await get_download(self._gid, self._info)
 
-    def progress(self):
-        try:
-            return f"{round((self._info.get('bytesLoaded', 0) / self._info.get('bytesTotal', 0)) * 100, 2)}%"
-        except Exception:
-            return "0%"
+    def processed_raw(self):
+        return self._info.get("bytesLoaded", 0)
 
-    def processed_bytes(self):
-        return get_readable_file_size(self._info.get("bytesLoaded", 0))
-
-    def speed(self):
-        return f"{get_readable_file_size(self._info.get('speed', 0))}/s"
+    def speed_raw(self):
+        return self._info.get("speed", 0)
 
     def name(self):
         return (
@@ -96,13 +103,11 @@ class JDownloaderStatus:
             else self.listener.name
         )
 
-    def size(self):
-        return get_readable_file_size(self._info.get("bytesTotal", 0))
+    def size_raw(self):
+        return self._info.get("bytesTotal", 0)
 
-    def eta(self):
-        return (
-            get_readable_time(eta) if (eta := self._info.get("eta", False)) else "-"
-        )
+    def eta_raw(self):
+        return self._info.get("eta")
 
     async def status(self):
         await self._update()
@@ -119,12 +124,23 @@ class JDownloaderStatus:
     def gid(self):
         return self._gid
 
-    async def cancel_task(self):
-        self.listener.is_cancelled = True
-        LOGGER.info(f"Cancelling Download: {self.name()}")
-        await jdownloader.device.downloads.remove_links(
-            package_ids=jd_downloads[self._gid]["ids"],
-        )
+    @staticmethod
+    async def remove_many(tasks):
+        """Removes the packages of all cancelled tasks with a single call."""
         async with jd_listener_lock:
-            del jd_downloads[self._gid]
+            package_ids = [
+                package_id
+                for task in tasks
+                for package_id in jd_downloads.pop(task._gid, {}).get("ids", [])
+            ]
+        if package_ids:
+            await jdownloader.device.downloads.remove_links(package_ids=package_ids)
+
+    async def on_cancel(self):
+        LOGGER.info(f"Cancelling Download: {self.name()}")
         await self.listener.on_download_error("Cancelled by user!")
+
+    async def cancel_task(self):
+        self.listener.is_cancelled = True
+        await self.remove_many([self])
+        await self.on_cancel()
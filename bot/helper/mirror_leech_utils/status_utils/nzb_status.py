@@ -1,57 +1,186 @@
 from asyncio import gather
+from re import compile as re_compile
+from time import monotonic
 
 from bot import LOGGER, nzb_jobs, nzb_listener_lock, sabnzbd_client
+from bot.helper.ext_utils.poll_utils import SharedQuery
 from bot.helper.ext_utils.status_utils import (
     MirrorStatus,
-    get_readable_file_size,
-    get_readable_time,
+    TaskMetrics,
     time_to_seconds,
 )
 
+# Phases of a job, in the order a job moves through them.
+PHASE_DOWNLOAD = 0
+PHASE_POSTPROC = 1
+PHASE_COMPLETED = 2
+PHASE_FAILED = 3
+POSTPROC_STATES = [
+    "QuickCheck",
+    "Verifying",
+    "Repairing",
+    "Fetching",
+    "Moving",
+    "Extracting",
+]
+# "Verifying: 01/20", "Unpacking: 02/05 ...", "Repairing: 45% ..." and an ETA
+# like "0:02:31" anywhere in the action line.
+_FRACTION = re_compile(r"(\d+(?:\.\d+)?)/(\d+(?:\.\d+)?)")
+_PERCENT = re_compile(r"(\d+(?:\.\d+)?)%")
+_ETA = re_compile(r"\b(\d+:\d{2}(?::\d{2})?)\b")
 
-async def get_download(nzo_id, old_info=None):
+
+def _number(value):
     try:
-        queue = await sabnzbd_client.get_downloads(nzo_ids=nzo_id)
-        if res := queue["queue"]["slots"]:
-            slot = res[0]
-            if msg := slot["labels"]:
-                LOGGER.warning(" | ".join(msg))
-            return slot
-        history = await sabnzbd_client.get_history(nzo_ids=nzo_id)
-        if res := history["history"]["slots"]:
-            slot = res[0]
-            if slot["status"] == "Verifying":
-                percentage = slot["action_line"].split("Verifying: ")[-1].split("/")
-                percentage = round(
-                    (int(float(percentage[0])) / int(float(percentage[1]))) * 100, 2
-                )
-                old_info["percentage"] = percentage
-            elif slot["status"] == "Repairing":
-                action = slot["action_line"].split("Repairing: ")[-1].split()
-                percentage = action[0].strip("%")
-                eta = action[2]
-                old_info["percentage"] = percentage
-                old_info["timeleft"] = eta
-            elif slot["status"] == "Extracting":
-                if "Unpacking" in slot["action_line"]:
-                    action = slot["action_line"].split("Unpacking: ")[-1].split()
-                else:
-                    action = slot["action_line"].split("Direct Unpack: ")[-1].split()
-                percentage = action[0].split("/")
-                percentage = round(
-                    (int(float(percentage[0])) / int(float(percentage[1]))) * 100, 2
-                )
-                eta = action[2]
-                old_info["percentage"] = percentage
-                old_info["timeleft"] = eta
-            old_info["status"] = slot["status"]
-        return old_info
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class SabnzbdJob:
+    """
+    A SABnzbd job with its fields parsed once per poll. A job moves from the
+    queue to post-processing in the history and ends completed or failed,
+    and never back. Speed comes from the bytes downloaded between two polls.
+    """
+
+    __slots__ = (
+        "_done",
+        "_sampled",
+        "eta",
+        "fail_message",
+        "labels",
+        "left",
+        "name",
+        "nzo_id",
+        "percentage",
+        "phase",
+        "size",
+        "speed",
+        "state",
+    )
+
+    def __init__(self, nzo_id):
+        self.nzo_id = nzo_id
+        self.name = ""
+        self.state = "Queued"
+        self.phase = PHASE_DOWNLOAD
+        self.size = 0
+        self.left = 0
+        self.percentage = 0.0
+        self.speed = 0.0
+        self.eta = 0
+        self.labels = []
+        self.fail_message = ""
+        self._done = 0
+        self._sampled = 0
+
+    @property
+    def processed(self):
+        return self.size - self.left
+
+    def update_queue(self, slot):
+        if self.phase != PHASE_DOWNLOAD:
+            return
+        self.name = slot["filename"]
+        self.state = slot["status"]
+        self.labels = slot["labels"]
+        self.size = int(_number(slot["mb"]) * 1048576)
+        self.left = int(_number(slot["mbleft"]) * 1048576)
+        self.percentage = _number(slot["percentage"])
+        self.eta = int(time_to_seconds(slot["timeleft"]))
+        now = monotonic()
+        if self.state != "Downloading":
+            self.speed = 0.0
+        elif self._sampled and now > self._sampled and self.processed >= self._done:
+            self.speed = (self.processed - self._done) / (now - self._sampled)
+        self._done, self._sampled = self.processed, now
+
+    def update_history(self, slot):
+        if self.phase in [PHASE_COMPLETED, PHASE_FAILED]:
+            return
+        self.name = slot["name"] or self.name
+        self.state = slot["status"]
+        self.speed = 0.0
+        self.labels = []
+        if self.state == "Completed":
+            self.phase = PHASE_COMPLETED
+        elif self.state == "Failed":
+            self.phase = PHASE_FAILED
+            self.fail_message = slot["fail_message"]
+        else:
+            self.phase = PHASE_POSTPROC
+        if size := int(_number(slot["bytes"])):
+            self.size = size
+        self.left = 0
+        if self.phase != PHASE_POSTPROC:
+            self.percentage = 100.0
+            self.eta = 0
+            return
+        action = slot["action_line"] or ""
+        if match := _FRACTION.search(action):
+            done, total = map(float, match.groups())
+            self.percentage = round(done / total * 100, 2) if total else 0.0
+        elif match := _PERCENT.search(action):
+            self.percentage = float(match[1])
+        self.eta = (
+            int(time_to_seconds(match[1])) if (match := _ETA.search(action)) else 0
+        )
+
+
+# Jobs by nzo_id, updated by every poll and read by the listener and the
+# status of their task.
+sab_models = {}
+
+
+def get_job(nzo_id):
+    if (job := sab_models.get(nzo_id)) is None:
+        job = sab_models[nzo_id] = SabnzbdJob(nzo_id)
+    return job
+
+
+async def _fetch_jobs():
+    if not (nzo_ids := list(nzb_jobs)):
+        return {}, {}
+    queue, history = await gather(
+        sabnzbd_client.get_downloads(nzo_ids=nzo_ids),
+        sabnzbd_client.get_history(nzo_ids=nzo_ids),
+    )
+    downloads = {}
+    for slot in queue["queue"]["slots"]:
+        (job := get_job(slot["nzo_id"])).update_queue(slot)
+        downloads[job.nzo_id] = job
+    jobs = {}
+    for slot in history["history"]["slots"]:
+        (job := get_job(slot["nzo_id"])).update_history(slot)
+        jobs[job.nzo_id] = job
+    return downloads, jobs
+
+
+# The queued and history jobs of the bot, shared by the listener and all
+# status updates.
+sab_jobs = SharedQuery(_fetch_jobs)
+
+
+async def get_download(nzo_id):
+    job = get_job(nzo_id)
+    try:
+        queue, history = await sab_jobs.get()
+        if nzo_id in queue or nzo_id in history:
+            return job
+        res = await sabnzbd_client.get_downloads(nzo_ids=nzo_id)
+        if slots := res["queue"]["slots"]:
+            job.update_queue(slots[0])
+        else:
+            res = await sabnzbd_client.get_history(nzo_ids=nzo_id)
+            if slots := res["history"]["slots"]:
+                job.update_history(slots[0])
     except Exception as e:
         LOGGER.error(f"{e}: Sabnzbd, while getting job info. ID: {nzo_id}")
-        return old_info
+    return job
 
 
-class SabnzbdStatus:
+class SabnzbdStatus(TaskMetrics):
     def __init__(self, listener, gid, queued=False):
         self.queued = queued
         self.listener = listener
@@ -60,56 +189,37 @@ class SabnzbdStatus:
         self.tool = "sabnzbd"
 
     async def update(self):
-        self._info = await get_download(self._gid, self._info)
+        self._info = await get_download(self._gid)
+        if self._info.labels:
+            LOGGER.warning(" | ".join(self._info.labels))
 
-    def progress(self):
-        return f"{self._info['percentage']}%"
+    def progress_raw(self):
+        return self._info.percentage
 
     def processed_raw(self):
-        return (float(self._info["mb"]) - float(self._info["mbleft"])) * 1048576
-
-    def processed_bytes(self):
-        return get_readable_file_size(self.processed_raw())
+        return self._info.processed
 
     def speed_raw(self):
-        if self._info["mb"] == self._info["mbleft"]:
-            return 0
-        try:
-            return int(float(self._info["mbleft"]) * 1048576) / self.eta_raw()
-        except Exception:
-            return 0
-
-    def speed(self):
-        return f"{get_readable_file_size(self.speed_raw())}/s"
+        return self._info.speed
 
     def name(self):
-        return self._info["filename"]
+        return self._info.name
 
-    def size(self):
-        return self._info["size"]
+    def size_raw(self):
+        return self._info.size
 
     def eta_raw(self):
-        return int(time_to_seconds(self._info["timeleft"]))
-
-    def eta(self):
-        return get_readable_time(self.eta_raw())
+        return self._info.eta
 
     async def status(self):
         await self.update()
-        if self._info["mb"] == self._info["mbleft"]:
+        job = self._info
+        if job.phase == PHASE_DOWNLOAD and job.processed == 0:
             return MirrorStatus.STATUS_QUEUEDL
-        state = self._info["status"]
-        if state == "Paused" and self.queued:
+        if job.state == "Paused" and self.queued:
             return MirrorStatus.STATUS_QUEUEDL
-        if state in [
-            "QuickCheck",
-            "Verifying",
-            "Repairing",
-            "Fetching",
-            "Moving",
-            "Extracting",
-        ]:
-            return state
+        if job.state in POSTPROC_STATES:
+            return job.state
         return MirrorStatus.STATUS_DOWNLOAD
 
     def task(self):
@@ -118,16 +228,30 @@ class SabnzbdStatus:
     def gid(self):
         return self._gid
 
-    async def cancel_task(self):
-        self.listener.is_cancelled = True
-        await self.update()
-        LOGGER.info(f"Cancelling Download: {self.name()}")
+    @staticmethod
+    async def remove_many(tasks):
+        """Deletes the jobs of cancelled tasks from the queue and history in
+        bulk. Categories have no bulk endpoint and are removed concurrently.
+        """
+        gids = [task._gid for task in tasks]
         await gather(
-            self.listener.on_download_error("Stopped by user!"),
-            sabnzbd_client.delete_job(self._gid, delete_files=True),
-            sabnzbd_client.delete_category(f"{self.listener.mid}"),
-            sabnzbd_client.delete_history(self._gid, delete_files=True),
+            sabnzbd_client.delete_job(gids, delete_files=True),
+            sabnzbd_client.delete_history(gids, delete_files=True),
+            *(
+                sabnzbd_client.delete_category(f"{task.listener.mid}")
+                for task in tasks
+            ),
         )
         async with nzb_listener_lock:
-            if self._gid in nzb_jobs:
-                del nzb_jobs[self._gid]
+            for gid in gids:
+                nzb_jobs.pop(gid, None)
+                sab_models.pop(gid, None)
+
+    async def on_cancel(self):
+        LOGGER.info(f"Cancelling Download: {self.name()}")
+        await self.listener.on_download_error("Stopped by user!")
+
+    async def cancel_task(self):
+        self.listener.is_cancelled = True
+        await self.update()
+        await gather(self.remove_many([self]), self.on_cancel())
@@ -1,9 +1,10 @@
 from asyncio import gather, sleep
 
-from bot import LOGGER, qb_listener_lock, qb_torrents
-from bot.core.torrent_manager import TorrentManager
+from bot import LOGGER, intervals, qb_listener_lock, qb_torrents
+from bot.core.torrent_manager import TorrentManager, qbit_state
 from bot.helper.ext_utils.status_utils import (
     MirrorStatus,
+    TaskMetrics,
     get_readable_file_size,
     get_readable_time,
 )
@@ -18,7 +19,7 @@ async def get_download(tag, old_info=None):
         return old_info
 
 
-class QbittorrentStatus:
+class QbittorrentStatus(TaskMetrics):
     def __init__(self, listener, seeding=False, queued=False):
         self.queued = queued
         self.seeding = seeding
@@ -27,27 +28,32 @@ class QbittorrentStatus:
         self.tool = "qbittorrent"
 
     async def update(self):
-        self._info = await get_download(f"{self.listener.mid}", self._info)
+        # The listener keeps qbit_state current while it runs, the torrent
+        # is only requested when the table doesn't know it yet.
+        if intervals["qb"] and (info := qbit_state.by_tag(f"{self.listener.mid}")):
+            self._info = info
+        else:
+            self._info = await get_download(f"{self.listener.mid}", self._info)
 
-    def progress(self):
-        return f"{round(self._info.progress * 100, 2)}%"
+    def progress_raw(self):
+        return self._info.progress * 100
 
-    def processed_bytes(self):
-        return get_readable_file_size(self._info.downloaded)
+    def processed_raw(self):
+        return self._info.downloaded
 
-    def speed(self):
-        return f"{get_readable_file_size(self._info.dlspeed)}/s"
+    def speed_raw(self):
+        return self._info.dlspeed
 
     def name(self):
         if self._info.state in ["metaDL", "checkingResumeData"]:
             return f"[METADATA]{self.listener.name}"
         return self.listener.name
 
-    def size(self):
-        return get_readable_file_size(self._info.size)
+    def size_raw(self):
+        return self._info.size
 
-    def eta(self):
-        return get_readable_time(self._info.eta.total_seconds())
+    def eta_raw(self):
+        return self._info.eta.total_seconds()
 
     async def status(self):
         await self.update()
@@ -91,25 +97,42 @@ class QbittorrentStatus:
     def hash(self):
         return self._info.hash
 
+    @staticmethod
+    async def remove_many(tasks):
+        """Stops the torrents of cancelled tasks and deletes the ones that are
+        not seeding, with one request per action for all of them.
+        """
+        await TorrentManager.qbittorrent.torrents.stop(
+            [task._info.hash for task in tasks],
+        )
+        if not (removed := [task for task in tasks if not task.seeding]):
+            return
+        tags = [task._info.tags[0] for task in removed]
+        await sleep(0.3)
+        await gather(
+            TorrentManager.qbittorrent.torrents.delete(
+                [task._info.hash for task in removed],
+                True,
+            ),
+            TorrentManager.qbittorrent.torrents.delete_tags(tags=tags),
+        )
+        async with qb_listener_lock:
+            for tag in tags:
+                qb_torrents.pop(tag, None)
+
+    async def on_cancel(self):
+        if self.seeding:
+            return
+        if self.queued:
+            LOGGER.info(f"Cancelling QueueDL: {self.name()}")
+            msg = "task have been removed from queue/download"
+        else:
+            LOGGER.info(f"Cancelling Download: {self._info.name}")
+            msg = "Stopped by user!"
+        await self.listener.on_download_error(msg)
+
     async def cancel_task(self):
         self.listener.is_cancelled = True
         await self.update()
-        await TorrentManager.qbittorrent.torrents.stop([self._info.hash])
-        if not self.seeding:
-            if self.queued:
-                LOGGER.info(f"Cancelling QueueDL: {self.name()}")
-                msg = "task have been removed from queue/download"
-            else:
-                LOGGER.info(f"Cancelling Download: {self._info.name}")
-                msg = "Stopped by user!"
-            await sleep(0.3)
-            await gather(
-                self.listener.on_download_error(msg),
-                TorrentManager.qbittorrent.torrents.delete([self._info.hash], True),
-                TorrentManager.qbittorrent.torrents.delete_tags(
-                    tags=[self._info.tags[0]],
-                ),
-            )
-            async with qb_listener_lock:
-                if self._info.tags[0] in qb_torrents:
-                    del qb_torrents[self._info.tags[0]]
+        await self.remove_many([self])
+        await self.on_cancel()
@@ -1,8 +1,8 @@
 from bot import LOGGER
-from bot.helper.ext_utils.status_utils import MirrorStatus, get_readable_file_size
+from bot.helper.ext_utils.status_utils import MirrorStatus, TaskMetrics
 
 
-class QueueStatus:
+class QueueStatus(TaskMetrics):
     def __init__(self, listener, gid, status):
         self.listener = listener
         self._size = self.listener.size
@@ -16,26 +16,14 @@ class QueueStatus:
     def name(self):
         return self.listener.name
 
-    def size(self):
-        return get_readable_file_size(self._size)
+    def size_raw(self):
+        return self._size
 
     def status(self):
         if self._status == "dl":
             return MirrorStatus.STATUS_QUEUEDL
         return MirrorStatus.STATUS_QUEUEUP
 
-    def processed_bytes(self):
-        return 0
-
-    def progress(self):
-        return "0%"
-
-    def speed(self):
-        return "0B/s"
-
-    def eta(self):
-        return "-"
-
     def task(self):
         return self
 
@@ -1,7 +1,7 @@
-from bot.helper.ext_utils.status_utils import MirrorStatus
+from bot.helper.ext_utils.status_utils import MirrorStatus, TaskMetrics
 
 
-class RcloneStatus:
+class RcloneStatus(TaskMetrics):
     def __init__(self, listener, obj, gid, status):
         self._obj = obj
         self._gid = gid
@@ -12,19 +12,19 @@ class RcloneStatus:
     def gid(self):
         return self._gid
 
-    def progress(self):
+    def progress_raw(self):
         return self._obj.percentage
 
-    def speed(self):
+    def speed_raw(self):
         return self._obj.speed
 
     def name(self):
         return self.listener.name
 
-    def size(self):
+    def size_raw(self):
         return self._obj.size
 
-    def eta(self):
+    def eta_raw(self):
         return self._obj.eta
 
     def status(self):
@@ -34,7 +34,7 @@ class RcloneStatus:
             return MirrorStatus.STATUS_UPLOAD
         return MirrorStatus.STATUS_CLONE
 
-    def processed_bytes(self):
+    def processed_raw(self):
         return self._obj.transferred_size
 
     def task(self):
@@ -1,15 +1,11 @@
-import contextlib
 from time import time
 
 from bot import LOGGER
-from bot.helper.ext_utils.status_utils import (
-    MirrorStatus,
-    get_readable_file_size,
-    get_readable_time,
-)
+from bot.helper.ext_utils.process_utils import kill_group
+from bot.helper.ext_utils.status_utils import MirrorStatus, TaskMetrics
 
 
-class SevenZStatus:
+class SevenZStatus(TaskMetrics):
     def __init__(self, listener, obj, gid, status=""):
         self.listener = listener
         self._obj = obj
@@ -21,32 +17,25 @@ class SevenZStatus:
     def gid(self):
         return self._gid
 
-    def _speed_raw(self):
+    def speed_raw(self):
         return self._obj.processed_bytes / (time() - self._start_time)
 
-    def progress(self):
-        return self._obj.progress
+    def progress_raw(self):
+        return float(self._obj.progress.strip("%") or 0)
 
-    def speed(self):
-        return f"{get_readable_file_size(self._speed_raw())}/s"
-
-    def processed_bytes(self):
-        return get_readable_file_size(self._obj.processed_bytes)
+    def processed_raw(self):
+        return self._obj.processed_bytes
 
     def name(self):
         return self.listener.name
 
-    def size(self):
-        return get_readable_file_size(self.listener.size)
+    def size_raw(self):
+        return self.listener.size
 
-    def eta(self):
-        try:
-            seconds = (
-                self.listener.subsize - self._obj.processed_bytes
-            ) / self._speed_raw()
-            return get_readable_time(seconds)
-        except Exception:
-            return "-"
+    def eta_raw(self):
+        if speed := self.speed_raw():
+            return max(self.listener.subsize - self._obj.processed_bytes, 0) / speed
+        return None
 
     def status(self):
         if self._cstatus == "Extract":
@@ -59,10 +48,5 @@ class SevenZStatus:
     async def cancel_task(self):
         LOGGER.info(f"Cancelling {self._cstatus}: {self.listener.name}")
         self.listener.is_cancelled = True
-        if (
-            self.listener.subproc is not None
-            and self.listener.subproc.returncode is None
-        ):
-            with contextlib.suppress(Exception):
-                self.listener.subproc.kill()
+        kill_group(self.listener.subproc)
         await self.listener.on_upload_error(f"{self._cstatus} stopped by user!")
@@ -1,11 +1,7 @@
-from bot.helper.ext_utils.status_utils import (
-    MirrorStatus,
-    get_readable_file_size,
-    get_readable_time,
-)
+from bot.helper.ext_utils.status_utils import MirrorStatus, TaskMetrics
 
 
-class YtDlpStatus:
+class YtDlpStatus(TaskMetrics):
     def __init__(self, listener, obj, gid):
         self._obj = obj
         self._gid = gid
@@ -15,11 +11,11 @@ class YtDlpStatus:
     def gid(self):
         return self._gid
 
-    def processed_bytes(self):
-        return get_readable_file_size(self._obj.downloaded_bytes)
+    def processed_raw(self):
+        return self._obj.downloaded_bytes
 
-    def size(self):
-        return get_readable_file_size(self._obj.size)
+    def size_raw(self):
+        return self._obj.size
 
     def status(self):
         return MirrorStatus.STATUS_DOWNLOAD
@@ -27,22 +23,16 @@ class YtDlpStatus:
     def name(self):
         return self.listener.name
 
-    def progress(self):
-        return f"{round(self._obj.progress, 2)}%"
+    def progress_raw(self):
+        return self._obj.progress
 
-    def speed(self):
-        return f"{get_readable_file_size(self._obj.download_speed)}/s"
+    def speed_raw(self):
+        return self._obj.download_speed
 
-    def eta(self):
+    def eta_raw(self):
         if self._obj.eta != "-":
-            return get_readable_time(self._obj.eta)
-        try:
-            seconds = (
-                self._obj.size - self._obj.downloaded_bytes
-            ) / self._obj.download_speed
-            return get_readable_time(seconds)
-        except Exception:
-            return "-"
+            return self._obj.eta
+        return super().eta_raw()
 
     def task(self):
         return self._obj
@@ -45,7 +45,9 @@ from bot.helper.ext_utils.media_utils import (
     get_media_info,
     get_multiple_frames_thumbnail,
     get_video_thumbnail,
+    pop_extracted_frame,
 )
+from bot.helper.ext_utils.metrics import count_flood_wait
 from bot.helper.telegram_helper.message_utils import delete_message
 
 LOGGER = getLogger(__name__)
@@ -135,7 +137,7 @@ class TelegramUploader:
         elif self._user_session:
             self._sent_msg = await TgClient.user.get_messages(
                 chat_id=self._listener.message.chat.id,
-                message_ids=self._listener.mid,
+                message_ids=self._listener.message.id,
             )
             if self._sent_msg is None:
                 self._sent_msg = await TgClient.user.send_message(
@@ -204,7 +206,7 @@ class TelegramUploader:
 
                 imdb_info = None
                 if probable_title:
-                    imdb_info = get_poster(probable_title)
+                    imdb_info = await get_poster(probable_title)
                 if imdb_info:
                     imdb_data = {
                         "title": imdb_info.get("title", ""),
@@ -770,8 +772,10 @@ class TelegramUploader:
                 and await aiopath.exists(thumb)
             ):
                 await remove(thumb)
+            await pop_extracted_frame(self._up_path, None)
         except (FloodWait, FloodPremiumWait) as f:
             LOGGER.warning(str(f))
+            count_flood_wait("upload_file", f.value)
             await sleep(f.value * 1.3)
             if (
                 self._thumb is None
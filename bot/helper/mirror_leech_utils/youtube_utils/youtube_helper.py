@@ -62,7 +62,10 @@ class YouTubeHelper:
             else:
                 self.total_time += self.update_interval
 
-    def authorize(self, user_id=""):
+    def authorized_http(self, user_id=""):
+        """An authorized httplib2 client. Clients can't be shared between
+        threads, every thread that talks to the API needs its own.
+        """
         credentials = None
         token_path = self.token_path
 
@@ -79,7 +82,15 @@ class YouTubeHelper:
 
         authorized_http = AuthorizedHttp(credentials, http=build_http())
         authorized_http.http.disable_ssl_certificate_validation = True
-        return build("youtube", "v3", http=authorized_http, cache_discovery=False)
+        return authorized_http
+
+    def authorize(self, user_id=""):
+        return build(
+            "youtube",
+            "v3",
+            http=self.authorized_http(user_id),
+            cache_discovery=False,
+        )
 
     def get_video_id_from_url(self, url):
         """Extract video ID from YouTube URL"""
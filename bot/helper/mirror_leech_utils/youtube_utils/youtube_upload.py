@@ -1,24 +1,58 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from json import dumps, loads
 from logging import getLogger
+from threading import Lock, local
+from time import monotonic, sleep
 
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaFileUpload
-from tenacity import (
-    RetryError,
-    retry,
-    retry_if_exception_type,
-    stop_after_attempt,
-    wait_exponential,
-)
+from httplib2 import HttpLib2Error
+from tenacity import RetryError
 
 from bot.helper.ext_utils.bot_utils import SetInterval, async_to_sync
+from bot.helper.ext_utils.db_handler import database
 from bot.helper.ext_utils.files_utils import get_mime_type
+from bot.helper.mirror_leech_utils.gdrive_utils.walker import (
+    RETRY_STATUSES,
+    error_reason,
+)
 from bot.helper.mirror_leech_utils.youtube_utils.youtube_helper import YouTubeHelper
 
 LOGGER = getLogger(__name__)
 
+UPLOAD_URL = "https://www.googleapis.com/upload/youtube/v3/videos"
+# Videos uploaded at once. Every video costs the same quota either way,
+# running them side by side only saves time.
+WORKERS = 3
+# Chunk sizes have to be multiples of 256 KiB. The chunk of an upload
+# doubles while a chunk takes less than FAST_CHUNK seconds and halves when
+# one takes more than SLOW_CHUNK.
+MIN_CHUNK = 8 * 1024 * 1024
+MAX_CHUNK = 64 * 1024 * 1024
+FAST_CHUNK = 5
+SLOW_CHUNK = 20
+RETRIES = 5
+QUOTA_REASONS = ["quotaExceeded", "uploadLimitExceeded", "dailyLimitExceeded"]
+# Google keeps resumable sessions for about a week.
+SESSION_TTL = 6 * 86400
+# Bytes of the start and the end of a file that identify it for resuming.
+FINGERPRINT_SIZE = 1024 * 1024
+
 
 class YouTubeUpload(YouTubeHelper):
+    """
+    Uploads videos to YouTube.
+
+    Videos are sent with the resumable upload protocol, up to WORKERS at
+    once, each thread with its own client. The chunk size of every upload
+    adapts to the link. The session URI and confirmed offset of an upload
+    are kept in the database, so uploading the same file again, also after
+    a restart, continues where it stopped. Videos are added to playlists
+    once all of them are up. The upload URL can point to a local server for
+    testing.
+    """
+
     def __init__(
         self,
         listener,
@@ -29,11 +63,17 @@ class YouTubeUpload(YouTubeHelper):
         description=None,
         playlist_id=None,
         upload_mode="playlist",
+        upload_url=UPLOAD_URL,
     ):
         self.listener = listener
         self._updater = None
         self._path = path
         self._is_errored = False
+        self._upload_url = upload_url
+        self._user_id = ""
+        self._local = local()
+        self._lock = Lock()
+        self._quota_exceeded = False
         self.privacy = privacy
         self.tags = tags
         self.category = category
@@ -43,130 +83,107 @@ class YouTubeUpload(YouTubeHelper):
         super().__init__()
         self.is_uploading = True
 
-    def _upload_playlist(self, folder_path, playlist_name):
-        """Uploads all videos in a folder and adds them to a new playlist."""
-        video_infos = []
-        video_files_count = 0
-        LOGGER.info(f"Starting playlist upload for folder: {folder_path}")
+    async def progress(self):
+        self.total_time += self.update_interval
+
+    def _add_progress(self, size):
+        with self._lock:
+            self.proc_bytes += size
+            if self.listener.size:
+                self.upload_progress = int(
+                    self.proc_bytes * 100 / self.listener.size
+                )
 
+    def _http(self):
+        if (http := getattr(self._local, "http", None)) is None:
+            http = self._local.http = self.authorized_http(self._user_id)
+        return http
+
+    @staticmethod
+    def _video_files(folder_path):
+        """Lists (path, name, mime_type) of the videos in a folder."""
+        videos = []
+        for item_name in os.listdir(folder_path):
+            item_path = os.path.join(folder_path, item_name)
+            if not os.path.isfile(item_path):
+                continue
+            mime_type = get_mime_type(item_path)
+            if mime_type and mime_type.startswith("video/"):
+                videos.append((item_path, item_name, mime_type))
+            else:
+                LOGGER.debug(
+                    f"Skipping non-video file: {item_path} (MIME: {mime_type})"
+                )
+        return videos
+
+    def _upload_videos(self, videos):
+        """
+        Uploads videos on up to WORKERS threads. Returns the result of every
+        video in the order of videos, None for the ones that failed.
+        """
+        if not videos:
+            return []
+        self.total_files = len(videos)
+        with ThreadPoolExecutor(max_workers=min(WORKERS, len(videos))) as pool:
+            return list(pool.map(lambda video: self._try_upload(*video), videos))
+
+    def _try_upload(self, file_path, file_name, mime_type):
+        if self.listener.is_cancelled or self._quota_exceeded:
+            return None
+        LOGGER.info(f"Uploading video file: {file_path}")
         try:
-            for item_name in os.listdir(folder_path):
-                item_path = os.path.join(folder_path, item_name)
-                if os.path.isfile(item_path):
-                    mime_type = get_mime_type(item_path)
-                    if mime_type and mime_type.startswith("video/"):
-                        video_files_count += 1
-                        LOGGER.info(f"Uploading video file: {item_path}")
-                        try:
-                            video_upload_result = self._upload_video(
-                                item_path, item_name, mime_type
-                            )
-                            if video_upload_result and video_upload_result.get(
-                                "url"
-                            ):
-                                video_id = video_upload_result["url"].split("=")[-1]
-                                video_infos.append(
-                                    {
-                                        "id": video_id,
-                                        "name": video_upload_result["name"],
-                                    }
-                                )
-                                LOGGER.info(
-                                    f"Successfully uploaded video: {item_name}, ID: {video_id}"
-                                )
-                            elif self.listener.is_cancelled:
-                                LOGGER.info(
-                                    "Playlist upload cancelled during video upload."
-                                )
-                                return None
-                            else:
-                                LOGGER.warning(
-                                    f"Failed to upload video or extract ID/name: {item_name}"
-                                )
-                        except Exception as e:
-                            LOGGER.error(f"Error uploading video {item_name}: {e}")
-                    else:
-                        LOGGER.debug(
-                            f"Skipping non-video file: {item_path} (MIME: {mime_type})"
-                        )
-                if self.listener.is_cancelled:
-                    LOGGER.info("Playlist upload process cancelled.")
-                    return None
+            return self._upload_video(file_path, file_name, mime_type)
+        except Exception as err:
+            if isinstance(err, HttpError) and error_reason(err) in QUOTA_REASONS:
+                self._quota_exceeded = True
+            LOGGER.error(f"Error uploading video {file_name}: {err}")
+            return None
 
-            if not video_infos:
-                LOGGER.info("No videos found or uploaded in the folder.")
-                if video_files_count > 0:
-                    raise ValueError(
-                        "No videos were successfully uploaded from the folder."
-                    )
-                return "No videos to upload in playlist."
-
-            LOGGER.info(f"Creating playlist: {playlist_name}")
-            playlist_request_body = {
-                "snippet": {
-                    "title": playlist_name,
-                    "description": f"Playlist created from folder: {playlist_name}",
-                    "tags": ["mirror-leech-bot", "playlist-upload"],
-                },
-                "status": {"privacyStatus": "private"},
-            }
-            playlist_insert_request = self.service.playlists().insert(
-                part="snippet,status", body=playlist_request_body
-            )
-            playlist_response = playlist_insert_request.execute()
-            playlist_id = playlist_response["id"]
-            playlist_url = f"https://www.youtube.com/playlist?list={playlist_id}"
-            LOGGER.info(
-                f"Playlist created: {playlist_name}, ID: {playlist_id}, URL: {playlist_url}"
+    def _create_playlist(self, title, description, privacy, tags=None):
+        snippet = {"title": title, "description": description}
+        if tags:
+            snippet["tags"] = tags
+        playlist_response = (
+            self.service.playlists()
+            .insert(
+                part="snippet,status",
+                body={"snippet": snippet, "status": {"privacyStatus": privacy}},
             )
+            .execute(num_retries=RETRIES)
+        )
+        playlist_id = playlist_response["id"]
+        LOGGER.info(f"Playlist created: {title}, ID: {playlist_id}")
+        return playlist_id
 
-            for video_info in video_infos:
-                if self.listener.is_cancelled:
-                    LOGGER.info(
-                        "Playlist upload cancelled before adding all videos to playlist."
-                    )
-                    break
-                video_id_to_add = video_info["id"]
-                LOGGER.info(
-                    f"Adding video ID {video_id_to_add} ({video_info['name']}) to playlist {playlist_id}"
-                )
-                playlist_item_request_body = {
-                    "snippet": {
-                        "playlistId": playlist_id,
-                        "resourceId": {
-                            "kind": "youtube#video",
-                            "videoId": video_id_to_add,
-                        },
-                    }
-                }
-                playlist_item_insert_request = self.service.playlistItems().insert(
-                    part="snippet", body=playlist_item_request_body
-                )
-                playlist_item_insert_request.execute()
-                LOGGER.info(
-                    f"Successfully added video ID {video_id_to_add} to playlist {playlist_id}"
+    def _add_to_playlist(self, playlist_id, video_ids):
+        """
+        Appends videos to a playlist one by one, in order. YouTube doesn't
+        keep the order of batched inserts and rejects concurrent inserts into
+        the same playlist.
+        """
+        for video_id in video_ids:
+            if self.listener.is_cancelled:
+                LOGGER.info("Upload cancelled before adding all videos to playlist.")
+                return
+            try:
+                self.service.playlistItems().insert(
+                    part="snippet",
+                    body={
+                        "snippet": {
+                            "playlistId": playlist_id,
+                            "resourceId": {
+                                "kind": "youtube#video",
+                                "videoId": video_id,
+                            },
+                        }
+                    },
+                ).execute(num_retries=RETRIES)
+                LOGGER.info(f"Added video {video_id} to playlist {playlist_id}")
+            except Exception as e:
+                LOGGER.error(
+                    f"Could not add video {video_id} to playlist {playlist_id}: {e}"
                 )
 
-            self.total_files = len(video_infos)
-            individual_video_data = [
-                {
-                    "url": f"https://www.youtube.com/watch?v={v_info['id']}",
-                    "name": v_info["name"],
-                }
-                for v_info in video_infos
-            ]
-            return {
-                "playlist_url": playlist_url,
-                "individual_video_urls": individual_video_data,
-            }
-
-        except HttpError as e:
-            LOGGER.error(f"YouTube API error during playlist operation: {e}")
-            raise e
-        except Exception as e:
-            LOGGER.error(f"Error during playlist creation or video addition: {e}")
-            raise e
-
     def user_setting(self):
         """Handle user-specific YouTube token settings"""
         if self.listener.up_dest.startswith("yt:"):
@@ -178,10 +195,11 @@ class YouTubeUpload(YouTubeHelper):
     def upload(self):
         """Main upload function"""
         self.user_setting()
+        self._user_id = (
+            self.listener.user_id if hasattr(self.listener, "user_id") else ""
+        )
         try:
-            self.service = self.authorize(
-                self.listener.user_id if hasattr(self.listener, "user_id") else ""
-            )
+            self.service = self.authorize(self._user_id)
         except Exception as e:
             LOGGER.error(f"YouTube authorization failed: {e}")
             async_to_sync(
@@ -194,258 +212,77 @@ class YouTubeUpload(YouTubeHelper):
         upload_result_dict = {}
         upload_type_str = "Unknown"
         files_processed = 0
-        original_playlist_id = self.playlist_id
 
         try:
-            if os.path.isfile(self._path):
+            if self.upload_mode not in ["playlist", "individual"]:
+                raise ValueError(f"Invalid upload_mode: {self.upload_mode}")
+            is_file = os.path.isfile(self._path)
+            if is_file:
                 mime_type = get_mime_type(self._path)
                 if not mime_type or not mime_type.startswith("video/"):
                     raise ValueError(f"File is not a video. MIME type: {mime_type}")
-
-                if self.upload_mode == "playlist":
-                    upload_type_str = "Playlist"
-                    video_result = self._upload_video(
-                        self._path,
-                        self.listener.name,
-                        mime_type,
-                        playlist_id_override=original_playlist_id,
-                    )
-                    if not video_result and not self.listener.is_cancelled:
-                        raise ValueError(
-                            "Failed to upload video or video result is null."
-                        )
-                    if self.listener.is_cancelled:
-                        return
-
-                    if original_playlist_id:
-                        playlist_url = f"https://www.youtube.com/playlist?list={original_playlist_id}"
-                    else:
-                        playlist_title = os.path.splitext(self.listener.name)[0]
-                        LOGGER.info(
-                            f"Creating new playlist for single video: {playlist_title}"
-                        )
-                        playlist_request_body = {
-                            "snippet": {
-                                "title": playlist_title,
-                                "description": f"Playlist for: {self.listener.name}",
-                            },
-                            "status": {"privacyStatus": self.privacy},
-                        }
-                        playlist_insert_request = self.service.playlists().insert(
-                            part="snippet,status", body=playlist_request_body
-                        )
-                        playlist_response = playlist_insert_request.execute()
-                        new_playlist_id = playlist_response["id"]
-                        playlist_url = f"https://www.youtube.com/playlist?list={new_playlist_id}"
-                        LOGGER.info(f"New playlist created: {playlist_url}")
-
-                        if video_result and video_result.get("url"):
-                            playlist_item_request_body = {
-                                "snippet": {
-                                    "playlistId": new_playlist_id,
-                                    "resourceId": {
-                                        "kind": "youtube#video",
-                                        "videoId": video_result["url"].split("=")[
-                                            -1
-                                        ],
-                                    },
-                                }
-                            }
-                            self.service.playlistItems().insert(
-                                part="snippet", body=playlist_item_request_body
-                            ).execute()
-                            LOGGER.info(
-                                f"Video {video_result['url']} added to new playlist {new_playlist_id}"
-                            )
-
-                    upload_result_dict = {
-                        "playlist_url": playlist_url,
-                        "individual_video_urls": [video_result]
-                        if video_result
-                        else [],
-                    }
-                    if video_result:
-                        files_processed = 1
-                    LOGGER.info(f"Uploaded single file to playlist: {self._path}")
-
-                elif self.upload_mode == "individual":
-                    upload_type_str = "Video"
-                    video_result = self._upload_video(
-                        self._path,
-                        self.listener.name,
-                        mime_type,
-                        playlist_id_override=None,
-                    )
-                    if not video_result and not self.listener.is_cancelled:
-                        raise ValueError(
-                            "Failed to upload video or video result is null."
-                        )
-                    if self.listener.is_cancelled:
-                        return
-
-                    upload_result_dict = {
-                        "individual_video_urls": [video_result]
-                        if video_result
-                        else []
-                    }
-                    if video_result:
-                        upload_result_dict["video_url"] = video_result
-                        files_processed = 1
-                    LOGGER.info(f"Uploaded single file individually: {self._path}")
-                else:
-                    raise ValueError(
-                        f"Invalid upload_mode for single file: {self.upload_mode}"
-                    )
-
+                videos = [(self._path, self.listener.name, mime_type)]
             elif os.path.isdir(self._path):
-                playlist_name_for_new = os.path.basename(self._path)
-
-                if self.upload_mode == "playlist":
-                    upload_type_str = "Playlist"
-                    if original_playlist_id:
-                        self.playlist_id = original_playlist_id
-                        individual_video_urls = []
-                        processed_in_folder = 0
-                        items = list(os.listdir(self._path))
-                        self.total_files = sum(
-                            1
-                            for item_name in items
-                            if os.path.isfile(os.path.join(self._path, item_name))
-                            and get_mime_type(
-                                os.path.join(self._path, item_name),
-                            ).startswith("video/")
-                        )
-
-                        for item_name in items:
-                            if self.listener.is_cancelled:
-                                break
-                            item_path = os.path.join(self._path, item_name)
-                            if os.path.isfile(item_path):
-                                mime_type = get_mime_type(item_path)
-                                if mime_type and mime_type.startswith("video/"):
-                                    video_result = self._upload_video(
-                                        item_path,
-                                        item_name,
-                                        mime_type,
-                                        playlist_id_override=original_playlist_id,
-                                    )
-                                    if video_result:
-                                        individual_video_urls.append(video_result)
-                                        processed_in_folder += 1
-
-                        if self.listener.is_cancelled:
-                            return
-                        upload_result_dict = {
-                            "playlist_url": f"https://www.youtube.com/playlist?list={original_playlist_id}",
-                            "individual_video_urls": individual_video_urls,
-                        }
-                        files_processed = processed_in_folder
-                        LOGGER.info(
-                            f"Uploaded videos from folder to existing playlist ID: {original_playlist_id}"
-                        )
-                    else:
-                        upload_result_dict = self._upload_playlist(
-                            self._path, playlist_name_for_new
-                        )
-                        if self.listener.is_cancelled:
-                            return
-                        if (
-                            upload_result_dict
-                            and isinstance(upload_result_dict, dict)
-                            and upload_result_dict.get("playlist_url")
-                        ):
-                            files_processed = self.total_files
-                        elif isinstance(upload_result_dict, str):
-                            raise ValueError(
-                                f"Playlist creation failed: {upload_result_dict}"
-                            )
-                        else:
-                            files_processed = 0
-                        LOGGER.info(
-                            f"Uploaded new playlist from folder: {self._path}"
-                        )
-
-                elif self.upload_mode == "individual":
-                    upload_type_str = "Individual Videos"
-                    individual_video_urls = []
-                    processed_in_folder = 0
-                    items = list(os.listdir(self._path))
-                    self.total_files = sum(
-                        1
-                        for item_name in items
-                        if os.path.isfile(os.path.join(self._path, item_name))
-                        and get_mime_type(
-                            os.path.join(self._path, item_name)
-                        ).startswith("video/")
-                    )
-
-                    for item_name in items:
-                        if self.listener.is_cancelled:
-                            break
-                        item_path = os.path.join(self._path, item_name)
-                        if os.path.isfile(item_path):
-                            mime_type = get_mime_type(item_path)
-                            if mime_type and mime_type.startswith("video/"):
-                                try:
-                                    video_result = self._upload_video(
-                                        item_path,
-                                        item_name,
-                                        mime_type,
-                                        playlist_id_override=None,
-                                    )
-                                    if video_result:
-                                        individual_video_urls.append(video_result)
-                                        processed_in_folder += 1
-                                except Exception as e:
-                                    LOGGER.error(
-                                        f"Failed to upload {item_name} individually: {e}"
-                                    )
-                    if self.listener.is_cancelled:
-                        return
-                    upload_result_dict = {
-                        "individual_video_urls": individual_video_urls
-                    }
-                    files_processed = processed_in_folder
-                    LOGGER.info(
-                        f"Uploaded individual videos from folder: {self._path}"
-                    )
-                else:
-                    raise ValueError(
-                        f"Invalid upload_mode for directory: {self.upload_mode}"
-                    )
+                videos = self._video_files(self._path)
             else:
                 raise ValueError(f"Path is not a file or directory: {self._path}")
 
+            if self.upload_mode == "playlist":
+                upload_type_str = "Playlist"
+            elif is_file:
+                upload_type_str = "Video"
+            else:
+                upload_type_str = "Individual Videos"
+
+            uploaded = [result for result in self._upload_videos(videos) if result]
             if self.listener.is_cancelled:
-                LOGGER.info("Upload cancelled by listener during main processing.")
                 return
-
-            if (
-                not upload_result_dict
-                or (
-                    (
-                        upload_result_dict.get("playlist_url")
-                        and not upload_result_dict.get("individual_video_urls")
+            files_processed = len(uploaded)
+            if not uploaded:
+                if self._quota_exceeded:
+                    raise ValueError("YouTube upload quota exceeded.")
+                if videos:
+                    raise ValueError(
+                        f"{upload_type_str} upload: No videos were successfully processed out of {len(videos)}."
                     )
-                    and files_processed == 0
+                raise ValueError(
+                    f"{upload_type_str} upload: No video files found or processed."
                 )
-                or (
-                    (
-                        not upload_result_dict.get("playlist_url")
-                        and not upload_result_dict.get("individual_video_urls")
-                        and not upload_result_dict.get("video_url")
-                    )
-                    and files_processed == 0
+
+            if self.upload_mode == "playlist":
+                playlist_id = self.playlist_id
+                if not playlist_id:
+                    if is_file:
+                        playlist_id = self._create_playlist(
+                            os.path.splitext(self.listener.name)[0],
+                            f"Playlist for: {self.listener.name}",
+                            self.privacy,
+                        )
+                    else:
+                        folder_name = os.path.basename(self._path)
+                        playlist_id = self._create_playlist(
+                            folder_name,
+                            f"Playlist created from folder: {folder_name}",
+                            "private",
+                            ["mirror-leech-bot", "playlist-upload"],
+                        )
+                self._add_to_playlist(
+                    playlist_id,
+                    [video["url"].split("=")[-1] for video in uploaded],
                 )
-            ):
-                if files_processed == 0 and self.total_files > 0:
-                    raise ValueError(
-                        f"{upload_type_str} upload: No videos were successfully processed out of {self.total_files}."
-                    )
-                if files_processed == 0:
-                    raise ValueError(
-                        f"{upload_type_str} upload: No video files found or processed."
-                    )
+                if self.listener.is_cancelled:
+                    return
+                upload_result_dict = {
+                    "playlist_url": f"https://www.youtube.com/playlist?list={playlist_id}",
+                    "individual_video_urls": uploaded,
+                }
+            else:
+                upload_result_dict = {"individual_video_urls": uploaded}
+                if is_file:
+                    upload_result_dict["video_url"] = uploaded[0]
+            LOGGER.info(
+                f"Uploaded {files_processed} of {len(videos)} videos from: {self._path}"
+            )
 
         except Exception as err:
             if isinstance(err, RetryError):
@@ -463,7 +300,6 @@ class YouTubeUpload(YouTubeHelper):
             )
             self._is_errored = True
         finally:
-            self.playlist_id = original_playlist_id
             self._updater.cancel()
 
         if self.listener.is_cancelled and not self._is_errored:
@@ -474,25 +310,6 @@ class YouTubeUpload(YouTubeHelper):
             LOGGER.error("Upload process failed with an error. Listener notified.")
             return
 
-        if (
-            not upload_result_dict
-            and files_processed == 0
-            and not self.listener.is_cancelled
-        ):
-            final_err_msg = (
-                "Upload resulted in no data and was not caught by other checks."
-            )
-            LOGGER.error(final_err_msg)
-            async_to_sync(
-                self.listener.on_upload_complete,
-                None,
-                None,
-                0,
-                "Error",
-                upload_result=final_err_msg,
-            )
-            return
-
         async_to_sync(
             self.listener.on_upload_complete,
             None,
@@ -505,130 +322,185 @@ class YouTubeUpload(YouTubeHelper):
             f"Upload process completed. Type: {upload_type_str}, Files: {files_processed}"
         )
 
-    @retry(
-        wait=wait_exponential(multiplier=2, min=3, max=6),
-        stop=stop_after_attempt(3),
-        retry=retry_if_exception_type(Exception),
-    )
-    def _upload_video(
-        self, file_path, file_name, mime_type, playlist_id_override=None
-    ):
+    def _session_key(self, file_path, size, body):
+        """
+        Identifies an upload by the user, the metadata, the size and the
+        first and last FINGERPRINT_SIZE bytes of the file.
+        """
+        digest = sha256(f"{self._user_id}:{size}:".encode())
+        digest.update(dumps(body, sort_keys=True).encode())
+        with open(file_path, "rb") as f:
+            digest.update(f.read(FINGERPRINT_SIZE))
+            if size > FINGERPRINT_SIZE:
+                f.seek(max(size - FINGERPRINT_SIZE, FINGERPRINT_SIZE))
+                digest.update(f.read(FINGERPRINT_SIZE))
+        return digest.hexdigest()
+
+    def _start_session(self, http, body, size, mime_type):
+        response, content = http.request(
+            f"{self._upload_url}?uploadType=resumable&part=snippet,status",
+            method="POST",
+            body=dumps(body),
+            headers={
+                "Content-Type": "application/json; charset=UTF-8",
+                "X-Upload-Content-Length": str(size),
+                "X-Upload-Content-Type": mime_type,
+            },
+        )
+        if response.status != 200 or "location" not in response:
+            raise HttpError(response, content, uri=self._upload_url)
+        return response["location"]
+
+    @staticmethod
+    def _confirmed(response):
+        """The bytes a 308 response confirms, its range is bytes=0-N."""
+        if "range" not in response:
+            return 0
+        return int(response["range"].rpartition("-")[2]) + 1
+
+    def _resume_point(self, http, uri, size):
         """
-        Uploads a single video to YouTube.
-        Optionally adds to a playlist if playlist_id_override is provided.
-        If playlist_id_override is None, it will not be added to any playlist,
-        regardless of self.playlist_id's original value.
+        Asks for the state of an upload session.
+
+        Returns:
+            tuple: (offset, None) while bytes are missing, (size, video) once
+            the upload is complete.
         """
-        current_playlist_target = playlist_id_override
+        response, content = http.request(
+            uri,
+            method="PUT",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+        if response.status in [200, 201]:
+            return size, loads(content)
+        if response.status == 308:
+            return self._confirmed(response), None
+        raise HttpError(response, content, uri=uri)
+
+    def _send(self, http, key, uri, offset, size, file_path):
+        """
+        Sends a file to an upload session from offset on, or from the offset
+        the session reports when offset is None. Transport errors and
+        retryable statuses resume from the offset the session confirms.
+
+        Returns:
+            dict: The video resource, None if the upload was cancelled. The
+            session is kept for the next attempt then.
+        """
+        chunk = MIN_CHUNK
+        retries = 0
+        confirmed = 0
+        with open(file_path, "rb") as f:
+            while not self.listener.is_cancelled:
+                try:
+                    if offset is None:
+                        offset, video = self._resume_point(http, uri, size)
+                    else:
+                        f.seek(offset)
+                        data = f.read(chunk)
+                        started = monotonic()
+                        response, content = http.request(
+                            uri,
+                            method="PUT",
+                            body=data,
+                            headers={
+                                "Content-Range": f"bytes {offset}-{offset + len(data) - 1}/{size}",
+                            },
+                        )
+                        if response.status in [200, 201]:
+                            offset, video = size, loads(content)
+                        elif response.status == 308:
+                            offset, video = self._confirmed(response), None
+                            elapsed = monotonic() - started
+                            if elapsed < FAST_CHUNK:
+                                chunk = min(chunk * 2, MAX_CHUNK)
+                            elif elapsed > SLOW_CHUNK:
+                                chunk = max(chunk // 2, MIN_CHUNK)
+                        else:
+                            raise HttpError(response, content, uri=uri)
+                except (HttpError, HttpLib2Error, OSError) as err:
+                    status = err.resp.status if isinstance(err, HttpError) else None
+                    if status in [404, 410]:
+                        # The session expired, what it had is lost.
+                        self._add_progress(-confirmed)
+                        async_to_sync(database.rm_yt_session, key)
+                        raise
+                    if (
+                        status is not None and status not in RETRY_STATUSES
+                    ) or retries >= RETRIES:
+                        raise
+                    retries += 1
+                    LOGGER.warning(
+                        f"Upload of {file_path} failed: {err}, retrying ({retries}/{RETRIES})"
+                    )
+                    sleep(min(2**retries, 30))
+                    offset = None
+                    continue
+                retries = 0
+                if offset > confirmed:
+                    self._add_progress(offset - confirmed)
+                    confirmed = offset
+                if video is not None:
+                    return video
+                async_to_sync(
+                    database.save_yt_session,
+                    key,
+                    uri,
+                    offset,
+                    SESSION_TTL,
+                )
+        return None
 
-        title = file_name
-        privacy_status = self.privacy
-        category_id = self.category
+    def _upload_video(self, file_path, file_name, mime_type):
+        """
+        Uploads a single video. An upload of the same file and metadata
+        stored in the database is resumed, otherwise a new session starts.
+        """
         description_base = (
             self.description if self.description else f"Uploaded: {file_name}"
         )
-        description = f"{description_base}\n\nOriginal filename: {file_name}"
         tags_for_body = self.tags
         if tags_for_body is None:
             tags_for_body = ["mirror-leech-bot", "telegram-bot", "upload"]
 
         body = {
             "snippet": {
-                "title": title,
-                "description": description,
+                "title": file_name,
+                "description": f"{description_base}\n\nOriginal filename: {file_name}",
                 "tags": tags_for_body,
-                "categoryId": str(category_id),
+                "categoryId": str(self.category),
             },
             "status": {
-                "privacyStatus": privacy_status,
+                "privacyStatus": self.privacy,
                 "selfDeclaredMadeForKids": False,
             },
         }
 
-        media_body = MediaFileUpload(
-            file_path,
-            mimetype=mime_type,
-            resumable=True,
-            chunksize=1024 * 1024 * 4,
-        )
-
-        insert_request = self.service.videos().insert(
-            part=",".join(body.keys()), body=body, media_body=media_body
-        )
-
-        response = None
-        retries = 0
-        self.upload_progress = 0
-
-        while response is None and not self.listener.is_cancelled:
+        http = self._http()
+        size = os.path.getsize(file_path)
+        key = self._session_key(file_path, size, body)
+        video = None
+        if session := async_to_sync(database.get_yt_session, key):
+            LOGGER.info(f"Resuming upload of {file_name}")
             try:
-                self.status, response = insert_request.next_chunk()
-                if self.status:
-                    self.upload_progress = int(self.status.progress() * 100)
-                    LOGGER.info(f"Uploading {file_name}: {self.upload_progress}%")
+                video = self._send(http, key, session["uri"], None, size, file_path)
             except HttpError as err:
-                if err.resp.status in [500, 502, 503, 504, 429] and retries < 5:
-                    retries += 1
-                    LOGGER.warning(
-                        f"HTTP error {err.resp.status} for {file_name}, retrying... ({retries}/5)"
-                    )
-                    continue
-                error_content = (
-                    err.content.decode("utf-8")
-                    if err.content
-                    else f"Unknown error (status: {err.resp.status})"
-                )
-                LOGGER.error(
-                    f"YouTube upload for {file_name} failed: {error_content}"
-                )
-                raise err
-            except Exception as e:
-                LOGGER.error(f"Unexpected error during {file_name} upload: {e}")
-                raise e
-
-        if self.listener.is_cancelled:
+                if err.resp.status not in [404, 410]:
+                    raise
+                LOGGER.info(f"Upload session of {file_name} expired, starting over")
+                session = None
+        if session is None:
+            uri = self._start_session(http, body, size, mime_type)
+            async_to_sync(database.save_yt_session, key, uri, 0, SESSION_TTL)
+            video = self._send(http, key, uri, 0, size, file_path)
+
+        if video is None:
             LOGGER.info(f"Upload of {file_name} cancelled by listener.")
             return None
-
-        if response:
-            video_id = response["id"]
-            video_url = f"https://www.youtube.com/watch?v={video_id}"
-            LOGGER.info(f"Video {file_name} uploaded successfully: {video_url}")
-
-            if current_playlist_target:
-                LOGGER.info(
-                    f"Adding video {video_id} ({file_name}) to specified playlist ID {current_playlist_target}"
-                )
-                try:
-                    playlist_item_request_body = {
-                        "snippet": {
-                            "playlistId": current_playlist_target,
-                            "resourceId": {
-                                "kind": "youtube#video",
-                                "videoId": video_id,
-                            },
-                        }
-                    }
-                    self.service.playlistItems().insert(
-                        part="snippet", body=playlist_item_request_body
-                    ).execute()
-                    LOGGER.info(
-                        f"Successfully added video {video_id} to playlist {current_playlist_target}"
-                    )
-                except HttpError as e:
-                    LOGGER.error(
-                        f"Could not add video {video_id} to playlist {current_playlist_target}: {e}"
-                    )
-                except Exception as e:
-                    LOGGER.error(
-                        f"Unexpected error adding video {video_id} to playlist {current_playlist_target}: {e}"
-                    )
-            return {"url": video_url, "name": file_name}
-
-        LOGGER.warning(
-            f"Upload of {file_name} finished but no response object. Cancelled: {self.listener.is_cancelled}"
-        )
-        return None
+        async_to_sync(database.rm_yt_session, key)
+        video_url = f"https://www.youtube.com/watch?v={video['id']}"
+        LOGGER.info(f"Video {file_name} uploaded successfully: {video_url}")
+        return {"url": video_url, "name": file_name}
 
     def get_upload_status(self):
         return {
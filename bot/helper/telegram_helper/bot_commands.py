@@ -20,6 +20,7 @@ class BotCommands:
     DeleteCommand = f"del{i}"
     CancelAllCommand = f"cancelall{i}"
     ForceStartCommand = [f"forcestart{i}", f"fs{i}"]
+    PriorityCommand = f"priority{i}"
     ListCommand = f"list{i}"
     SearchCommand = f"search{i}"
     HydraSearchCommand = f"nzbsearch{i}"
@@ -37,6 +38,7 @@ class BotCommands:
     ShellCommand = f"shell{i}"
     AExecCommand = f"aexec{i}"
     ExecCommand = f"exec{i}"
+    ProfileCommand = f"profile{i}"
     ClearLocalsCommand = f"clearlocals{i}"
     BotSetCommand = f"botsettings{i}"
     UserSetCommand = f"settings{i}"
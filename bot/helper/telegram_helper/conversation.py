@@ -0,0 +1,148 @@
+from contextlib import contextmanager
+
+from bot import bot_loop
+
+
+class _Waiter:
+    __slots__ = ("check", "future", "timer")
+
+    def __init__(self, check):
+        self.check = check
+        self.future = bot_loop.create_future()
+        self.timer = None
+
+
+class Conversation:
+    """
+    Routes user input to coroutines waiting for it, through one shared
+    message handler and one shared callback query handler.
+
+    A prompt waits for the next matching message of a (chat, user) pair on a
+    future. Prompts belong to the namespace of their menu, such as "bset",
+    "uset" or "rss", and a menu only replaces or cancels its own prompts.
+    When a user has prompts of several menus open in a chat, the newest one
+    gets the message. Its timeout is a timer on the event loop, so nothing polls and no
+    handler is added or removed per prompt. Button driven menus route the
+    callback queries of a user with a given data prefix to their own function
+    for as long as the menu is open.
+    """
+
+    def __init__(self):
+        self._waiters = {}
+        self._routes = {}
+
+    async def wait_for_message(
+        self,
+        namespace,
+        chat_id,
+        user_id,
+        check=None,
+        wait_time=60,
+    ):
+        """
+        Waits for the next message of a user in a chat. A newer prompt of the
+        same namespace, chat and user replaces the pending one.
+
+        Args:
+            namespace: The menu the prompt belongs to.
+            chat_id: The chat to listen in.
+            user_id: The user, or sender chat, expected to answer.
+            check: An optional predicate the message must satisfy.
+            wait_time: Seconds to wait before giving up.
+
+        Returns:
+            The message, or None if the prompt was cancelled.
+
+        Raises:
+            TimeoutError: If nothing arrived in time.
+        """
+        key = (chat_id, user_id)
+        self.cancel(namespace, chat_id, user_id)
+        waiter = _Waiter(check)
+        waiter.timer = bot_loop.call_later(wait_time, self._expire, waiter)
+        waiters = self._waiters.setdefault(key, {})
+        waiters.pop(namespace, None)
+        waiters[namespace] = waiter
+        try:
+            return await waiter.future
+        finally:
+            waiter.timer.cancel()
+            waiters = self._waiters.get(key, {})
+            if waiters.get(namespace) is waiter:
+                del waiters[namespace]
+                if not waiters:
+                    del self._waiters[key]
+
+    @staticmethod
+    def _expire(waiter):
+        if not waiter.future.done():
+            waiter.future.set_exception(TimeoutError())
+
+    def cancel(self, namespace, chat_id=None, user_id=None):
+        """
+        Cancels the pending prompts of a namespace matching the given chat
+        and/or user.
+        """
+        for (waiter_chat, waiter_user), waiters in list(self._waiters.items()):
+            waiter = waiters.get(namespace)
+            if (
+                waiter is not None
+                and (chat_id is None or waiter_chat == chat_id)
+                and (user_id is None or waiter_user == user_id)
+                and not waiter.future.done()
+            ):
+                waiter.future.set_result(None)
+
+    @contextmanager
+    def callbacks(self, user_id, prefix, func):
+        """
+        Routes the callback queries of a user whose data starts with `prefix`
+        to `func(client, query)` while the context is open. When several
+        menus share a route, the one opened first receives the queries.
+        """
+        key = (user_id, prefix)
+        routes = self._routes.setdefault(key, [])
+        routes.append(func)
+        try:
+            yield
+        finally:
+            routes.remove(func)
+            if not routes:
+                del self._routes[key]
+
+    def _message_waiter(self, message):
+        user = message.from_user or message.sender_chat
+        if user is None:
+            return None
+        waiters = self._waiters.get((message.chat.id, user.id), {})
+        for waiter in reversed(list(waiters.values())):
+            if not waiter.future.done() and (
+                waiter.check is None or waiter.check(message)
+            ):
+                return waiter
+        return None
+
+    async def message_filter(self, _, __, message):
+        return self._message_waiter(message) is not None
+
+    async def on_message(self, _, message):
+        if waiter := self._message_waiter(message):
+            waiter.future.set_result(message)
+
+    def _callback_route(self, query):
+        if not query.data:
+            return None
+        routes = self._routes.get(
+            (query.from_user.id, query.data.split(maxsplit=1)[0]),
+        )
+        return routes[0] if routes else None
+
+    async def callback_filter(self, _, __, query):
+        return self._callback_route(query) is not None
+
+    async def on_callback(self, client, query):
+        if func := self._callback_route(query):
+            await func(client, query)
+
+
+conversation = Conversation()
@@ -2,8 +2,7 @@ from asyncio import gather, sleep
 from re import match as re_match
 from time import time
 
-from cachetools import TTLCache
-from pyrogram import Client, enums
+from pyrogram import enums
 from pyrogram.errors import (
     FloodPremiumWait,
     FloodWait,
@@ -18,15 +17,14 @@ from bot import (
     intervals,
     status_dict,
     task_dict_lock,
-    user_data,
 )
 from bot.core.aeon_client import TgClient
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import SetInterval
 from bot.helper.ext_utils.exceptions import TgLinkException
+from bot.helper.ext_utils.metrics import count_flood_wait
 from bot.helper.ext_utils.status_utils import get_readable_message
-
-session_cache = TTLCache(maxsize=1000, ttl=36000)
+from bot.helper.telegram_helper.session_pool import session_pool
 
 
 async def send_message(
@@ -67,6 +65,7 @@ async def send_message(
         )
     except FloodWait as f:
         LOGGER.warning(str(f))
+        count_flood_wait("send_message", f.value)
         if not block:
             return message
         await sleep(f.value * 1.2)
@@ -106,6 +105,7 @@ async def edit_message(
         )
     except FloodWait as f:
         LOGGER.warning(str(f))
+        count_flood_wait("edit_message", f.value)
         if not block:
             return message
         await sleep(f.value * 1.2)
@@ -128,6 +128,7 @@ async def send_file(message, file, caption="", buttons=None):
         )
     except FloodWait as f:
         LOGGER.warning(str(f))
+        count_flood_wait("send_file", f.value)
         await sleep(f.value * 1.2)
         return await send_file(message, file, caption, buttons)
     except Exception as e:
@@ -147,6 +148,7 @@ async def send_rss(text, chat_id, thread_id):
         )
     except (FloodWait, FloodPremiumWait) as f:
         LOGGER.warning(str(f))
+        count_flood_wait("send_rss", f.value)
         await sleep(f.value * 1.2)
         return await send_rss(text)
     except Exception as e:
@@ -187,29 +189,41 @@ async def delete_status():
                 LOGGER.error(str(e))
 
 
+async def _prefetch_range(client, chat, start_id, end_id):
+    """
+    Caches the messages of a link range in batches, so the per link lookups
+    of the bulk task that follows need no requests of their own.
+    """
+    try:
+        await session_pool.fetch_messages(
+            client,
+            chat,
+            list(range(start_id, end_id + 1)),
+        )
+    except Exception as e:
+        LOGGER.error(f"Failed to prefetch messages of {chat}: {e}")
+
+
 async def get_tg_link_message(link, user_id=""):
+    """
+    Resolves a Telegram link to its message, or to the links of a range.
+    A pooled user session returned with a single message stays leased to the
+    caller, who releases it with session_pool.release once the transfer ends.
+    """
+    user_session = await session_pool.get(user_id) if user_id else None
+    try:
+        message, client = await _tg_link_message(link, user_session)
+    except BaseException:
+        session_pool.release(user_session)
+        raise
+    if isinstance(message, list) or client is not user_session:
+        session_pool.release(user_session)
+    return message, client
+
+
+async def _tg_link_message(link, user_session):
     message = None
     links = []
-    user_session = None
-
-    if user_id:
-        if user_id in session_cache:
-            user_session = session_cache[user_id]
-        else:
-            user_dict = user_data.get(user_id, {})
-            session_string = user_dict.get("USER_SESSION")
-            if session_string:
-                user_session = Client(
-                    f"session_{user_id}",
-                    Config.TELEGRAM_API,
-                    Config.TELEGRAM_HASH,
-                    session_string=session_string,
-                    no_updates=True,
-                )
-                await user_session.start()
-                session_cache[user_id] = user_session
-            else:
-                user_session = TgClient.user
 
     if link.startswith("https://t.me/"):
         private = False
@@ -233,25 +247,23 @@ async def get_tg_link_message(link, user_id=""):
     if "-" in msg_id:
         start_id, end_id = map(int, msg_id.split("-"))
         msg_id = start_id
-        btw = end_id - start_id
         if private:
             link = link.split("&message_id=")[0]
-            links.append(f"{link}&message_id={start_id}")
-            for _ in range(btw):
-                start_id += 1
-                links.append(f"{link}&message_id={start_id}")
+            links = [f"{link}&message_id={i}" for i in range(start_id, end_id + 1)]
         else:
             link = link.rsplit("/", 1)[0]
-            links.append(f"{link}/{start_id}")
-            for _ in range(btw):
-                start_id += 1
-                links.append(f"{link}/{start_id}")
+            links = [f"{link}/{i}" for i in range(start_id, end_id + 1)]
     else:
         msg_id = int(msg_id)
 
     if chat.isdigit():
         chat = int(chat) if private else int(f"-100{chat}")
 
+    if not links:
+        for client in (TgClient.bot, user_session):
+            if message := session_pool.cached_message(client, chat, msg_id):
+                return message, client
+
     if not private:
         try:
             message = await TgClient.bot.get_messages(
@@ -266,6 +278,8 @@ async def get_tg_link_message(link, user_id=""):
                 raise e
 
     if not private:
+        if links:
+            await _prefetch_range(TgClient.bot, chat, start_id, end_id)
         return (links, TgClient.bot) if links else (message, TgClient.bot)
     if user_session:
         try:
@@ -276,6 +290,8 @@ async def get_tg_link_message(link, user_id=""):
         except Exception as e:
             raise TgLinkException("We don't have access to this chat!") from e
         if not user_message.empty:
+            if links:
+                await _prefetch_range(user_session, chat, start_id, end_id)
             return (links, user_session) if links else (user_message, user_session)
         return None, None
     raise TgLinkException("Private: Please report!")
@@ -287,7 +303,7 @@ async def temp_download(msg):
 
 
 async def update_status_message(sid, force=False):
-    if intervals["stopAll"]:
+    if intervals["stopAll"] or Config.CLUSTER_MODE == "worker":
         return
     async with task_dict_lock:
         if not status_dict.get(sid):
@@ -338,7 +354,8 @@ async def update_status_message(sid, force=False):
 
 
 async def send_status_message(msg, user_id=0):
-    if intervals["stopAll"]:
+    # Cluster workers report progress to the coordinator, which renders it.
+    if intervals["stopAll"] or Config.CLUSTER_MODE == "worker":
         return
     sid = user_id or msg.chat.id
     is_user = bool(user_id)
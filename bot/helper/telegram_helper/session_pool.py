@@ -0,0 +1,163 @@
+from asyncio import Lock
+from collections import OrderedDict
+from hashlib import sha256
+from time import monotonic
+
+from cachetools import TTLCache
+from pyrogram import Client
+
+from bot import LOGGER, bot_loop, user_data
+from bot.core.aeon_client import TgClient
+from bot.core.config_manager import Config
+
+MAX_SESSIONS = 20
+IDLE_TIMEOUT = 36000
+# The most ids get_messages accepts in one request.
+BATCH_SIZE = 200
+
+
+class SessionPool:
+    """
+    Keeps the user sessions of USER_SESSION settings connected between tasks.
+
+    Clients are keyed by their session string, so users sharing an account
+    share one client, and the owner's USER_SESSION_STRING resolves to the
+    already running user client. A pooled client keeps its main connection
+    and the media connections Pyrogram opens per DC, so later fetches and
+    downloads from the same DCs skip the handshake. At most MAX_SESSIONS
+    clients are kept; the least recently used, and those idle for longer than
+    IDLE_TIMEOUT, are stopped gracefully. get() leases the client it returns
+    until release(), and leased clients are never stopped, so a transfer
+    keeps its client however long it runs.
+
+    Messages fetched in batches are cached per client, so the links of a
+    message range resolve without further requests.
+    """
+
+    def __init__(self):
+        self._clients = OrderedDict()
+        self._last_used = {}
+        self._leases = {}
+        self._locks = {}
+        self._messages = TTLCache(maxsize=10000, ttl=3600)
+
+    @staticmethod
+    def _key(session_string):
+        return sha256(session_string.encode()).hexdigest()[:16]
+
+    async def get(self, user_id):
+        """
+        Returns a started client for the user's USER_SESSION, the owner's
+        user client when the user has none, or None. A pooled client is leased
+        to the caller, who has to release() it.
+        """
+        session_string = user_data.get(user_id, {}).get("USER_SESSION")
+        if not session_string:
+            return TgClient.user
+        if session_string == Config.USER_SESSION_STRING and (
+            TgClient.user or Config.CLUSTER_MODE == "worker"
+        ):
+            # Workers never open the coordinator's session.
+            return TgClient.user
+        key = self._key(session_string)
+        async with self._locks.setdefault(key, Lock()):
+            if (client := self._clients.get(key)) is None:
+                client = Client(
+                    f"session_{key}",
+                    Config.TELEGRAM_API,
+                    Config.TELEGRAM_HASH,
+                    proxy=Config.TG_PROXY,
+                    session_string=session_string,
+                    in_memory=True,
+                    no_updates=True,
+                    max_concurrent_transmissions=100,
+                )
+                await client.start()
+                self._clients[key] = client
+                LOGGER.info(f"Started user session for {user_id}")
+            self._clients.move_to_end(key)
+            self._last_used[key] = monotonic()
+            self._leases[key] = self._leases.get(key, 0) + 1
+        await self._evict()
+        return client
+
+    def release(self, client):
+        """Ends a lease of get(). Clients that aren't pooled are ignored."""
+        if client is None:
+            return
+        key = client.name.removeprefix("session_")
+        if self._clients.get(key) is not client or key not in self._leases:
+            return
+        self._last_used[key] = monotonic()
+        self._leases[key] -= 1
+        if self._leases[key] <= 0:
+            del self._leases[key]
+
+    def warm(self, user_id):
+        """Connects the user's session in the background."""
+
+        async def _warm():
+            try:
+                self.release(await self.get(user_id))
+            except Exception as e:
+                LOGGER.error(f"Failed to start user session for {user_id}: {e}")
+
+        bot_loop.create_task(_warm())
+
+    async def _stop(self, key):
+        client = self._clients.pop(key)
+        self._last_used.pop(key, None)
+        self._leases.pop(key, None)
+        self._locks.pop(key, None)
+        for cache_key in [k for k in self._messages if k[0] == client.name]:
+            self._messages.pop(cache_key, None)
+        try:
+            await client.stop()
+        except Exception as e:
+            LOGGER.error(f"Failed to stop {client.name}: {e}")
+
+    async def _evict(self):
+        """Stops idle clients and the least recently used ones above
+        MAX_SESSIONS, skipping leased clients.
+        """
+        now = monotonic()
+        for key in list(self._clients):
+            if key in self._leases:
+                continue
+            if (
+                len(self._clients) > MAX_SESSIONS
+                or now - self._last_used[key] > IDLE_TIMEOUT
+            ):
+                await self._stop(key)
+
+    async def stop_all(self):
+        for key in list(self._clients):
+            await self._stop(key)
+
+    async def fetch_messages(self, client, chat_id, message_ids):
+        """
+        Fetches messages in batches of BATCH_SIZE ids and caches the ones
+        that exist for this client.
+
+        Returns:
+            list: The non-empty messages, in id order.
+        """
+        messages = []
+        for i in range(0, len(message_ids), BATCH_SIZE):
+            batch = await client.get_messages(
+                chat_id=chat_id,
+                message_ids=message_ids[i : i + BATCH_SIZE],
+            )
+            for message in batch:
+                if message and not message.empty:
+                    self._messages[(client.name, chat_id, message.id)] = message
+                    messages.append(message)
+        return messages
+
+    def cached_message(self, client, chat_id, message_id):
+        if client is None:
+            return None
+        return self._messages.get((client.name, chat_id, message_id))
+
+
+session_pool = SessionPool()
@@ -1,8 +1,9 @@
 from .bot_settings import edit_bot_settings, send_bot_settings
-from .broadcast import broadcast
+from .broadcast import broadcast, resume_broadcast
 from .cancel_task import cancel, cancel_all_buttons, cancel_all_update, cancel_multi
 from .chat_permission import add_sudo, authorize, remove_sudo, unauthorize
 from .clone import clone_node
+from .cluster import CLUSTER_COMMANDS, coordinator, start_cluster
 from .exec import aioexecute, clear, execute
 from .file_selector import confirm_selection, select
 from .force_start import remove_from_queue
@@ -20,6 +21,8 @@ from .mirror_leech import (
     nzb_mirror,
 )
 from .nzb_search import hydra_search
+from .priority import set_priority
+from .profiler import loop_profile
 from .restart import (
     confirm_restart,
     restart_bot,
@@ -41,6 +44,7 @@ from .users_settings import (
 from .ytdlp import ytdl, ytdl_leech
 
 __all__ = [
+    "CLUSTER_COMMANDS",
     "add_sudo",
     "aeon_callback",
     "aioexecute",
@@ -57,6 +61,7 @@ __all__ = [
     "clone_node",
     "confirm_restart",
     "confirm_selection",
+    "coordinator",
     "count_node",
     "delete_file",
     "edit_bot_settings",
@@ -72,6 +77,7 @@ __all__ = [
     "jd_mirror",
     "leech",
     "log",
+    "loop_profile",
     "mediainfo",
     "mirror",
     "nzb_leech",
@@ -81,15 +87,18 @@ __all__ = [
     "remove_sudo",
     "restart_bot",
     "restart_notification",
+    "resume_broadcast",
     "rss_listener",
     "run_shell",
     "select",
     "select_type",
     "send_bot_settings",
     "send_user_settings",
+    "set_priority",
     "spectrum_handler",
     "speedtest",
     "start",
+    "start_cluster",
     "status_pages",
     "task_status",
     "torrent_search",
@@ -2,19 +2,15 @@ from asyncio import (
     create_subprocess_exec,
     create_subprocess_shell,
     gather,
-    sleep,
 )
 from functools import partial
 from io import BytesIO
 from os import getcwd
-from time import time
 
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
 from aiofiles.os import remove, rename
 from aioshutil import rmtree
-from pyrogram.filters import create
-from pyrogram.handlers import MessageHandler
 
 from bot import (
     LOGGER,
@@ -40,6 +36,7 @@ from bot.helper.ext_utils.db_handler import database
 from bot.helper.ext_utils.task_manager import start_from_queued
 from bot.helper.mirror_leech_utils.rclone_utils.serve import rclone_serve_booter
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.conversation import conversation
 from bot.helper.telegram_helper.message_utils import (
     delete_message,
     edit_message,
@@ -52,10 +49,13 @@ from .rss import add_job
 
 start = 0
 state = "view"
-handler_dict = {}
 DEFAULT_VALUES = {
     "LEECH_SPLIT_SIZE": TgClient.MAX_SPLIT_SIZE,
     "RSS_DELAY": 600,
+    "BATCH_ADMISSION_RATE": 2,
+    "QUEUE_AGING_TIME": 600,
+    "CLUSTER_LEASE": 60,
+    "CLUSTER_MAX_ATTEMPTS": 3,
     "UPSTREAM_BRANCH": "main",
     "DEFAULT_UPLOAD": "gd",
     "GOFILE_API": "",
@@ -196,7 +196,6 @@ async def update_buttons(message, key=None, edit_type=None):
 
 @new_task
 async def edit_variable(_, message, pre_message, key):
-    handler_dict[message.chat.id] = False
     value = message.text
     if value.lower() == "true":
         value = True
@@ -252,7 +251,12 @@ async def edit_variable(_, message, pre_message, key):
     await update_buttons(pre_message, "var")
     await delete_message(message)
     await database.update_config({key: value})
-    if key in ["QUEUE_ALL", "QUEUE_DOWNLOAD", "QUEUE_UPLOAD"]:
+    if key in [
+        "QUEUE_ALL",
+        "QUEUE_DOWNLOAD",
+        "QUEUE_UPLOAD",
+        "QUEUE_USER_LIMIT",
+    ]:
         await start_from_queued()
     elif key in [
         "RCLONE_SERVE_URL",
@@ -272,7 +276,6 @@ async def edit_variable(_, message, pre_message, key):
 
 @new_task
 async def edit_nzb(_, message, pre_message, key):
-    handler_dict[message.chat.id] = False
     value = message.text
     if value.isdigit():
         value = int(value)
@@ -292,7 +295,6 @@ async def edit_nzb(_, message, pre_message, key):
 
 @new_task
 async def edit_nzb_server(_, message, pre_message, key, index=0):
-    handler_dict[message.chat.id] = False
     value = message.text
     if key == "newser":
         if value.startswith("{") and value.endswith("}"):
@@ -343,7 +345,6 @@ async def sync_jdownloader():
 
 @new_task
 async def update_private_file(_, message, pre_message):
-    handler_dict[message.chat.id] = False
     if not message.media and (file_name := message.text):
         if await aiopath.isfile(file_name) and file_name != "config.py":
             await remove(file_name)
@@ -421,35 +422,25 @@ async def update_private_file(_, message, pre_message):
 
 
 async def event_handler(client, query, pfunc, rfunc, document=False):
-    chat_id = query.message.chat.id
-    handler_dict[chat_id] = True
-    start_time = time()
-
-    async def event_filter(_, __, event):
-        user = event.from_user or event.sender_chat
-        return bool(
-            user.id == query.from_user.id
-            and event.chat.id == chat_id
-            and (event.text or (event.document and document)),
+    try:
+        event = await conversation.wait_for_message(
+            "bset",
+            query.message.chat.id,
+            query.from_user.id,
+            lambda event: bool(event.text or (event.document and document)),
         )
-
-    handler = client.add_handler(
-        MessageHandler(pfunc, filters=create(event_filter)),
-        group=-1,
-    )
-    while handler_dict[chat_id]:
-        await sleep(0.5)
-        if time() - start_time > 60:
-            handler_dict[chat_id] = False
-            await rfunc()
-    client.remove_handler(*handler)
+    except TimeoutError:
+        await rfunc()
+        return
+    if event is not None:
+        await pfunc(client, event)
 
 
 @new_task
 async def edit_bot_settings(client, query):
     data = query.data.split()
     message = query.message
-    handler_dict[message.chat.id] = False
+    conversation.cancel("bset", chat_id=message.chat.id)
     if data[1] == "close":
         await query.answer()
         await delete_message(message.reply_to_message)
@@ -525,7 +516,12 @@ async def edit_bot_settings(client, query):
         if data[2] == "DATABASE_URL":
             await database.disconnect()
         await database.update_config({data[2]: value})
-        if data[2] in ["QUEUE_ALL", "QUEUE_DOWNLOAD", "QUEUE_UPLOAD"]:
+        if data[2] in [
+            "QUEUE_ALL",
+            "QUEUE_DOWNLOAD",
+            "QUEUE_UPLOAD",
+            "QUEUE_USER_LIMIT",
+        ]:
             await start_from_queued()
         elif data[2] in [
             "RCLONE_SERVE_URL",
@@ -657,7 +653,7 @@ async def edit_bot_settings(client, query):
 
 @new_task
 async def send_bot_settings(_, message):
-    handler_dict[message.chat.id] = False
+    conversation.cancel("bset", chat_id=message.chat.id)
     msg, button = await get_buttons()
     globals()["start"] = 0
     await send_message(message, msg, button)
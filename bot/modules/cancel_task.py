@@ -1,12 +1,14 @@
-from asyncio import sleep
-
 from bot import multi_tags, task_dict, task_dict_lock, user_data
 from bot.core.aeon_client import Config
+from bot.helper.ext_utils.batch_utils import batch_owner, cancel_batch
 from bot.helper.ext_utils.bot_utils import new_task
+from bot.helper.ext_utils.cancel_utils import cancel_tasks
 from bot.helper.ext_utils.status_utils import (
     MirrorStatus,
     get_all_tasks,
+    get_readable_time,
     get_task_by_gid,
+    get_task_by_message,
 )
 from bot.helper.telegram_helper import button_build
 from bot.helper.telegram_helper.filters import CustomFilters
@@ -18,6 +20,12 @@ from bot.helper.telegram_helper.message_utils import (
 )
 
 
+def _can_cancel(user_id, owner_id):
+    return user_id in (Config.OWNER_ID, owner_id) or (
+        user_id in user_data and user_data[user_id].get("SUDO")
+    )
+
+
 @new_task
 async def cancel(_, message):
     user_id = message.from_user.id if message.from_user else message.sender_chat.id
@@ -27,22 +35,21 @@ async def cancel(_, message):
         gid = msg[1].split("@", maxsplit=1)
         gid = gid[0]
         if len(gid) == 4:
-            multi_tags.discard(gid)
+            owner_id = await batch_owner(gid)
+            if owner_id is not None and _can_cancel(user_id, owner_id):
+                await cancel_batch(gid)
             return
         task = await get_task_by_gid(gid)
         if task is None:
             await delete_message(message)
             return
     elif reply_to_id := message.reply_to_message_id:
-        async with task_dict_lock:
-            task = task_dict.get(reply_to_id)
+        task = await get_task_by_message(reply_to_id)
         if task is None:
             return
     elif len(msg) == 1:
         return
-    if user_id not in (Config.OWNER_ID, task.listener.user_id) and (
-        user_id not in user_data or not user_data[user_id].get("SUDO")
-    ):
+    if not _can_cancel(user_id, task.listener.user_id):
         return
     obj = task.task()
     await obj.cancel_task()
@@ -68,12 +75,15 @@ async def cancel_multi(_, query):
 async def cancel_all(status, user_id):
     matches = await get_all_tasks(status.strip(), user_id)
     if not matches:
-        return False
-    for task in matches:
-        obj = task.task()
-        await obj.cancel_task()
-        await sleep(2)
-    return True
+        return None
+    cancelled, failed, elapsed = await cancel_tasks(matches)
+    msg = f"Cancelled {sum(cancelled.values())} {status} tasks"
+    msg += f" in {get_readable_time(elapsed, True) or '0 seconds'}"
+    if cancelled:
+        msg += f"\n{' | '.join(f'{tool}: {count}' for tool, count in cancelled.items())}"
+    if failed:
+        msg += f"\nFailed: {failed}"
+    return msg
 
 
 def create_cancel_buttons(is_sudo, user_id=""):
@@ -188,5 +198,4 @@ async def cancel_all_update(_, query):
         button = create_cancel_buttons(is_sudo, user_id)
         await edit_message(message, "Choose tasks to cancel.", button)
         res = await cancel_all(data[1], user_id)
-        if not res:
-            await send_message(reply_to, f"No matching tasks for {data[1]}!")
+        await send_message(reply_to, res or f"No matching tasks for {data[1]}!")
@@ -1,4 +1,3 @@
-from asyncio import gather
 from json import loads
 from secrets import token_hex
 
@@ -63,11 +62,12 @@ class Clone(TaskListener):
     async def new_event(self):
         text = self.message.text.split("\n")
         input_list = text[0].split(" ")
-        error_msg, error_button = await error_check(self.message)
-        if error_msg:
-            await delete_links(self.message)
-            error = await send_message(self.message, error_msg, error_button)
-            return await auto_delete_message(error, time=300)
+        if not self.batch:
+            error_msg, error_button = await error_check(self.message)
+            if error_msg:
+                await delete_links(self.message)
+                error = await send_message(self.message, error_msg, error_button)
+                return await auto_delete_message(error, time=300)
         args = {
             "link": "",
             "-i": 0,
@@ -246,54 +246,18 @@ class Clone(TaskListener):
             if not destination:
                 return
             LOGGER.info(f"Cloning Done: {self.name}")
-            cmd1 = [
-                "xone",
-                "lsf",
-                "--fast-list",
-                "-R",
-                "--files-only",
-                "--config",
+            files, folders, size, error = await RCTransfer.count(
                 config_path,
                 destination,
-            ]
-            cmd2 = [
-                "xone",
-                "lsf",
-                "--fast-list",
-                "-R",
-                "--dirs-only",
-                "--config",
-                config_path,
-                destination,
-            ]
-            cmd3 = [
-                "xone",
-                "size",
-                "--fast-list",
-                "--json",
-                "--config",
-                config_path,
-                destination,
-            ]
-            res1, res2, res3 = await gather(
-                cmd_exec(cmd1),
-                cmd_exec(cmd2),
-                cmd_exec(cmd3),
             )
-            if res1[2] != 0 or res2[2] != 0 or res3[2] != 0:
-                if res1[2] == -9:
-                    return
-                files = None
-                folders = None
+            if self.is_cancelled:
+                return
+            if error is not None:
                 self.size = 0
-                error = res1[1] or res2[1] or res3[1]
                 msg = f"Error: While getting rclone stat. Path: {destination}. Stderr: {error[:4000]}"
                 await self.on_upload_error(msg)
             else:
-                files = len(res1[0].split("\n"))
-                folders = len(res2[0].strip().split("\n")) if res2[0] else 0
-                rsize = loads(res3[0])
-                self.size = rsize["bytes"]
+                self.size = size
                 await self.on_upload_complete(
                     flink,
                     files,
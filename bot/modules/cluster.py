@@ -0,0 +1,403 @@
+import contextlib
+from asyncio import gather, iscoroutinefunction, sleep
+from datetime import UTC, datetime
+from os import getpid
+from socket import gethostname
+from time import monotonic
+
+from aiofiles.os import makedirs
+
+from bot import (
+    DOWNLOAD_DIR,
+    LOGGER,
+    bot_loop,
+    intervals,
+    multi_tags,
+    non_queued_dl,
+    non_queued_up,
+    queued_dl,
+    queued_up,
+    task_dict,
+    task_dict_lock,
+)
+from bot.core.aeon_client import TgClient
+from bot.core.config_manager import Config
+from bot.core.startup import load_user
+from bot.helper.ext_utils.batch_utils import batches, cancel_batch
+from bot.helper.ext_utils.db_handler import database
+from bot.helper.ext_utils.files_utils import clean_download
+from bot.helper.mirror_leech_utils.status_utils.cluster_status import (
+    ClusterStatus,
+    RemoteListener,
+)
+from bot.helper.telegram_helper.message_utils import (
+    delete_status,
+    send_message,
+    send_status_message,
+)
+
+from .mirror_leech import (
+    jd_leech,
+    jd_mirror,
+    leech,
+    mirror,
+    nzb_leech,
+    nzb_mirror,
+)
+
+# The commands workers run. Everything else, and commands that ask the user
+# for input while they run, stay on the coordinator.
+CLUSTER_COMMANDS = {
+    "mirror": mirror,
+    "leech": leech,
+    "jd_mirror": jd_mirror,
+    "jd_leech": jd_leech,
+    "nzb_mirror": nzb_mirror,
+    "nzb_leech": nzb_leech,
+}
+# Arguments that make a command ask for input: -s selects files, and rcl or
+# gdl as the link or -up value open the rclone and Drive path pickers.
+LOCAL_ARGS = {"-s", "rcl", "gdl"}
+POLL_INTERVAL = 5
+PROGRESS_FIELDS = (
+    "progress_raw",
+    "processed_raw",
+    "size_raw",
+    "speed_raw",
+    "eta_raw",
+    "seeders_num",
+    "leechers_num",
+    "seed_speed",
+    "uploaded_bytes",
+    "ratio",
+    "seeding_time",
+)
+
+
+class Coordinator:
+    """
+    Queues the mirror and leech commands of the bot front end in the database
+    and mirrors the progress workers report into task_dict, so the status
+    message shows remote tasks like local ones. Tasks whose worker stopped
+    renewing its lease are re-queued, up to CLUSTER_MAX_ATTEMPTS times.
+    """
+
+    def route(self, kind, func):
+        """Wraps a command handler so that its tasks run on the workers."""
+
+        async def handler(client, message):
+            args = set(message.text.split("\n", 1)[0].split()[1:])
+            if args & LOCAL_ARGS or not await self.submit(kind, message):
+                await func(client, message)
+
+        return handler
+
+    async def submit(self, kind, message):
+        """Queues a command, returns False if it has to run locally."""
+        if database.db is None:
+            return False
+        user = message.from_user or message.sender_chat
+        name = message.text.split("\n", 1)[0].partition(" ")[2][:100]
+        doc = {
+            "_id": f"{message.chat.id}:{message.id}",
+            "kind": kind,
+            "chat_id": message.chat.id,
+            "message_id": message.id,
+            "user_id": user.id,
+            "name": name or "Replied message",
+            "state": "queued",
+            "worker": None,
+            "lease": None,
+            "attempts": 0,
+            "cancel": False,
+            "progress": None,
+            "created": datetime.now(UTC),
+        }
+        if await database.cluster_submit(doc):
+            async with task_dict_lock:
+                task_dict[message.id] = ClusterStatus(
+                    RemoteListener(message, user.id, doc["name"]),
+                    doc,
+                )
+            await send_status_message(message)
+        return True
+
+    async def _requeue_expired(self):
+        for doc in await database.cluster_expired():
+            if doc["attempts"] >= Config.CLUSTER_MAX_ATTEMPTS:
+                LOGGER.error(
+                    f"Cluster task {doc['_id']} failed, lost on {doc['attempts']} workers",
+                )
+                await database.cluster_remove(doc["_id"])
+                with contextlib.suppress(Exception):
+                    message = await TgClient.bot.get_messages(
+                        doc["chat_id"],
+                        doc["message_id"],
+                    )
+                    await send_message(
+                        message,
+                        f"Task failed: {doc['attempts']} workers stopped responding while running it.",
+                    )
+            else:
+                LOGGER.warning(
+                    f"Worker {doc['worker']} stopped responding, re-queued {doc['_id']}",
+                )
+                await database.cluster_requeue(doc["_id"], doc["worker"])
+
+    async def sync(self):
+        await self._requeue_expired()
+        synced = monotonic()
+        docs = {doc["_id"]: doc for doc in await database.cluster_tasks()}
+        async with task_dict_lock:
+            removed = False
+            for mid, task in list(task_dict.items()):
+                if not isinstance(task, ClusterStatus):
+                    continue
+                if doc := docs.pop(task.task_id, None):
+                    task.update(doc)
+                elif task.added < synced:
+                    del task_dict[mid]
+                    removed = True
+            count = len(task_dict)
+        # Tasks queued before the coordinator restarted.
+        for doc in docs.values():
+            with contextlib.suppress(Exception):
+                message = await TgClient.bot.get_messages(
+                    doc["chat_id"],
+                    doc["message_id"],
+                )
+                if message.empty:
+                    await database.cluster_remove(doc["_id"])
+                    continue
+                async with task_dict_lock:
+                    task_dict[message.id] = ClusterStatus(
+                        RemoteListener(message, doc["user_id"], doc["name"]),
+                        doc,
+                    )
+                    count = len(task_dict)
+        if removed and count == 0:
+            for intvl in list(intervals["status"].values()):
+                intvl.cancel()
+            intervals["status"].clear()
+            await delete_status()
+
+    async def run(self):
+        await database.setup_cluster()
+        LOGGER.info("Cluster coordinator started")
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                LOGGER.error(f"Cluster sync failed: {e}")
+            await sleep(POLL_INTERVAL)
+
+
+class _Claim:
+    __slots__ = ("cancelled", "load", "mid", "start", "tag")
+
+    def __init__(self, mid):
+        self.mid = mid
+        # The new_event task of the command, the task is not in the queues
+        # before it returns.
+        self.start = None
+        # The multi_tag of the -b/-i batch the command started, its items
+        # run under their own mids.
+        self.tag = None
+        self.load = 1
+        self.cancelled = False
+
+
+class Worker:
+    """
+    Claims tasks from the cluster queue and runs them through the normal
+    command handlers. No more are claimed while WORKER_TASKS local tasks,
+    batch items included, are running.
+
+    Every POLL_INTERVAL seconds the worker renews the leases of its tasks,
+    which doubles as its heartbeat, and stores their progress for the
+    coordinator. A task is done once its command handler returned, its mid
+    left every local queue and task_dict and the batch it started, if any,
+    has no items left. Cancel
+    requests of the coordinator are applied to the local task or batch, and
+    a task whose lease was lost to another worker is cancelled.
+    """
+
+    def __init__(self):
+        self.worker_id = ""
+        self._claims = {}
+
+    @staticmethod
+    def _find_batch(claim):
+        if claim.tag is None:
+            for batch in list(batches.values()):
+                if batch.mid == claim.mid:
+                    claim.tag = batch.tag
+                    break
+
+    @staticmethod
+    def _tasks(claim):
+        """The tasks of a claim in task_dict, its own first. Needs the lock."""
+        tasks = [task_dict[claim.mid]] if claim.mid in task_dict else []
+        if claim.tag is not None:
+            tasks.extend(
+                task
+                for mid, task in task_dict.items()
+                if mid != claim.mid and task.listener.multi_tag == claim.tag
+            )
+        return tasks
+
+    @staticmethod
+    def _is_running(claim):
+        mid = claim.mid
+        return (
+            mid in queued_dl
+            or mid in queued_up
+            or mid in non_queued_dl
+            or mid in non_queued_up
+            # Still admitting items, or items between admission and task_dict.
+            or (
+                claim.tag is not None
+                and (claim.tag in multi_tags or claim.tag in batches)
+            )
+        )
+
+    @staticmethod
+    async def _snapshot(task):
+        listener = task.listener
+        if hasattr(task, "seeding"):
+            await task.update()
+        status = (
+            await task.status()
+            if iscoroutinefunction(task.status)
+            else task.status()
+        )
+        snapshot = {
+            "status": status,
+            "name": task.name(),
+            "gid": str(task.gid()),
+            "tool": task.tool,
+            "subname": listener.subname,
+            "subsize": listener.subsize,
+            "files": len(listener.files_to_proceed),
+            "proceed_count": listener.proceed_count,
+            "show_progress": listener.progress,
+            "is_torrent": listener.is_torrent,
+            "is_qbit": listener.is_qbit,
+        }
+        for field in PROGRESS_FIELDS:
+            with contextlib.suppress(Exception):
+                snapshot[field] = getattr(task, field)()
+        return snapshot
+
+    async def _cancel(self, claim):
+        """
+        Cancels the local task of a claim once it is in task_dict, or its
+        whole batch.
+        """
+        if claim.cancelled:
+            return
+        self._find_batch(claim)
+        if claim.tag is not None:
+            claim.cancelled = True
+            await cancel_batch(claim.tag)
+            return
+        async with task_dict_lock:
+            task = task_dict.get(claim.mid)
+        if task is not None:
+            claim.cancelled = True
+            await task.task().cancel_task()
+
+    async def _heartbeat(self):
+        progress = {}
+        for task_id, claim in list(self._claims.items()):
+            self._find_batch(claim)
+            async with task_dict_lock:
+                tasks = self._tasks(claim)
+            claim.load = max(len(tasks), 1)
+            if not (tasks or self._is_running(claim) or claim.start.done()):
+                del self._claims[task_id]
+                await database.cluster_finish(task_id, self.worker_id)
+                continue
+            progress[task_id] = None
+            if tasks:
+                try:
+                    progress[task_id] = await self._snapshot(tasks[0])
+                except Exception as e:
+                    LOGGER.error(f"Cluster progress of {task_id} failed: {e}")
+        held = await database.cluster_renew(
+            self.worker_id,
+            progress,
+            Config.CLUSTER_LEASE,
+        )
+        for task_id, claim in list(self._claims.items()):
+            if task_id not in held:
+                LOGGER.warning(f"Lost the lease of {task_id}, cancelling it")
+                del self._claims[task_id]
+                await self._cancel(claim)
+            elif held[task_id]:
+                await self._cancel(claim)
+
+    async def _start(self, doc):
+        message = await TgClient.bot.get_messages(doc["chat_id"], doc["message_id"])
+        if message.empty:
+            await database.cluster_finish(doc["_id"], self.worker_id)
+            return
+        if row := await database.get_user(doc["user_id"]):
+            await gather(
+                *(
+                    makedirs(p, exist_ok=True)
+                    for p in ["thumbnails", "tokens", "rclone"]
+                ),
+            )
+            await load_user(row)
+        LOGGER.info(f"Running cluster task {doc['_id']} (attempt {doc['attempts']})")
+        claim = _Claim(message.id)
+        self._claims[doc["_id"]] = claim
+        claim.start = await CLUSTER_COMMANDS[doc["kind"]](TgClient.bot, message)
+
+    async def _claim(self):
+        while (
+            sum(claim.load for claim in self._claims.values()) < Config.WORKER_TASKS
+        ):
+            doc = await database.cluster_claim(self.worker_id, Config.CLUSTER_LEASE)
+            if doc is None:
+                return
+            try:
+                await self._start(doc)
+            except Exception as e:
+                LOGGER.error(f"Failed to start cluster task {doc['_id']}: {e}")
+                self._claims.pop(doc["_id"], None)
+                if doc["attempts"] >= Config.CLUSTER_MAX_ATTEMPTS:
+                    await database.cluster_remove(doc["_id"])
+                else:
+                    await database.cluster_requeue(doc["_id"], self.worker_id)
+
+    async def run(self):
+        self.worker_id = Config.WORKER_ID or f"{gethostname()}-{getpid()}"
+        await database.setup_cluster()
+        for doc in await database.cluster_release(self.worker_id):
+            LOGGER.info(f"Re-queued {doc['_id']} left over from the last run")
+            await clean_download(f"{DOWNLOAD_DIR}{doc['message_id']}")
+        LOGGER.info(f"Cluster worker {self.worker_id} started")
+        while True:
+            try:
+                await self._heartbeat()
+                await self._claim()
+            except Exception as e:
+                LOGGER.error(f"Cluster worker loop failed: {e}")
+            await sleep(POLL_INTERVAL)
+
+
+coordinator = Coordinator()
+worker = Worker()
+
+
+async def start_cluster():
+    if not Config.CLUSTER_MODE:
+        return
+    if database.db is None:
+        LOGGER.error("Cluster mode needs DATABASE_URL, running standalone")
+        Config.CLUSTER_MODE = ""
+        return
+    node = worker if Config.CLUSTER_MODE == "worker" else coordinator
+    bot_loop.create_task(node.run())
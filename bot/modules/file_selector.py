@@ -4,11 +4,15 @@ from asyncio import iscoroutinefunction
 from aiofiles.os import path as aiopath
 from aiofiles.os import remove
 
-from bot import LOGGER, sabnzbd_client, task_dict, task_dict_lock, user_data
+from bot import LOGGER, sabnzbd_client, user_data
 from bot.core.config_manager import Config
 from bot.core.torrent_manager import TorrentManager
 from bot.helper.ext_utils.bot_utils import bt_selection_buttons, new_task
-from bot.helper.ext_utils.status_utils import MirrorStatus, get_task_by_gid
+from bot.helper.ext_utils.status_utils import (
+    MirrorStatus,
+    get_task_by_gid,
+    get_task_by_message,
+)
 from bot.helper.telegram_helper.message_utils import (
     delete_message,
     send_message,
@@ -30,8 +34,7 @@ async def select(_, message):
             await send_message(message, f"GID: <code>{gid}</code> Not Found.")
             return
     elif reply_to_id := message.reply_to_message_id:
-        async with task_dict_lock:
-            task = task_dict.get(reply_to_id)
+        task = await get_task_by_message(reply_to_id)
         if task is None:
             await send_message(message, "This is not an active task!")
             return
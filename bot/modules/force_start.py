@@ -2,13 +2,11 @@ from bot import (
     queue_dict_lock,
     queued_dl,
     queued_up,
-    task_dict,
-    task_dict_lock,
     user_data,
 )
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import new_task
-from bot.helper.ext_utils.status_utils import get_task_by_gid
+from bot.helper.ext_utils.status_utils import get_task_by_gid, get_task_by_message
 from bot.helper.ext_utils.task_manager import (
     start_dl_from_queued,
     start_up_from_queued,
@@ -29,8 +27,7 @@ async def remove_from_queue(_, message):
             await send_message(message, f"GID: <code>{gid}</code> Not Found.")
             return
     elif reply_to_id := message.reply_to_message_id:
-        async with task_dict_lock:
-            task = task_dict.get(reply_to_id)
+        task = await get_task_by_message(reply_to_id)
         if task is None:
             await send_message(message, "This is not an active task!")
             return
@@ -3,10 +3,18 @@ IMDB Integration Module for Auto Rename Feature
 Provides IMDB data fetching for movies and TV series
 """
 
+import re
+from asyncio import Lock, shield, wait_for
 from logging import getLogger
+from time import monotonic
 from urllib.parse import quote_plus
 
-import requests
+from cachetools import TTLCache
+from httpx import AsyncClient
+
+from bot import bot_loop
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.db_handler import database
 
 try:
     from bs4 import BeautifulSoup
@@ -15,126 +23,235 @@ except Exception:
 
 LOGGER = getLogger(__name__)
 
+IMDB_URL = "https://www.imdb.com"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+LOOKUP_TIMEOUT = 15
+CACHE_TTL = 7 * 86400
+MISS_TTL = 6 * 3600
+
 
-def get_poster(query):
+def lookup_key(query):
     """
-    Fetch IMDB information for a given title
+    Normalizes a title into (title, year, season), so that every episode of
+    a season and every spelling of a release name share one lookup.
+    """
+    query = query.lower()
+    year = ""
+    if match := re.search(r"\b(19\d{2}|20\d{2})\b", query):
+        year = match.group(1)
+        query = query[: match.start()] + query[match.end() :]
+    season = ""
+    if match := re.search(r"\b(?:s|season\s*)(\d{1,2})(?:e\d+)?\b", query):
+        season = str(int(match.group(1)))
+        query = query[: match.start()] + query[match.end() :]
+    title = " ".join(re.sub(r"[^\w\s]|_", " ", query).split())
+    return title, year, season
 
-    Args:
-        query (str): Title to search (can include year)
 
-    Returns:
-        dict: IMDB data with keys: title, year, rating, genres, poster
-        None: If lookup fails
+class CircuitBreaker:
     """
-    if not query or not query.strip():
-        return None
+    Stops calling a failing service for `reset_after` seconds once it failed
+    `threshold` times in a row. One call is let through afterwards, and its
+    outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, threshold=3, reset_after=300):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self._failures = 0
+        self._opened_at = None
+
+    def allow(self):
+        if self._opened_at is None:
+            return True
+        if monotonic() - self._opened_at >= self.reset_after:
+            self._opened_at = monotonic()
+            return True
+        return False
+
+    def success(self):
+        self._failures = 0
+        self._opened_at = None
+
+    def failure(self):
+        self._failures += 1
+        if self._failures >= self.threshold:
+            if self._opened_at is None:
+                LOGGER.warning(
+                    f"IMDB lookups paused for {self.reset_after}s after {self._failures} failures",
+                )
+            self._opened_at = monotonic()
 
-    # If BeautifulSoup is not available, skip IMDB lookup gracefully
-    if BeautifulSoup is None:
-        LOGGER.warning("bs4 (BeautifulSoup) not installed; skipping IMDB lookup")
+
+def _parse_search(content):
+    soup = BeautifulSoup(content, "html.parser")
+    result = soup.find("section", {"data-testid": "find-results-section-title"})
+    if not result:
+        return None
+    first_result = result.find("a")
+    if not first_result or not first_result.get("href"):
         return None
+    return first_result["href"].split("/title/")[1].split("/")[0]
 
-    try:
-        # Clean the query
-        query = query.strip()
 
-        # Search IMDB
-        search_url = (
-            f"https://www.imdb.com/find?q={quote_plus(query)}&s=tt&ttype=ft,tv"
-        )
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
+def _parse_title(content, query):
+    soup = BeautifulSoup(content, "html.parser")
 
-        response = requests.get(search_url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            LOGGER.warning(
-                f"IMDB search failed with status code: {response.status_code}"
-            )
-            return None
+    title_elem = soup.find("h1", {"data-testid": "hero__primary-text"})
+    title = title_elem.text.strip() if title_elem else query
 
-        soup = BeautifulSoup(response.content, "html.parser")
+    year = ""
+    year_elem = soup.find(
+        "a", {"href": lambda x: x and "/releaseinfo" in x if x else False}
+    )
+    if year_elem:
+        year = year_elem.text.strip()
 
-        # Find first result
-        result = soup.find("section", {"data-testid": "find-results-section-title"})
-        if not result:
-            LOGGER.warning(f"No IMDB results found for: {query}")
-            return None
+    rating = ""
+    rating_elem = soup.find(
+        "span", {"class": lambda x: x and "sc-" in x if x else False}
+    )
+    if rating_elem and rating_elem.text:
+        rating_value = rating_elem.text.strip()
+        if rating_value.replace(".", "").isdigit():
+            rating = rating_value
 
-        first_result = result.find("a")
-        if not first_result or not first_result.get("href"):
-            return None
+    genres = ""
+    genre_section = soup.find("div", {"data-testid": "genres"})
+    if genre_section:
+        genres = ", ".join(g.text.strip() for g in genre_section.find_all("a"))
 
-        # Get IMDB ID
-        imdb_id = first_result["href"].split("/title/")[1].split("/")[0]
+    poster = ""
+    poster_elem = soup.find(
+        "img", {"class": lambda x: x and "ipc-image" in x if x else False}
+    )
+    if poster_elem and poster_elem.get("src"):
+        poster = poster_elem["src"]
 
-        # Fetch title page
-        title_url = f"https://www.imdb.com/title/{imdb_id}/"
-        response = requests.get(title_url, headers=headers, timeout=10)
-        if response.status_code != 200:
-            return None
+    return {
+        "title": title,
+        "year": year,
+        "rating": rating,
+        "genres": genres,
+        "poster": poster,
+    }
 
-        soup = BeautifulSoup(response.content, "html.parser")
 
-        # Extract title
-        title_elem = soup.find("h1", {"data-testid": "hero__primary-text"})
-        title = title_elem.text.strip() if title_elem else query
+class ImdbProvider:
+    """
+    Looks up IMDB data without blocking the event loop.
 
-        # Extract year
-        year = ""
-        year_elem = soup.find(
-            "a", {"href": lambda x: x and "/releaseinfo" in x if x else False}
-        )
-        if year_elem:
-            year = year_elem.text.strip()
+    Lookups are keyed by the normalized (title, year, season) and answered
+    from an in-memory LRU, then from a TTL collection in the database, and
+    only then from IMDB. Concurrent lookups of one key share a single
+    request, failed lookups are cached for a shorter time, and a circuit
+    breaker skips IMDB while it keeps failing, so uploads never wait on it.
+    """
+
+    def __init__(self, base_url=IMDB_URL):
+        self.base_url = base_url
+        self._client = None
+        self._client_lock = Lock()
+        self._cache = TTLCache(maxsize=1024, ttl=MISS_TTL)
+        self._inflight = {}
+        self._breaker = CircuitBreaker()
 
-        # Extract rating
-        rating = ""
-        rating_elem = soup.find(
-            "span", {"class": lambda x: x and "sc-" in x if x else False}
+    async def _get_client(self):
+        async with self._client_lock:
+            if self._client is None:
+                self._client = AsyncClient(
+                    headers={"User-Agent": USER_AGENT},
+                    timeout=10,
+                    follow_redirects=True,
+                )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _fetch(self, query):
+        client = await self._get_client()
+        response = await client.get(
+            f"{self.base_url}/find?q={quote_plus(query)}&s=tt&ttype=ft,tv",
         )
-        if rating_elem and rating_elem.text:
-            try:
-                rating_value = rating_elem.text.strip()
-                if rating_value.replace(".", "").isdigit():
-                    rating = rating_value
-            except:
-                pass
-
-        # Extract genres
-        genres = ""
-        genre_section = soup.find("div", {"data-testid": "genres"})
-        if genre_section:
-            genre_links = genre_section.find_all("a")
-            genre_list = [g.text.strip() for g in genre_links]
-            genres = ", ".join(genre_list)
-
-        # Extract poster
-        poster = ""
-        poster_elem = soup.find(
-            "img", {"class": lambda x: x and "ipc-image" in x if x else False}
+        if response.status_code != 200:
+            raise ValueError(f"search returned {response.status_code}")
+        imdb_id = await sync_to_async(_parse_search, response.content)
+        if not imdb_id:
+            LOGGER.warning(f"No IMDB results found for: {query}")
+            return None
+        response = await client.get(f"{self.base_url}/title/{imdb_id}/")
+        if response.status_code != 200:
+            raise ValueError(f"title page returned {response.status_code}")
+        imdb_data = await sync_to_async(_parse_title, response.content, query)
+        LOGGER.info(
+            f"IMDB data fetched successfully for: {imdb_data['title']} ({imdb_data['year']})",
         )
-        if poster_elem and poster_elem.get("src"):
-            poster = poster_elem["src"]
-
-        imdb_data = {
-            "title": title,
-            "year": year,
-            "rating": rating,
-            "genres": genres,
-            "poster": poster,
-        }
-
-        LOGGER.info(f"IMDB data fetched successfully for: {title} ({year})")
         return imdb_data
 
-    except requests.exceptions.Timeout:
-        LOGGER.error(f"IMDB lookup timeout for: {query}")
-        return None
-    except requests.exceptions.RequestException as e:
-        LOGGER.error(f"IMDB lookup request error for {query}: {e}")
-        return None
-    except Exception as e:
-        LOGGER.error(f"Error fetching IMDB data for {query}: {e}")
-        return None
+    async def _lookup(self, key, query):
+        """Returns (imdb_data, cacheable), failures are not cacheable."""
+        db_key = "|".join(key)
+        try:
+            if doc := await database.get_imdb(db_key):
+                return doc["data"], True
+        except Exception as e:
+            LOGGER.error(f"IMDB cache read failed: {e}")
+        if not self._breaker.allow():
+            return None, False
+        try:
+            imdb_data = await wait_for(self._fetch(query), LOOKUP_TIMEOUT)
+        except Exception as e:
+            self._breaker.failure()
+            LOGGER.error(f"Error fetching IMDB data for {query}: {e!r}")
+            return None, False
+        self._breaker.success()
+        try:
+            await database.save_imdb(
+                db_key,
+                imdb_data,
+                CACHE_TTL if imdb_data else MISS_TTL,
+            )
+        except Exception as e:
+            LOGGER.error(f"IMDB cache write failed: {e}")
+        return imdb_data, True
+
+    async def get(self, query):
+        if not query or not query.strip():
+            return None
+        if BeautifulSoup is None:
+            LOGGER.warning("bs4 (BeautifulSoup) not installed; skipping IMDB lookup")
+            return None
+        key = lookup_key(query)
+        if not key[0]:
+            return None
+        if key in self._cache:
+            return self._cache[key]
+        if (task := self._inflight.get(key)) is None:
+            search = " ".join(filter(None, key[:2]))
+            task = bot_loop.create_task(self._lookup(key, search))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        imdb_data, cacheable = await shield(task)
+        if cacheable:
+            self._cache[key] = imdb_data
+        return imdb_data
+
+
+imdb_provider = ImdbProvider()
+
+
+async def get_poster(query):
+    """
+    Fetch IMDB information for a given title
+
+    Args:
+        query (str): Title to search (can include year)
+
+    Returns:
+        dict: IMDB data with keys: title, year, rating, genres, poster
+        None: If lookup fails
+    """
+    return await imdb_provider.get(query)
@@ -1,18 +1,15 @@
-from os import getcwd
 from os import path as ospath
 from re import search as re_search
 from shlex import split as ssplit
 
-import aiohttp
-from aiofiles import open as aiopen
 from aiofiles.os import mkdir
 from aiofiles.os import path as aiopath
 from aiofiles.os import remove as aioremove
 
 from bot import LOGGER
-from bot.core.aeon_client import TgClient
 from bot.helper.aeon_utils.access_check import token_check
 from bot.helper.ext_utils.bot_utils import cmd_exec
+from bot.helper.ext_utils.media_probe import cache_key, fetch_ranges, probe_cache
 from bot.helper.ext_utils.telegraph_helper import telegraph
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.button_build import ButtonMaker
@@ -48,53 +45,42 @@ def parseinfo(out, file_size):
     return tc
 
 
-async def gen_mediainfo(message, link=None, media=None, msg=None):
+async def gen_mediainfo(message, link=None, media=None):
+    key = cache_key(link, media)
+    if link_id := probe_cache.get(key):
+        await send_message(
+            message,
+            f"<blockquote>MediaInfo generated successfully<a href='https://graph.org/{link_id}'>.</a></blockquote>",
+        )
+        return
     temp_send = await send_message(message, "Generating MediaInfo...")
+    path = "Mediainfo/"
+    if not await aiopath.isdir(path):
+        await mkdir(path)
+    if link:
+        filename = re_search(".+/(.+)", link).group(1)
+    else:
+        filename = media.file_name or media.file_unique_id
+    des_path = ospath.join(path, filename)
     try:
-        path = "Mediainfo/"
-        if not await aiopath.isdir(path):
-            await mkdir(path)
-
-        file_size = 0
-        if link:
-            filename = re_search(".+/(.+)", link).group(1)
-            des_path = ospath.join(path, filename)
-            headers = {
-                "user-agent": "Mozilla/5.0 (Linux; Android 12; 2201116PI) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/107.0.0.0 Mobile Safari/537.36",
-            }
-            async with (
-                aiohttp.ClientSession() as session,
-                session.get(link, headers=headers) as response,
-                aiopen(des_path, "wb") as f,
-            ):
-                file_size = int(response.headers.get("Content-Length", 0))
-                async with aiopen(des_path, "wb") as f:
-                    async for chunk in response.content.iter_chunked(10000000):
-                        await f.write(chunk)
-                        break
-        elif media:
-            des_path = ospath.join(path, media.file_name)
-            file_size = media.file_size
-            if file_size <= 30000000:
-                await msg.download(ospath.join(getcwd(), des_path))
-            else:
-                async for chunk in TgClient.bot.stream_media(media, limit=3):
-                    async with aiopen(des_path, "ab") as f:
-                        await f.write(chunk)
-
+        file_size, _ = await fetch_ranges(des_path, link, media)
         stdout, _, _ = await cmd_exec(ssplit(f'mediainfo "{des_path}"'))
 
         tc = f"<h4>{ospath.basename(des_path)}</h4><br><br>"
         if stdout:
             tc += parseinfo(stdout, file_size)
-
+        link_id = (await telegraph.create_page(title="MediaInfo", content=tc))[
+            "path"
+        ]
     except Exception as e:
         LOGGER.error(e)
         await edit_message(temp_send, f"MediaInfo stopped due to {e!s}")
+        return
     finally:
-        await aioremove(des_path)
+        if await aiopath.exists(des_path):
+            await aioremove(des_path)
 
-    link_id = (await telegraph.create_page(title="MediaInfo", content=tc))["path"]
+    probe_cache[key] = link_id
     await temp_send.edit(
         f"<blockquote>MediaInfo generated successfully<a href='https://graph.org/{link_id}'>.</a></blockquote>",
         disable_web_page_preview=False,
@@ -126,7 +112,7 @@ async def mediainfo(_, message):
             (i for i in [reply.document, reply.video, reply.audio] if i),
             None,
         ):
-            await gen_mediainfo(message, None, file, reply)
+            await gen_mediainfo(message, None, file)
         else:
             await send_message(message, help_msg)
     else:
@@ -47,6 +47,7 @@ from bot.helper.telegram_helper.message_utils import (
     get_tg_link_message,
     send_message,
 )
+from bot.helper.telegram_helper.session_pool import session_pool
 
 
 class Mirror(TaskListener):
@@ -82,11 +83,12 @@ class Mirror(TaskListener):
     async def new_event(self):
         text = self.message.text.split("\n")
         input_list = text[0].split(" ")
-        error_msg, error_button = await error_check(self.message)
-        if error_msg:
-            await delete_links(self.message)
-            error = await send_message(self.message, error_msg, error_button)
-            return await auto_delete_message(error, time=300)
+        if not self.batch:
+            error_msg, error_button = await error_check(self.message)
+            if error_msg:
+                await delete_links(self.message)
+                error = await send_message(self.message, error_msg, error_button)
+                return await auto_delete_message(error, time=300)
         user_id = self.message.from_user.id if self.message.from_user else ""
         args = {
             "-doc": False,
@@ -241,11 +243,9 @@ class Mirror(TaskListener):
                                 if fd_name != self.folder_name:
                                     self.same_dir[fd_name]["total"] -= 1
                         else:
-                            self.same_dir = {
-                                self.folder_name: {
-                                    "total": self.multi,
-                                    "tasks": {self.mid},
-                                },
+                            self.same_dir[self.folder_name] = {
+                                "total": self.multi,
+                                "tasks": {self.mid},
                             }
                 elif self.same_dir:
                     async with task_dict_lock:
@@ -255,9 +255,6 @@ class Mirror(TaskListener):
             await self.init_bulk(input_list, bulk_start, bulk_end, Mirror)
             return None
 
-        if len(self.bulk) != 0:
-            del self.bulk[0]
-
         await self.run_multi(input_list, Mirror)
 
         await self.get_tag(text)
@@ -281,30 +278,10 @@ class Mirror(TaskListener):
 
         if isinstance(reply_to, list):
             self.bulk = reply_to
-            b_msg = input_list[:1]
-            self.options = " ".join(input_list[1:])
-            b_msg.append(f"{self.bulk[0]} -i {len(self.bulk)} {self.options}")
-            nextmsg = await send_message(self.message, " ".join(b_msg))
-            nextmsg = await self.client.get_messages(
-                chat_id=self.message.chat.id,
-                message_ids=nextmsg.id,
+            self.options = " ".join(
+                item for item in input_list[1:] if item != self.link
             )
-            if self.message.from_user:
-                nextmsg.from_user = self.user
-            else:
-                nextmsg.sender_chat = self.user
-            await Mirror(
-                self.client,
-                nextmsg,
-                self.is_qbit,
-                self.is_leech,
-                self.is_jd,
-                self.is_nzb,
-                self.same_dir,
-                self.bulk,
-                self.multi_tag,
-                self.options,
-            ).new_event()
+            await self.run_bulk(input_list, Mirror)
             return await delete_links(self.message)
 
         if reply_to:
@@ -332,6 +309,10 @@ class Mirror(TaskListener):
                 self.link = await reply_to.download()
                 file_ = None
 
+        if file_ is None:
+            # Only a Telegram download goes on using the leased user session.
+            session_pool.release(session)
+
         try:
             if (
                 self.link
@@ -371,6 +352,8 @@ class Mirror(TaskListener):
         try:
             await self.before_start()
         except Exception as e:
+            if file_ is not None:
+                session_pool.release(session)
             x = await send_message(self.message, e)
             await self.remove_from_same_dir()
             await delete_links(self.message)
@@ -459,28 +442,28 @@ class Mirror(TaskListener):
 
 
 async def mirror(client, message):
-    bot_loop.create_task(Mirror(client, message).new_event())
+    return bot_loop.create_task(Mirror(client, message).new_event())
 
 
 async def leech(client, message):
-    bot_loop.create_task(Mirror(client, message, is_leech=True).new_event())
+    return bot_loop.create_task(Mirror(client, message, is_leech=True).new_event())
 
 
 async def jd_mirror(client, message):
-    bot_loop.create_task(Mirror(client, message, is_jd=True).new_event())
+    return bot_loop.create_task(Mirror(client, message, is_jd=True).new_event())
 
 
 async def nzb_mirror(client, message):
-    bot_loop.create_task(Mirror(client, message, is_nzb=True).new_event())
+    return bot_loop.create_task(Mirror(client, message, is_nzb=True).new_event())
 
 
 async def jd_leech(client, message):
-    bot_loop.create_task(
+    return bot_loop.create_task(
         Mirror(client, message, is_leech=True, is_jd=True).new_event(),
     )
 
 
 async def nzb_leech(client, message):
-    bot_loop.create_task(
+    return bot_loop.create_task(
         Mirror(client, message, is_leech=True, is_nzb=True).new_event(),
     )
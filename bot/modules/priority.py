@@ -0,0 +1,63 @@
+from html import escape
+
+from bot import queue_dict_lock, task_dict, task_dict_lock
+from bot.helper.ext_utils.bot_utils import new_task
+from bot.helper.ext_utils.status_utils import get_task_by_gid, get_task_by_message
+from bot.helper.ext_utils.task_manager import start_from_queued
+from bot.helper.ext_utils.task_scheduler import PRIORITY_CLASSES, task_scheduler
+from bot.helper.telegram_helper.bot_commands import BotCommands
+from bot.helper.telegram_helper.message_utils import send_message
+
+
+async def _queue_overview():
+    msg = ""
+    async with task_dict_lock, queue_dict_lock:
+        for state, title in (("dl", "Download"), ("up", "Upload")):
+            order = task_scheduler.order(state)
+            if not order:
+                continue
+            msg += f"<b>{title} queue:</b>\n"
+            for index, mid in enumerate(order, start=1):
+                if (task := task_dict.get(mid)) is None:
+                    continue
+                entry = task_scheduler.get(mid)
+                msg += f"{index}. <code>{task.gid()}</code> [{entry.priority}] "
+                msg += f"{escape(task.name())}\n"
+    return msg or "No queued tasks!"
+
+
+@new_task
+async def set_priority(_, message):
+    msg = message.text.split()
+    if len(msg) > 2:
+        gid, priority = msg[1], msg[2]
+        task = await get_task_by_gid(gid)
+        if task is None:
+            await send_message(message, f"GID: <code>{gid}</code> Not Found.")
+            return
+    elif len(msg) == 2 and (reply_to_id := message.reply_to_message_id):
+        priority = msg[1]
+        task = await get_task_by_message(reply_to_id)
+        if task is None:
+            await send_message(message, "This is not an active task!")
+            return
+    else:
+        usage = f"""Send <code>/{BotCommands.PriorityCommand} GID class</code> or reply to a task command with <code>/{BotCommands.PriorityCommand} class</code> to re-rank a queued task.
+Classes: <code>{"</code>, <code>".join(PRIORITY_CLASSES)}</code> or <code>top</code> to release it next.
+
+{await _queue_overview()}"""
+        await send_message(message, usage)
+        return
+    priority = priority.lower()
+    if priority not in PRIORITY_CLASSES and priority != "top":
+        await send_message(message, f"Unknown priority class: {escape(priority)}")
+        return
+    async with queue_dict_lock:
+        ranked = task_scheduler.set_priority(task.listener.mid, priority)
+    if not ranked:
+        await send_message(message, "This task not in queue!")
+        return
+    if priority != "top":
+        task.listener.priority = priority
+    await send_message(message, f"Task re-ranked to <b>{priority}</b>!")
+    await start_from_queued()
@@ -0,0 +1,32 @@
+from io import BytesIO
+
+from bot.helper.ext_utils.bot_utils import new_task
+from bot.helper.ext_utils.metrics import profile_loop
+from bot.helper.telegram_helper.bot_commands import BotCommands
+from bot.helper.telegram_helper.message_utils import (
+    delete_message,
+    send_file,
+    send_message,
+)
+
+MAX_PROFILE_TIME = 120
+
+
+@new_task
+async def loop_profile(_, message):
+    args = message.text.split()
+    seconds = 10
+    if len(args) > 1:
+        if not args[1].isdigit() or not 0 < int(args[1]) <= MAX_PROFILE_TIME:
+            await send_message(
+                message,
+                f"Send <code>/{BotCommands.ProfileCommand} seconds</code> with a duration between 1 and {MAX_PROFILE_TIME}.",
+            )
+            return
+        seconds = int(args[1])
+    msg = await send_message(message, f"Sampling the event loop for {seconds}s...")
+    report = await profile_loop(seconds)
+    await delete_message(msg)
+    with BytesIO(str.encode(report)) as out_file:
+        out_file.name = "loop_profile.txt"
+        await send_file(message, out_file)
@@ -17,6 +17,7 @@ from bot.helper.ext_utils.db_handler import database
 from bot.helper.ext_utils.files_utils import clean_all
 from bot.helper.telegram_helper import button_build
 from bot.helper.telegram_helper.message_utils import delete_message, send_message
+from bot.helper.telegram_helper.session_pool import session_pool
 
 
 @new_task
@@ -99,6 +100,7 @@ async def confirm_restart(_, query):
         intervals["stopAll"] = True
         restart_message = await send_message(reply_to, "Restarting...")
         await delete_message(message)
+        await session_pool.stop_all()
         await TgClient.stop()
         if scheduler.running:
             scheduler.shutdown(wait=False)
@@ -108,6 +110,8 @@ async def confirm_restart(_, query):
             jd.cancel()
         if nzb := intervals["nzb"]:
             nzb.cancel()
+        if disk := intervals["disk"]:
+            disk.cancel()
         if st := intervals["status"]:
             for intvl in list(st.values()):
                 intvl.cancel()
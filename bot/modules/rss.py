@@ -3,13 +3,10 @@ from datetime import datetime, timedelta
 from functools import partial
 from io import BytesIO
 from re import IGNORECASE, compile
-from time import time
 
 from apscheduler.triggers.interval import IntervalTrigger
 from feedparser import parse as feed_parse
 from httpx import AsyncClient
-from pyrogram.filters import create
-from pyrogram.handlers import MessageHandler
 
 from bot import LOGGER, rss_dict, scheduler
 from bot.core.config_manager import Config
@@ -19,6 +16,7 @@ from bot.helper.ext_utils.exceptions import RssShutdownException
 from bot.helper.ext_utils.help_messages import RSS_HELP_MESSAGE
 from bot.helper.ext_utils.status_utils import get_readable_file_size
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.conversation import conversation
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.message_utils import (
     delete_message,
@@ -29,7 +27,6 @@ from bot.helper.telegram_helper.message_utils import (
 )
 
 rss_dict_lock = Lock()
-handler_dict = {}
 size_regex = compile(r"(\d+(\.\d+)?\s?(GB|MB|KB|GiB|MiB|KiB))", IGNORECASE)
 
 headers = {
@@ -79,7 +76,6 @@ async def get_rss_menu(_, message):
 @new_task
 async def rss_sub(_, message, pre_event):
     user_id = message.from_user.id
-    handler_dict[user_id] = False
     if username := message.from_user.username:
         tag = f"@{username}"
     else:
@@ -231,7 +227,6 @@ async def get_user_id(title):
 @new_task
 async def rss_update(_, message, pre_event, state):
     user_id = message.from_user.id
-    handler_dict[user_id] = False
     titles = message.text.split()
     is_sudo = await CustomFilters.sudo("", message)
     updated = []
@@ -333,7 +328,6 @@ async def rss_list(query, start, all_users=False):
 @new_task
 async def rss_get(_, message, pre_event):
     user_id = message.from_user.id
-    handler_dict[user_id] = False
     args = message.text.split()
     if len(args) < 2:
         await send_message(
@@ -397,7 +391,6 @@ async def rss_get(_, message, pre_event):
 @new_task
 async def rss_edit(_, message, pre_event):
     user_id = message.from_user.id
-    handler_dict[user_id] = False
     items = message.text.split("\n")
     updated = False
     for item in items:
@@ -450,7 +443,6 @@ async def rss_edit(_, message, pre_event):
 
 @new_task
 async def rss_delete(_, message, pre_event):
-    handler_dict[message.from_user.id] = False
     users = message.text.split()
     for user in users:
         user = int(user)
@@ -461,28 +453,18 @@ async def rss_delete(_, message, pre_event):
 
 
 async def event_handler(client, query, pfunc):
-    user_id = query.from_user.id
-    handler_dict[user_id] = True
-    start_time = time()
-
-    async def event_filter(_, __, event):
-        user = event.from_user or event.sender_chat
-        return bool(
-            user.id == user_id
-            and event.chat.id == query.message.chat.id
-            and event.text,
+    try:
+        event = await conversation.wait_for_message(
+            "rss",
+            query.message.chat.id,
+            query.from_user.id,
+            lambda event: bool(event.text),
         )
-
-    handler = client.add_handler(
-        MessageHandler(pfunc, create(event_filter)),
-        group=-1,
-    )
-    while handler_dict[user_id]:
-        await sleep(0.5)
-        if time() - start_time > 60:
-            handler_dict[user_id] = False
-            await update_rss_menu(query)
-    client.remove_handler(*handler)
+    except TimeoutError:
+        await update_rss_menu(query)
+        return
+    if event is not None:
+        await pfunc(client, event)
 
 
 @new_task
@@ -497,16 +479,16 @@ async def rss_listener(client, query):
         )
     elif data[1] == "close":
         await query.answer()
-        handler_dict[user_id] = False
+        conversation.cancel("rss", user_id=user_id)
         await delete_message(message.reply_to_message)
         await delete_message(message)
     elif data[1] == "back":
         await query.answer()
-        handler_dict[user_id] = False
+        conversation.cancel("rss", user_id=user_id)
         await update_rss_menu(query)
     elif data[1] == "sub":
         await query.answer()
-        handler_dict[user_id] = False
+        conversation.cancel("rss", user_id=user_id)
         buttons = ButtonMaker()
         buttons.data_button("Back", f"rss back {user_id}")
         buttons.data_button("Close", f"rss close {user_id}")
@@ -515,7 +497,7 @@ async def rss_listener(client, query):
         pfunc = partial(rss_sub, pre_event=query)
         await event_handler(client, query, pfunc)
     elif data[1] == "list":
-        handler_dict[user_id] = False
+        conversation.cancel("rss", user_id=user_id)
         if len(rss_dict.get(int(data[2]), {})) == 0:
             await query.answer(text="No subscriptions!", show_alert=True)
         else:
@@ -523,7 +505,7 @@ async def rss_listener(client, query):
             start = int(data[3])
             await rss_list(query, start)
     elif data[1] == "get":
-        handler_dict[user_id] = False
+        conversation.cancel("rss", user_id=user_id)
         if len(rss_dict.get(int(data[2]), {})) == 0:
             await query.answer(text="No subscriptions!", show_alert=True)
         else:
@@ -540,7 +522,7 @@ async def rss_listener(client, query):
             pfunc = partial(rss_get, pre_event=query)
             await event_handler(client, query, pfunc)
     elif data[1] in ["unsubscribe", "pause", "resume"]:
-        handler_dict[user_id] = False
+        conversation.cancel("rss", user_id=user_id)
         if len(rss_dict.get(int(data[2]), {})) == 0:
             await query.answer(text="No subscriptions!", show_alert=True)
         else:
@@ -563,7 +545,7 @@ async def rss_listener(client, query):
             pfunc = partial(rss_update, pre_event=query, state=data[1])
             await event_handler(client, query, pfunc)
     elif data[1] == "edit":
-        handler_dict[user_id] = False
+        conversation.cancel("rss", user_id=user_id)
         if len(rss_dict.get(int(data[2]), {})) == 0:
             await query.answer(text="No subscriptions!", show_alert=True)
         else:
@@ -584,7 +566,7 @@ Timeout: 60 sec. Argument -c for command and arguments
             pfunc = partial(rss_edit, pre_event=query)
             await event_handler(client, query, pfunc)
     elif data[1].startswith("uall"):
-        handler_dict[user_id] = False
+        conversation.cancel("rss", user_id=user_id)
         if len(rss_dict.get(int(data[2]), {})) == 0:
             await query.answer(text="No subscriptions!", show_alert=True)
             return
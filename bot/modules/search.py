@@ -5,7 +5,7 @@ from bot import LOGGER
 from bot.core.torrent_manager import TorrentManager
 from bot.helper.ext_utils.bot_utils import new_task
 from bot.helper.ext_utils.status_utils import get_readable_file_size
-from bot.helper.ext_utils.telegraph_helper import telegraph
+from bot.helper.ext_utils.telegraph_helper import plan_pages, telegraph
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import edit_message, send_message
 
@@ -77,10 +77,9 @@ async def search(key, site, message):
 
 
 async def get_result(search_results, key, message):
-    telegraph_content = []
-    msg = f"<h4>PLUGINS Search Result(s) For {key}</h4>"
+    telegraph_content = [f"<h4>PLUGINS Search Result(s) For {key}</h4>"]
     for index, result in enumerate(search_results, start=1):
-        msg += f"<a href='{result.descrLink}'>{escape(result.fileName)}</a><br>"
+        msg = f"<a href='{result.descrLink}'>{escape(result.fileName)}</a><br>"
         msg += f"<b>Size: </b>{get_readable_file_size(result.fileSize)}<br>"
         msg += f"<b>Seeders: </b>{result.nbSeeders} | <b>Leechers: </b>{result.nbLeechers}<br>"
         link = result.fileUrl
@@ -88,36 +87,17 @@ async def get_result(search_results, key, message):
             msg += f"<b>Share Magnet to</b> <a href='http://t.me/share/url?url={quote(link)}'>Telegram</a><br><br>"
         else:
             msg += f"<a href='{link}'>Direct Link</a><br><br>"
-
-        if len(msg.encode("utf-8")) > 39000:
-            telegraph_content.append(msg)
-            msg = ""
+        telegraph_content.append(msg)
 
         if index == TELEGRAPH_LIMIT:
             break
 
-    if msg != "":
-        telegraph_content.append(msg)
-
+    pages = plan_pages(telegraph_content)
     await edit_message(
         message,
-        f"<b>Creating</b> {len(telegraph_content)} <b>Telegraph pages.</b>",
+        f"<b>Creating</b> {len(pages)} <b>Telegraph pages.</b>",
     )
-    path = [
-        (
-            await telegraph.create_page(
-                title="Mirror-leech-bot Torrent Search",
-                content=content,
-            )
-        )["path"]
-        for content in telegraph_content
-    ]
-    if len(path) > 1:
-        await edit_message(
-            message,
-            f"<b>Editing</b> {len(telegraph_content)} <b>Telegraph pages.</b>",
-        )
-        await telegraph.edit_telegraph(path, telegraph_content)
+    path = await telegraph.publish("Mirror-leech-bot Torrent Search", pages)
     return f"https://telegra.ph/{path[0]}"
 
 
@@ -1,9 +1,10 @@
-import asyncio
 import os
 import shutil
 import tempfile
-import time
 
+from bot.helper.ext_utils.bot_utils import cmd_exec
+from bot.helper.ext_utils.media_probe import fetch_ranges, probe_cache
+from bot.helper.ext_utils.status_utils import get_readable_file_size
 from bot.helper.telegram_helper.message_utils import (
     delete_message,
     edit_message,
@@ -23,6 +24,8 @@ SUPPORTED_EXTS = {
     ".raw",
     ".gsm",
 }
+# Enough audio for a readable spectrogram of the opening minutes.
+SPECTRUM_SIZE = 50 * 1024 * 1024
 
 
 def is_supported(filename: str) -> bool:
@@ -45,41 +48,31 @@ async def spectrum_handler(_, message):
         )
         return
 
+    key = ("spectrum", media.file_unique_id)
+    if photo := probe_cache.get(key):
+        await message.reply_photo(photo)
+        return
+
     temp_dir = tempfile.mkdtemp(prefix="sox_")
     file_path = os.path.join(temp_dir, media.file_name or "input")
     output_path = os.path.join(temp_dir, "spectrum.png")
 
-    progress_message = await send_message(message, "Downloading... 0%")
-    last_update = 0
-
-    async def progress(current, total):
-        nonlocal last_update
-        now = time.time()
-        if now - last_update > 2:
-            percent = current * 100 / total
-            downloaded_mb = current / (1024 * 1024)
-            total_mb = total / (1024 * 1024)
-            await edit_message(
-                progress_message,
-                f"Downloading... {downloaded_mb:.2f}MB / {total_mb:.2f}MB {percent:.1f}%",
-            )
-            last_update = now
+    progress_message = await send_message(message, "Downloading...")
 
     try:
-        await replied.download(file_path, progress=progress)
+        # Decoders stop cleanly at the end of a truncated stream, so a long
+        # file is rendered from its opening window instead of downloaded.
+        _, complete = await fetch_ranges(
+            file_path,
+            media=media,
+            head=SPECTRUM_SIZE,
+            tail=0,
+        )
         await edit_message(progress_message, "Generating spectrum...")
 
-        process = await asyncio.create_subprocess_exec(
-            "sox",
-            file_path,
-            "-n",
-            "spectrogram",
-            "-o",
-            output_path,
-            stdout=asyncio.subprocess.DEVNULL,
-            stderr=asyncio.subprocess.DEVNULL,
+        _, _, return_code = await cmd_exec(
+            ["sox", file_path, "-n", "spectrogram", "-o", output_path],
         )
-        return_code = await process.wait()
 
         if return_code != 0:
             await edit_message(
@@ -88,7 +81,13 @@ async def spectrum_handler(_, message):
             )
             return
 
-        await message.reply_photo(output_path)
+        caption = (
+            ""
+            if complete
+            else f"Spectrum of the first {get_readable_file_size(SPECTRUM_SIZE)}"
+        )
+        reply = await message.reply_photo(output_path, caption=caption)
+        probe_cache[key] = reply.photo.file_id
         await delete_message(progress_message)
 
     except Exception as e:
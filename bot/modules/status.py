@@ -1,4 +1,3 @@
-from asyncio import gather, iscoroutinefunction
 from time import time
 
 from psutil import cpu_percent, disk_usage, virtual_memory
@@ -19,7 +18,7 @@ from bot.helper.ext_utils.status_utils import (
     MirrorStatus,
     get_readable_file_size,
     get_readable_time,
-    speed_string_to_bytes,
+    get_task_stats,
 )
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import (
@@ -31,24 +30,28 @@ from bot.helper.telegram_helper.message_utils import (
     update_status_message,
 )
 
-
-async def get_download_status(download):
-    tool = download.tool
-    if tool in [
-        "telegram",
-        "yt-dlp",
-        "rclone",
-        "gDriveApi",
-        "gofile",
-    ]:
-        speed = download.speed()
-    else:
-        speed = 0
-    return (
-        await download.status()
-        if iscoroutinefunction(download.status)
-        else download.status()
-    ), speed
+# Tools whose speed isn't part of the totals of an engine.
+TRANSFER_TOOLS = ["telegram", "yt-dlp", "rclone", "gdriveAPI", "gofile"]
+OVERVIEW_KEYS = {
+    MirrorStatus.STATUS_DOWNLOAD: "Download",
+    MirrorStatus.STATUS_UPLOAD: "Upload",
+    MirrorStatus.STATUS_SEED: "Seed",
+    MirrorStatus.STATUS_ARCHIVE: "Archive",
+    MirrorStatus.STATUS_EXTRACT: "Extract",
+    MirrorStatus.STATUS_SPLIT: "Split",
+    MirrorStatus.STATUS_QUEUEDL: "QueueDl",
+    MirrorStatus.STATUS_QUEUEUP: "QueueUp",
+    MirrorStatus.STATUS_CLONE: "Clone",
+    MirrorStatus.STATUS_CHECK: "CheckUp",
+    MirrorStatus.STATUS_PAUSED: "Pause",
+    MirrorStatus.STATUS_SAMVID: "SamVid",
+    MirrorStatus.STATUS_CONVERT: "ConvertMedia",
+    MirrorStatus.STATUS_FFMPEG: "FFmpeg",
+    MirrorStatus.STATUS_METADATA: "Metadata",
+    MirrorStatus.STATUS_WATERMARK: "Watermark",
+    MirrorStatus.STATUS_ETHUMB: "EmbedThumb",
+    MirrorStatus.STATUS_YT: "YtUp",
+}
 
 
 @new_task
@@ -116,76 +119,16 @@ async def status_pages(_, query):
             jdres = await jdownloader.device.downloadcontroller.get_speed_in_bytes()
             ds += jdres
         message = query.message
-        tasks = {
-            "Download": 0,
-            "Upload": 0,
-            "Seed": 0,
-            "Archive": 0,
-            "Extract": 0,
-            "Split": 0,
-            "QueueDl": 0,
-            "QueueUp": 0,
-            "Clone": 0,
-            "CheckUp": 0,
-            "Pause": 0,
-            "SamVid": 0,
-            "ConvertMedia": 0,
-            "FFmpeg": 0,
-            "Metadata": 0,
-            "Watermark": 0,
-            "EmbedThumb": 0,
-            "YtUp": 0,
-        }
-        dl_speed = ds
-        up_speed = 0
-        seed_speed = ss
+        tasks = dict.fromkeys(OVERVIEW_KEYS.values(), 0)
         async with task_dict_lock:
-            status_results = await gather(
-                *(get_download_status(download) for download in task_dict.values()),
-            )
-            for status, speed in status_results:
-                match status:
-                    case MirrorStatus.STATUS_DOWNLOAD:
-                        tasks["Download"] += 1
-                        if speed:
-                            dl_speed += speed_string_to_bytes(speed)
-                    case MirrorStatus.STATUS_UPLOAD:
-                        tasks["Upload"] += 1
-                        up_speed += speed_string_to_bytes(speed)
-                    case MirrorStatus.STATUS_SEED:
-                        tasks["Seed"] += 1
-                    case MirrorStatus.STATUS_ARCHIVE:
-                        tasks["Archive"] += 1
-                    case MirrorStatus.STATUS_EXTRACT:
-                        tasks["Extract"] += 1
-                    case MirrorStatus.STATUS_SPLIT:
-                        tasks["Split"] += 1
-                    case MirrorStatus.STATUS_QUEUEDL:
-                        tasks["QueueDl"] += 1
-                    case MirrorStatus.STATUS_QUEUEUP:
-                        tasks["QueueUp"] += 1
-                    case MirrorStatus.STATUS_CLONE:
-                        tasks["Clone"] += 1
-                    case MirrorStatus.STATUS_CHECK:
-                        tasks["CheckUp"] += 1
-                    case MirrorStatus.STATUS_PAUSED:
-                        tasks["Pause"] += 1
-                    case MirrorStatus.STATUS_SAMVID:
-                        tasks["SamVid"] += 1
-                    case MirrorStatus.STATUS_CONVERT:
-                        tasks["ConvertMedia"] += 1
-                    case MirrorStatus.STATUS_FFMPEG:
-                        tasks["FFmpeg"] += 1
-                    case MirrorStatus.STATUS_METADATA:
-                        tasks["Metadata"] += 1
-                    case MirrorStatus.STATUS_WATERMARK:
-                        tasks["Watermark"] += 1
-                    case MirrorStatus.STATUS_ETHUMB:
-                        tasks["EmbedThumb"] += 1
-                    case MirrorStatus.STATUS_YT:
-                        tasks["YtUp"] += 1
-                    case _:
-                        tasks["Download"] += 1
+            stats = await get_task_stats()
+        for status, count in stats["statuses"].items():
+            tasks[OVERVIEW_KEYS.get(status, "Download")] += count
+        dl_speed = ds + sum(
+            speed for tool, speed in stats["tools"].items() if tool in TRANSFER_TOOLS
+        )
+        up_speed = stats["upload"]
+        seed_speed = ss
 
         msg = f"""<b>DL:</b> {tasks["Download"]} | <b>UP:</b> {tasks["Upload"]} | <b>SD:</b> {tasks["Seed"]} | <b>AR:</b> {tasks["Archive"]}
 <b>EX:</b> {tasks["Extract"]} | <b>SP:</b> {tasks["Split"]} | <b>QD:</b> {tasks["QueueDl"]} | <b>QU:</b> {tasks["QueueUp"]}
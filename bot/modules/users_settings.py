@@ -1,15 +1,11 @@
-from asyncio import sleep
 from functools import partial
 from html import escape
 from io import BytesIO
 from os import getcwd
 from re import findall
-from time import time
 
 from aiofiles.os import makedirs, remove
 from aiofiles.os import path as aiopath
-from pyrogram.filters import create
-from pyrogram.handlers import MessageHandler
 
 from bot import auth_chats, excluded_extensions, sudo_users, user_data
 from bot.core.aeon_client import TgClient
@@ -23,14 +19,15 @@ from bot.helper.ext_utils.db_handler import database
 from bot.helper.ext_utils.help_messages import user_settings_text
 from bot.helper.ext_utils.media_utils import create_thumb
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.conversation import conversation
 from bot.helper.telegram_helper.message_utils import (
     delete_message,
     edit_message,
     send_file,
     send_message,
 )
+from bot.helper.telegram_helper.session_pool import session_pool
 
-handler_dict = {}
 no_thumb = "https://graph.org/file/73ae908d18c6b38038071.jpg"
 
 leech_options = [
@@ -542,7 +539,7 @@ Watermark text is <code>{wmt}</code>"""
 
 
 async def update_user_settings(query, stype="main"):
-    handler_dict[query.from_user.id] = False
+    conversation.cancel("uset", user_id=query.from_user.id)
     msg, button, t = await get_user_settings(query.from_user, stype)
     await edit_message(query.message, msg, button, t)
 
@@ -550,7 +547,7 @@ async def update_user_settings(query, stype="main"):
 @new_task
 async def send_user_settings(_, message):
     from_user = message.from_user
-    handler_dict[from_user.id] = False
+    conversation.cancel("uset", user_id=from_user.id)
     msg, button, t = await get_user_settings(from_user)
     await send_message(message, msg, button, t)
 
@@ -558,7 +555,6 @@ async def send_user_settings(_, message):
 @new_task
 async def add_file(_, message, ftype):
     user_id = message.from_user.id
-    handler_dict[user_id] = False
     if ftype == "THUMBNAIL":
         des_dir = await create_thumb(message, user_id)
     elif ftype == "RCLONE_CONFIG":
@@ -579,7 +575,6 @@ async def add_file(_, message, ftype):
 @new_task
 async def add_one(_, message, option):
     user_id = message.from_user.id
-    handler_dict[user_id] = False
     user_dict = user_data.get(user_id, {})
     value = message.text
     if value.startswith("{") and value.endswith("}"):
@@ -602,7 +597,6 @@ async def add_one(_, message, option):
 @new_task
 async def remove_one(_, message, option):
     user_id = message.from_user.id
-    handler_dict[user_id] = False
     user_dict = user_data.get(user_id, {})
     names = message.text.split("/")
     for name in names:
@@ -615,7 +609,6 @@ async def remove_one(_, message, option):
 @new_task
 async def set_option(_, message, option):
     user_id = message.from_user.id
-    handler_dict[user_id] = False
     value = message.text
     if option == "LEECH_SPLIT_SIZE":
         if not value.isdigit():
@@ -664,10 +657,12 @@ async def set_option(_, message, option):
     update_user_ldata(user_id, option, value)
     await delete_message(message)
     await database.update_user_data(user_id)
+    if option == "USER_SESSION":
+        session_pool.warm(user_id)
 
 
 async def get_menu(option, message, user_id):
-    handler_dict[user_id] = False
+    conversation.cancel("uset", user_id=user_id)
     user_dict = user_data.get(user_id, {})
     buttons = ButtonMaker()
     if option in ["THUMBNAIL", "RCLONE_CONFIG", "TOKEN_PICKLE"]:
@@ -723,7 +718,6 @@ async def get_menu(option, message, user_id):
 
 async def set_ffmpeg_variable(_, message, key, value, index):
     user_id = message.from_user.id
-    handler_dict[user_id] = False
     txt = message.text
     user_dict = user_data.setdefault(user_id, {})
     ffvar_data = user_dict.setdefault("FFMPEG_VARIABLES", {})
@@ -791,32 +785,24 @@ async def ffmpeg_variables(
 
 
 async def event_handler(client, query, pfunc, photo=False, document=False):
-    user_id = query.from_user.id
-    handler_dict[user_id] = True
-    start_time = time()
-
-    async def event_filter(_, __, event):
+    def check(event):
         if photo:
-            mtype = event.photo
-        elif document:
-            mtype = event.document
-        else:
-            mtype = event.text
-        user = event.from_user or event.sender_chat
-        return bool(
-            user.id == user_id and event.chat.id == query.message.chat.id and mtype,
+            return bool(event.photo)
+        if document:
+            return bool(event.document)
+        return bool(event.text)
+
+    try:
+        event = await conversation.wait_for_message(
+            "uset",
+            query.message.chat.id,
+            query.from_user.id,
+            check,
         )
-
-    handler = client.add_handler(
-        MessageHandler(pfunc, filters=create(event_filter)),
-        group=-1,
-    )
-
-    while handler_dict[user_id]:
-        await sleep(0.5)
-        if time() - start_time > 60:
-            handler_dict[user_id] = False
-    client.remove_handler(*handler)
+    except TimeoutError:
+        return
+    if event is not None:
+        await pfunc(client, event)
 
 
 @new_task
@@ -826,7 +812,7 @@ async def edit_user_settings(client, query):
     name = from_user.mention
     message = query.message
     data = query.data.split()
-    handler_dict[user_id] = False
+    conversation.cancel("uset", user_id=user_id)
     thumb_path = f"thumbnails/{user_id}.jpg"
     rclone_conf = f"rclone/{user_id}.conf"
     token_pickle = f"tokens/{user_id}.pickle"
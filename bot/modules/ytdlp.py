@@ -3,8 +3,6 @@ from functools import partial
 from time import time
 
 from httpx import AsyncClient
-from pyrogram.filters import regex, user
-from pyrogram.handlers import CallbackQueryHandler
 from yt_dlp import YoutubeDL
 
 from bot import DOWNLOAD_DIR, LOGGER, bot_loop, task_dict_lock
@@ -26,6 +24,7 @@ from bot.helper.mirror_leech_utils.download_utils.yt_dlp_download import (
     YoutubeDLHelper,
 )
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.telegram_helper.conversation import conversation
 from bot.helper.telegram_helper.message_utils import (
     auto_delete_message,
     delete_links,
@@ -85,22 +84,16 @@ class YtSelection:
 
     async def _event_handler(self):
         pfunc = partial(select_format, obj=self)
-        handler = self.listener.client.add_handler(
-            CallbackQueryHandler(
-                pfunc,
-                filters=regex("^ytq") & user(self.listener.user_id),
-            ),
-            group=-1,
-        )
-        try:
-            await wait_for(self.event.wait(), timeout=self._timeout)
-        except Exception:
-            await edit_message(self._reply_to, "Timed Out. Task has been cancelled!")
-            self.qual = None
-            self.listener.is_cancelled = True
-            self.event.set()
-        finally:
-            self.listener.client.remove_handler(*handler)
+        with conversation.callbacks(self.listener.user_id, "ytq", pfunc):
+            try:
+                await wait_for(self.event.wait(), timeout=self._timeout)
+            except Exception:
+                await edit_message(
+                    self._reply_to, "Timed Out. Task has been cancelled!"
+                )
+                self.qual = None
+                self.listener.is_cancelled = True
+                self.event.set()
 
     async def get_quality(self, result):
         buttons = ButtonMaker()
@@ -302,11 +295,12 @@ class YtDlp(TaskListener):
         text = self.message.text.split("\n")
         input_list = text[0].split(" ")
         qual = ""
-        error_msg, error_button = await error_check(self.message)
-        if error_msg:
-            await delete_links(self.message)
-            error = await send_message(self.message, error_msg, error_button)
-            return await auto_delete_message(error, time=300)
+        if not self.batch:
+            error_msg, error_button = await error_check(self.message)
+            if error_msg:
+                await delete_links(self.message)
+                error = await send_message(self.message, error_msg, error_button)
+                return await auto_delete_message(error, time=300)
         args = {
             "-doc": False,
             "-med": False,
@@ -443,11 +437,9 @@ class YtDlp(TaskListener):
                                 if fd_name != self.folder_name:
                                     self.same_dir[fd_name]["total"] -= 1
                         else:
-                            self.same_dir = {
-                                self.folder_name: {
-                                    "total": self.multi,
-                                    "tasks": {self.mid},
-                                },
+                            self.same_dir[self.folder_name] = {
+                                "total": self.multi,
+                                "tasks": {self.mid},
                             }
                 elif self.same_dir:
                     async with task_dict_lock:
@@ -457,9 +449,6 @@ class YtDlp(TaskListener):
             await self.init_bulk(input_list, bulk_start, bulk_end, YtDlp)
             return None
 
-        if len(self.bulk) != 0:
-            del self.bulk[0]
-
         path = f"{DOWNLOAD_DIR}{self.mid}{self.folder_name}"
 
         await self.get_tag(text)
@@ -109,6 +109,18 @@ WEB_PINCODE = False  # Require a PIN code for web file selection
 QUEUE_ALL = 0  # Max concurrent tasks (upload + download)
 QUEUE_DOWNLOAD = 0  # Max concurrent download tasks
 QUEUE_UPLOAD = 0  # Max concurrent upload tasks
+QUEUE_USER_LIMIT = 0  # Max concurrent tasks per user (0 for no limit)
+DISK_ADMISSION = True  # Keep downloads queued until the disk can hold them and their post-processing
+QUEUE_AGING_TIME = 600  # Seconds a queued task waits before it is promoted to the next priority class
+BATCH_ADMISSION_RATE = 2  # Bulk/multi items admitted per second (0 for no throttling)
+
+# Cluster mode (requires DATABASE_URL)
+CLUSTER_MODE = ""  # "coordinator" runs the bot and queues mirror/leech tasks, "worker" runs them. Empty for a single process
+CLUSTER_LEASE = 60  # Seconds a worker holds a task without a heartbeat before it is re-queued
+CLUSTER_MAX_ATTEMPTS = 3  # Workers a task may be lost on before it fails
+WORKER_ID = ""  # Unique name of this worker (Default: hostname-pid)
+WORKER_SESSION_STRING = ""  # User session of this worker, used instead of USER_SESSION_STRING. Every worker needs its own
+WORKER_TASKS = 4  # Max tasks this worker runs at once
 
 # RSS
 RSS_DELAY = 600  # RSS feed check interval in seconds (Default: 600)
@@ -0,0 +1,125 @@
+from collections import Counter
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+# Loaded by path, importing the bot package would start its daemons.
+_spec = spec_from_file_location(
+    "task_scheduler",
+    Path(__file__).parents[1] / "bot/helper/ext_utils/task_scheduler.py",
+)
+task_scheduler = module_from_spec(_spec)
+_spec.loader.exec_module(task_scheduler)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class Queue:
+    """A download queue with fake listeners, released like task_manager does."""
+
+    def __init__(self, user_limit=0, aging_interval=0):
+        self.clock = FakeClock()
+        self.scheduler = task_scheduler.TaskScheduler(aging_interval, self.clock)
+        self.user_limit = user_limit
+        self.running = []
+        self.queued = {}
+
+    def run(self, mid, user_id):
+        self.running.append(SimpleNamespace(mid=mid, user_id=user_id))
+
+    def queue(self, mid, user_id, priority="normal"):
+        self.queued[mid] = SimpleNamespace(mid=mid, user_id=user_id)
+        self.scheduler.add("dl", mid, user_id, priority)
+
+    def select(self, slots=None, fits=None):
+        running = Counter(listener.user_id for listener in self.running)
+        return self.scheduler.select(
+            "dl",
+            self.queued,
+            slots,
+            running,
+            self.user_limit,
+            fits,
+        )
+
+
+@pytest.fixture
+def queue():
+    return Queue()
+
+
+def test_higher_class_is_released_first(queue):
+    queue.queue(1, 100, "normal")
+    queue.queue(2, 200, "paid")
+    queue.queue(3, 300, "owner")
+    assert queue.select(1) == [3]
+    assert queue.select() == [3, 2, 1]
+
+
+def test_fair_share_between_users(queue):
+    queue.run(10, 100)
+    queue.run(11, 100)
+    queue.queue(1, 100)
+    queue.queue(2, 200)
+    assert queue.select() == [2, 1]
+
+
+def test_weight_outranks_running_tasks(queue):
+    queue.run(10, 100)
+    queue.queue(1, 100, "sudo")
+    queue.queue(2, 200, "normal")
+    # (1 + 1) / 4 for the sudo user against (0 + 1) / 1.
+    assert queue.select(1) == [1]
+
+
+def test_user_limit_skips_capped_users():
+    queue = Queue(user_limit=1)
+    queue.run(10, 100)
+    queue.queue(1, 100, "owner")
+    queue.queue(2, 200)
+    queue.queue(3, 200)
+    assert queue.select() == [2]
+
+
+def test_waiting_tasks_age_into_higher_classes():
+    queue = Queue(aging_interval=60)
+    queue.queue(1, 100, "normal")
+    queue.clock.now = 130
+    queue.queue(2, 200, "paid")
+    assert queue.select(1) == [1]
+
+
+def test_top_overrides_fair_share_and_class(queue):
+    queue.run(10, 100)
+    queue.run(11, 100)
+    queue.queue(1, 100)
+    queue.queue(2, 200, "owner")
+    queue.queue(3, 300)
+    queue.scheduler.set_priority(3, "top")
+    queue.scheduler.set_priority(1, "top")
+    assert queue.select() == [1, 3, 2]
+
+
+def test_tasks_that_left_the_queue_are_dropped(queue):
+    queue.queue(1, 100)
+    queue.queue(2, 200)
+    del queue.queued[1]
+    assert queue.select() == [2]
+    assert queue.scheduler.get(1) is None
+
+
+def test_tasks_that_dont_fit_keep_their_users_share():
+    queue = Queue(user_limit=1)
+    queue.queue(1, 100, "owner")
+    queue.queue(2, 100, "owner")
+    queue.queue(3, 200)
+    assert queue.select(1, fits=lambda mid: mid != 1) == [2]
+    assert queue.select(fits=lambda mid: mid != 1) == [2, 3]
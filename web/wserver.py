@@ -7,11 +7,12 @@ from contextlib import asynccontextmanager
 from logging import INFO, WARNING, FileHandler, StreamHandler, basicConfig, getLogger
 
 from aioaria2 import Aria2HttpClient
+from aiofiles import open as aiopen
 from aiohttp.client_exceptions import ClientError
 from aioqbt.client import create_client
 from aioqbt.exc import AQError
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 
 from sabnzbdapi import SabnzbdClient
@@ -253,6 +254,20 @@ async def set_aria2(gid, selected_files):
         LOGGER.info(f"Verification Failed! Report! gid: {gid}")
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Written periodically by the bot process, see bot/helper/ext_utils/metrics.py
+    try:
+        async with aiopen("metrics.prom") as f:
+            content = await f.read()
+    except FileNotFoundError:
+        return PlainTextResponse("Metrics not published yet!", status_code=503)
+    return PlainTextResponse(
+        content,
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/", response_class=HTMLResponse)
 async def homepage():
     return (